@@ -90,13 +90,13 @@ export const MessageItem = React.memo(({ message, index, isFolded, onToggleFold,
   const messageClass =
     message.role === 'user'
       ? 'user-message'
-      : message.type === 'tool_calls' || message.type === 'tool_output'
+      : message.type === 'tool_calls' || message.type === 'tool_progress' || message.type === 'tool_output'
         ? 'tool-message'
         : message.type === 'reasoning_summary'
           ? 'reasoning-message'
           : 'assistant-message';
 
-  const isFoldable = message.type === 'tool_calls' || message.type === 'tool_output' || message.type === 'reasoning_summary';
+  const isFoldable = message.type === 'tool_calls' || message.type === 'tool_progress' || message.type === 'tool_output' || message.type === 'reasoning_summary';
   const canShowFeedback = message.type === 'output_text' && !!message.chatId && !!message.messageId;
   const isFeedbackLocked = message.feedback === 'upvote' || message.feedback === 'downvote';
 
@@ -143,11 +143,13 @@ export const MessageItem = React.memo(({ message, index, isFolded, onToggleFold,
           <strong>
             {message.type === 'tool_calls'
               ? 'Tool Call'
-              : message.type === 'tool_output'
-                ? 'Tool Output'
-                : message.type === 'reasoning_summary'
-                  ? 'Reasoning Summary'
-                  : 'Message'}
+              : message.type === 'tool_progress'
+                ? 'Tool Progress'
+                : message.type === 'tool_output'
+                  ? 'Tool Output'
+                  : message.type === 'reasoning_summary'
+                    ? 'Reasoning Summary'
+                    : 'Message'}
           </strong>
         </button>
       )}
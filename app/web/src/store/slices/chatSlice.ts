@@ -58,6 +58,7 @@ const SUPPORTED_CHUNK_TYPES: Array<NonNullable<Message['type']>> = [
   'output_text',
   'reasoning_summary',
   'tool_calls',
+  'tool_progress',
   'tool_output',
 ];
 
@@ -169,7 +170,7 @@ const chatSlice = createSlice({
         for (let i = state.messages.length - 1; i >= 0; i--) {
           const message = state.messages[i];
           if (message.messageId === messageId) {
-            if (message.type === 'reasoning_summary' || message.type === 'tool_calls' || message.type === 'tool_output') {
+            if (message.type === 'reasoning_summary' || message.type === 'tool_calls' || message.type === 'tool_progress' || message.type === 'tool_output') {
               message.folded = true;
             }
           }
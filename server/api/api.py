@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from config.config import config
@@ -8,21 +9,32 @@ from .routers import (
     auth_router,
     chat_router,
     memory_router,
+    metrics_router,
     model_router,
     operator_router,
     rag_router,
     tools_router,
     upload_router,
-    user_router,
+    user_router,
 )
 
 __version__ = importlib.metadata.version("Peng-Agent")
 __author__ = importlib.metadata.metadata("Peng-Agent")["Author-email"]
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    from .setup import shut_down
+
+    await shut_down()
+
+
 app = FastAPI(
     title=f"{config.app_name} API",
     root_path="/api",
     version=__version__,
+    lifespan=lifespan,
 )
 
 origins = [
@@ -51,9 +63,10 @@ async def read_root():
 app.include_router(auth_router.router, tags=["Authentication"])
 app.include_router(chat_router.router, tags=["Chat"])
 app.include_router(memory_router.router, tags=["Memory"])
+app.include_router(metrics_router.router, tags=["Metrics"])
 app.include_router(model_router.router, tags=["Model"])
 app.include_router(operator_router.router, tags=["Operator"])
 app.include_router(rag_router.router, tags=["RAG"])
 app.include_router(tools_router.router, tags=["Tools"])
 app.include_router(upload_router.router, tags=["Upload"])
-app.include_router(user_router.router, tags=["User"])
+app.include_router(user_router.router, tags=["User"])
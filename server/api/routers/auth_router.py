@@ -1,7 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import Response
 from models.user_models import UserLogin, TokenResponse, UserCreate
 from config.config import config
+import asyncio
 import secrets
 
 router = APIRouter()
@@ -13,16 +14,25 @@ async def options_login():
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(user_data: UserLogin):
-    from handlers.auth_handlers import authenticate_user, create_access_token
+async def login(user_data: UserLogin, request: Request):
+    from handlers.auth_handlers import (
+        authenticate_user,
+        check_login_rate_limit,
+        create_access_token,
+        reset_login_attempts,
+    )
 
-    user = authenticate_user(user_data.username, user_data.password)
+    # uvicorn resolves X-Forwarded-For from trusted proxies into request.client
+    client_ip = request.client.host if request.client else None
+    await asyncio.to_thread(check_login_rate_limit, user_data.username, client_ip)
+    user = await authenticate_user(user_data.username, user_data.password)
     if not user:
         raise HTTPException(
             status_code=401,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    await asyncio.to_thread(reset_login_attempts, user_data.username, client_ip)
     access_token = create_access_token(
         data={"sub": user["user_name"]}, expiration_days=7
     )
@@ -44,7 +54,7 @@ async def signup(user_data: UserCreate):
     user_data.default_embedding_model = config.embedding_model
     from handlers.auth_handlers import create_user
 
-    response = create_user(user_data)
+    response = await create_user(user_data)
     if not response:
         raise HTTPException(status_code=400, detail="User Creation Failed")
     return response
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import Response
 from handlers.auth_handlers import authenticate_request
 
@@ -16,6 +16,22 @@ async def memory(request: dict, auth: dict = Depends(authenticate_request)):
 
     return get_memory(request["user_name"])
 
+@router.options("/memory/page")
+async def options_memory_page():
+    return Response(headers={"Allow": "POST, OPTIONS"})
+
+
+@router.post("/memory/page")
+async def memory_page(request: dict, auth: dict = Depends(authenticate_request)):
+    from handlers.memory_handlers import get_memory_page
+
+    try:
+        return get_memory_page(
+            request["user_name"], request.get("limit"), request.get("cursor")
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.options("/update_lt_memory")
 async def options_update_lt_memory():
     return Response(headers={"Allow": "POST, OPTIONS"})
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse, Response
+from config.config import config
+
+router = APIRouter()
+
+
+@router.options("/metrics")
+async def options_metrics():
+    return Response(headers={"Allow": "GET, OPTIONS"})
+
+
+# Unauthenticated so a Prometheus scraper can read it, hence off unless
+# METRICS_ENABLED=true; only enable it where the API is not publicly reachable
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    from utils.metrics import registry
+    # Registers the object cache metrics if nothing has loaded S3 yet
+    import utils.minio_connection  # noqa: F401
+
+    if not config.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, File, Form, UploadFile
 from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
 from handlers.auth_handlers import authenticate_request
 
 router = APIRouter()
@@ -22,3 +23,49 @@ async def upload_file(request: dict, auth: dict = Depends(authenticate_request))
     )
 
     return {"upload_path": upload_path, "success": success}
+
+
+@router.options("/upload/stream")
+async def options_upload_stream():
+    return Response(headers={"Allow": "POST, OPTIONS"})
+
+
+@router.post("/upload/stream")
+async def upload_file_stream(
+    file: UploadFile = File(...),
+    content_type: str = Form(default=""),
+    file_name: str = Form(default=""),
+    auth: dict = Depends(authenticate_request),
+):
+    from handlers.file_handlers import file_upload_stream
+
+    # The multipart body is spooled to disk by Starlette; the S3 transfer
+    # reads it back in fixed-size parts so memory stays constant.
+    try:
+        upload_path, success = await run_in_threadpool(
+            file_upload_stream,
+            file.file,
+            content_type or file.content_type or "application/octet-stream",
+            file_name or file.filename,
+            auth.get("username", ""),
+        )
+    finally:
+        await file.close()
+
+    return {"upload_path": upload_path, "success": success}
+
+
+@router.options("/upload/presigned")
+async def options_upload_presigned():
+    return Response(headers={"Allow": "POST, OPTIONS"})
+
+
+@router.post("/upload/presigned")
+async def upload_presigned(request: dict, auth: dict = Depends(authenticate_request)):
+    from handlers.file_handlers import create_presigned_upload
+
+    return create_presigned_upload(
+        request.get("content_type", ""),
+        request.get("file_name"),
+        auth.get("username", ""),
+    )
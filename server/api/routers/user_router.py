@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends
+from starlette.concurrency import run_in_threadpool
 from fastapi.responses import Response
 from handlers.auth_handlers import authenticate_request
 from models.user_models import UserProfile, UserUpdate
@@ -17,7 +18,8 @@ async def get_profile(auth: dict = Depends(authenticate_request)):
 @router.put("/user/profile")
 async def update_profile(user_data: UserUpdate, auth: dict = Depends(authenticate_request)):
     from handlers.user_handlers import update_user_profile
-    return update_user_profile(auth["username"], user_data)
+    # Hashing a new password blocks on the bcrypt pool
+    return await run_in_threadpool(update_user_profile, auth["username"], user_data)
 
 @router.post("/user/regenerate_token")
 async def regenerate_token(auth: dict = Depends(authenticate_request)):
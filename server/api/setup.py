@@ -1,7 +1,64 @@
+from alembic import command
+from alembic.config import Config as AlembicConfig
+from sqlalchemy import inspect, text
 from models.db_models import Base, create_db_engine
 from utils.log import output_log
 from config.config import config
 from services.redis_service import setup_redis_cache
+from handlers.auth_handlers import migrate_revoked_tokens
+from contextlib import contextmanager
+import asyncio
+import os
+
+MIGRATIONS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations"
+)
+# The schema as create_all left it before migrations were introduced
+BASELINE_REVISION = "0001"
+# Named MySQL lock so replicas starting together migrate one at a time
+MIGRATION_LOCK = "peng_agent_migrations"
+MIGRATION_LOCK_TIMEOUT = 300
+
+
+def alembic_config(connection=None) -> AlembicConfig:
+    alembic_cfg = AlembicConfig()
+    alembic_cfg.set_main_option("script_location", MIGRATIONS_PATH)
+    alembic_cfg.attributes["connection"] = connection
+    return alembic_cfg
+
+
+def run_migrations(engine):
+    """Bring the database schema up to the latest migration.
+
+    New databases are built by the migrations from the baseline up. Databases
+    from before migrations existed already hold the baseline schema, so they
+    are stamped at the baseline and only the migrations after it run.
+    """
+    with engine.begin() as connection:
+        with _migration_lock(connection):
+            alembic_cfg = alembic_config(connection)
+            tables = set(inspect(connection).get_table_names())
+            if "alembic_version" not in tables and tables & set(Base.metadata.tables):
+                output_log("Stamping existing database at the baseline revision", "info")
+                command.stamp(alembic_cfg, BASELINE_REVISION)
+            command.upgrade(alembic_cfg, "head")
+
+
+@contextmanager
+def _migration_lock(connection):
+    if connection.dialect.name != "mysql":
+        yield
+        return
+    acquired = connection.execute(
+        text("SELECT GET_LOCK(:name, :timeout)"),
+        {"name": MIGRATION_LOCK, "timeout": MIGRATION_LOCK_TIMEOUT},
+    ).scalar()
+    if acquired != 1:
+        raise RuntimeError(f"Timed out waiting for the {MIGRATION_LOCK} lock")
+    try:
+        yield
+    finally:
+        connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": MIGRATION_LOCK})
 
 
 def set_up():
@@ -9,10 +66,11 @@ def set_up():
     try:
         output_log("Initiallizing", "info")
         engine = create_db_engine()
-        output_log("Creating database tables...", "info")
-        Base.metadata.create_all(engine)
-        output_log("Database tables created successfully using SQLAlchemy", "info")
+        output_log("Migrating database schema...", "info")
+        run_migrations(engine)
+        output_log("Database schema is up to date", "info")
         setup_redis_cache()
+        migrate_revoked_tokens()
         output_log("Redis cache setup completed", "info")
     except Exception as e:
         output_log(f"Error creating database tables: {e}", "error")
@@ -22,6 +80,18 @@ def set_up():
     dd_setup()
 
 
+async def shut_down():
+    """Stop background workers and close connections pooled by tools before the process exits"""
+    from services.tools.mcp_tools import close_mcp_sessions
+    from services.tools.smtp_tools import email_worker
+    from services.tools.ssh_tools import close_ssh_connections
+
+    output_log("Closing pooled connections", "info")
+    await close_mcp_sessions()
+    await asyncio.to_thread(close_ssh_connections)
+    await asyncio.to_thread(email_worker.stop)
+
+
 def phoenix_setup():
     from phoenix.otel import register
 
@@ -0,0 +1,115 @@
+"""Per-call latency of the actuarial tools before and after vectorization.
+
+Run from the server directory:
+
+    python -m benchmark.bench_actsc
+
+The S3 download is patched out so only table computation and parsing are
+measured. The workbook is a synthetic stand-in with the same sheet layout as
+altam_tables.xlsx.
+"""
+
+from io import BytesIO
+from math import exp, log
+from unittest.mock import patch
+import statistics
+import time
+
+import pandas as pd
+from openpyxl import Workbook
+
+from services.tools import actsc_tools
+
+
+def legacy_life_table(from_x, to_x, interest=0.05, A=0.00022, B=0.0000027, c=1.124):
+    def p_x(x):
+        return exp(-A) * exp(- (B * c ** x)/log(c) * (c - 1))
+    ages = range(20, 111)
+    p_vals = [p_x(x) for x in ages]
+    q_vals = [1 - p for p in p_vals]
+    l_x = [100000]
+    for p in p_vals[:-1]:
+        l_x.append(max(l_x[-1] * p, 0))
+    d_x = [prev - curr for prev, curr in zip(l_x, l_x[1:])] + [l_x[-1]]
+    a_due_x = [
+        sum(i / l_x[x - 20] * (1 + interest) ** (-t) for t, i in enumerate(l_x[x - 20:91]))
+        for x in ages
+    ]
+    A_x = [
+        sum(d / l_x[x - 20] * (1 + interest) ** (-t - 1) for t, d in enumerate(d_x[x - 20:91]))
+        for x in ages
+    ]
+    return pd.DataFrame({
+        'x': ages,
+        'p_x': p_vals,
+        'q_x': q_vals,
+        'l_x': l_x,
+        'a_due_x': a_due_x,
+        'A_x': A_x
+    }).loc[lambda d: (d['x'] >= from_x) & (d['x'] <= to_x)].to_string(index=False)
+
+
+def legacy_service_table(data, from_x, to_x):
+    df = pd.read_excel(BytesIO(data), sheet_name='Service Table', header=0, skiprows=4)
+    return df.loc[lambda d: (d['x'] >= from_x) & (d['x'] <= to_x)].to_string(index=False)
+
+
+def synthetic_workbook():
+    workbook = Workbook()
+    service = workbook.active
+    service.title = "Service Table"
+    for _ in range(4):
+        service.append([])
+    service.append(["x", "lx", "wx", "ix", "rx", "dx"])
+    for x in range(20, 66):
+        service.append([x, 1000000 - x * 1000, 100, 10, 5, 50])
+    single = workbook.create_sheet("Single Life")
+    joint = workbook.create_sheet("Joint Life")
+    for sheet, width in [(single, 15), (joint, 9)]:
+        sheet.append([])
+        sheet.append([])
+        sheet.append(["x"] + [None] * (width - 1))
+        for x in range(20, 101):
+            sheet.append([x] + [0.5] * (width - 1))
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def measure(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def report(name, legacy_ms, current_ms):
+    print(f"{name:<16} legacy {legacy_ms:9.3f} ms   current {current_ms:9.3f} ms   speedup {legacy_ms / current_ms:7.1f}x")
+
+
+def main(repeat=50):
+    report(
+        "life_table",
+        measure(lambda: legacy_life_table(30, 60), repeat),
+        measure(lambda: actsc_tools.actsc_life_table(30, 60), repeat),
+    )
+    actsc_tools._gm_table.cache_clear()
+    report(
+        "life_table_cold",
+        measure(lambda: legacy_life_table(30, 60), repeat),
+        measure(lambda: (actsc_tools._gm_table.cache_clear(), actsc_tools.actsc_life_table(30, 60)), repeat),
+    )
+
+    data = synthetic_workbook()
+    with patch.object(actsc_tools, "_read_altam_tables", return_value=data):
+        report(
+            "service_table",
+            measure(lambda: legacy_service_table(data, 30, 60), repeat),
+            measure(lambda: actsc_tools.actsc_service_table(30, 60), repeat),
+        )
+
+
+if __name__ == "__main__":
+    main()
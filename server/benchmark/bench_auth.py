@@ -0,0 +1,64 @@
+"""Per-request overhead of authenticate_request under concurrency.
+
+Run from the server directory:
+
+    python -m benchmark.bench_auth
+
+Redis is replaced by an in-process set so only token handling is measured; a
+real deployment adds one EXISTS round trip per request on top.
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+import asyncio
+import time
+
+import jwt
+
+from config.config import config
+from handlers import auth_handlers
+from handlers.auth_handlers import authenticate_request, create_access_token
+
+
+async def legacy_authenticate_request(request):
+    token = request.headers.get("Authorization")
+    if token.startswith("Bearer "):
+        token = token[7:]
+    payload = jwt.decode(token, config.jwt_secret_key, algorithms=["HS256"])
+    expiration = payload.get("exp")
+    if expiration and datetime.fromtimestamp(
+        expiration, tz=timezone.utc
+    ) < datetime.now(timezone.utc):
+        raise ValueError("Token has expired")
+    return {"auth_type": "jwt", "username": payload.get("sub")}
+
+
+def make_request(token):
+    request = MagicMock()
+    request.headers = {"Authorization": f"Bearer {token}"}
+    return request
+
+
+async def measure(func, requests, concurrency):
+    start = time.perf_counter()
+    for i in range(0, len(requests), concurrency):
+        await asyncio.gather(*[func(request) for request in requests[i:i + concurrency]])
+    return (time.perf_counter() - start) / len(requests) * 1e6
+
+
+async def main(total=20000, users=50):
+    revoked = set()
+    redis_client = MagicMock()
+    redis_client.exists.side_effect = lambda key: int(key in revoked)
+    tokens = [create_access_token({"sub": f"user{i}"}, None) for i in range(users)]
+    requests = [make_request(tokens[i % users]) for i in range(total)]
+    with patch.object(auth_handlers.redis_cache, "client", redis_client):
+        for concurrency in [1, 16, 128]:
+            auth_handlers._verified_tokens.clear()
+            legacy = await measure(legacy_authenticate_request, requests, concurrency)
+            current = await measure(authenticate_request, requests, concurrency)
+            print(f"concurrency {concurrency:<4} legacy {legacy:8.2f} us/req   current {current:8.2f} us/req   speedup {legacy / current:5.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
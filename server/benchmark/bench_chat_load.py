@@ -0,0 +1,318 @@
+"""Streaming load test of /chat and /chat_completions against local stand-ins.
+
+Run from the server directory:
+
+    python -m benchmark.bench_chat_load --clients 32 --requests 5
+
+The API runs under uvicorn in a background thread, backed by SQLite, an
+in-memory Redis stand-in, an in-memory S3, in-memory Qdrant and the ``mock``
+LLM runtime (see benchmark/local_services.py), so nothing leaves the machine.
+Each client sends its requests one after another. Scenarios:
+
+- ``text``: plain chats without a knowledge base or images
+- ``rag_s3``: chats that retrieve from a knowledge base and attach images
+  stored in S3
+
+Reported per scenario and endpoint:
+
+- time to first chunk, and to the first model output chunk on /chat
+- gaps between streamed chunks
+- requests and chunks per second
+- lag of the server's event loop, sampled every 10 ms
+
+Results are written as JSON, tagged with the current commit, so runs can be
+compared with ``--compare``. The run exits non-zero if any request failed.
+"""
+
+from datetime import datetime, timezone
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmark import local_services
+
+LAG_INTERVAL = 0.01
+SCENARIOS = ["text", "rag_s3"]
+# Failed requests whose error is kept for the report
+ERROR_SAMPLES = 5
+
+
+def percentiles(samples):
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class ServerThread:
+    """uvicorn serving the app on its own event loop in a daemon thread."""
+
+    def __init__(self, app, port):
+        import uvicorn
+
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="bench-uvicorn", daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.server.serve())
+
+    def start(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(10)
+
+
+async def measure_loop_lag(stop: threading.Event, samples: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        samples.append(max(0.0, time.perf_counter() - start - LAG_INTERVAL))
+
+
+def chat_payload(user_name, request_id, scenario="text"):
+    payload = {
+        "user_name": user_name,
+        "message": f"Load test question {request_id} from {user_name}",
+        "knowledge_base": "default",
+        "config": {
+            "operator": local_services.MOCK_OPERATOR,
+            "base_model": f"{local_services.MOCK_OPERATOR}/{local_services.MOCK_MODEL}",
+        },
+    }
+    if scenario == "rag_s3":
+        payload["knowledge_base"] = local_services.KNOWLEDGE_BASE
+        payload["image"] = local_services.IMAGE_KEYS
+    return payload
+
+
+class ChatError(Exception):
+    """The server answered, but flagged the chat as failed."""
+
+
+async def stream_chat(client, token, payload, stats):
+    start = time.perf_counter()
+    previous = None
+    # Kept apart until the stream ends, so failed chats leave no samples
+    first_chunk, first_output, gaps, chunks = [], [], [], 0
+    async with client.stream("POST", "/chat", json=payload, headers={"Authorization": f"Bearer {token}"}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            now = time.perf_counter()
+            chunk = json.loads(line)
+            if chunk.get("error"):
+                raise ChatError(chunk.get("chunk"))
+            if previous is None:
+                first_chunk.append(now - start)
+            else:
+                gaps.append(now - previous)
+            # The first line is the "Agent Created" notice, not model output
+            if previous is not None and not first_output and chunk.get("type") in ["output_text", "reasoning_summary"]:
+                first_output.append(now - start)
+            previous = now
+            chunks += 1
+    stats["first_chunk"] += first_chunk
+    stats["first_output"] += first_output
+    stats["chunk_gap"] += gaps
+    stats["chunks"] += chunks
+    stats["request"].append(time.perf_counter() - start)
+
+
+async def chat_completion(client, token, payload, stats):
+    start = time.perf_counter()
+    response = await client.post("/chat_completions", json=payload, headers={"Authorization": f"Bearer {token}"})
+    response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    for message in response.json()["response"]:
+        if (message.get("response_metadata") or {}).get("error"):
+            raise ChatError(message["content"])
+    stats["first_chunk"].append(elapsed)
+    stats["request"].append(elapsed)
+    stats["chunks"] += 1
+
+
+async def run_endpoint(base_url, endpoint, scenario, users, tokens, requests_per_client, server_loop):
+    import httpx
+
+    call = stream_chat if endpoint == "chat" else chat_completion
+    stats = {
+        "first_chunk": [], "first_output": [], "chunk_gap": [], "request": [], "chunks": 0,
+        "errors": 0, "error_samples": [],
+    }
+    lag = []
+    stop = threading.Event()
+    limits = httpx.Limits(max_connections=len(users), max_keepalive_connections=len(users))
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        async def attempt(index, request_id, into):
+            try:
+                await call(client, tokens[index], chat_payload(users[index], request_id, scenario), into)
+            except Exception as e:
+                stats["errors"] += 1
+                if len(stats["error_samples"]) < ERROR_SAMPLES:
+                    stats["error_samples"].append(f"{type(e).__name__}: {e}")
+
+        # The first request pays for lazy imports and model setup
+        await attempt(0, "warmup", dict(stats, first_chunk=[], first_output=[], chunk_gap=[], request=[]))
+
+        async def run_client(index):
+            for request_id in range(requests_per_client):
+                await attempt(index, request_id, stats)
+
+        # The probe runs on the server's loop, which is where blocking work shows up
+        probe = asyncio.run_coroutine_threadsafe(measure_loop_lag(stop, lag), server_loop)
+        start = time.perf_counter()
+        await asyncio.gather(*[run_client(i) for i in range(len(users))])
+        wall = time.perf_counter() - start
+
+    stop.set()
+    await asyncio.wrap_future(probe)
+    completed = len(stats["request"])
+    return {
+        "requests": completed,
+        "errors": stats["errors"],
+        "error_samples": stats["error_samples"],
+        "wall_s": wall,
+        "requests_per_s": completed / wall if wall else 0,
+        "chunks_per_s": stats["chunks"] / wall if wall else 0,
+        "time_to_first_chunk": percentiles(stats["first_chunk"]),
+        "time_to_first_output": percentiles(stats["first_output"]),
+        "inter_chunk_gap": percentiles(stats["chunk_gap"]),
+        "request_duration": percentiles(stats["request"]),
+        "event_loop_lag": percentiles(lag),
+    }
+
+
+def compare(current, previous_path):
+    with open(previous_path, "r") as f:
+        previous = json.load(f)
+    print(f"\ncompared with {previous['commit']} ({previous_path})")
+    for endpoint, result in current["endpoints"].items():
+        before = previous["endpoints"].get(endpoint)
+        if not before:
+            continue
+        for metric in ["time_to_first_chunk", "inter_chunk_gap", "request_duration", "event_loop_lag"]:
+            old, new = before[metric].get("p95_ms"), result[metric].get("p95_ms")
+            if old and new:
+                print(f"{endpoint:<24} {metric:<22} p95 {old:9.2f} -> {new:9.2f} ms ({(new - old) / old * 100:+6.1f}%)")
+        old, new = before["requests_per_s"], result["requests_per_s"]
+        if old:
+            print(f"{endpoint:<24} {'throughput':<22}     {old:9.2f} -> {new:9.2f} req/s ({(new - old) / old * 100:+6.1f}%)")
+
+
+def print_result(endpoint, result):
+    print(f"\n{endpoint}: {result['requests']} requests, {result['errors']} errors, "
+          f"{result['requests_per_s']:.1f} req/s, {result['chunks_per_s']:.0f} chunks/s")
+    for error in result["error_samples"]:
+        print(f"  error: {error}")
+    for metric in ["time_to_first_chunk", "time_to_first_output", "inter_chunk_gap", "request_duration", "event_loop_lag"]:
+        stats = result[metric]
+        if stats["count"]:
+            print(f"  {metric:<22} p50 {stats['p50_ms']:9.2f}  p95 {stats['p95_ms']:9.2f}  p99 {stats['p99_ms']:9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=5, help="requests per client")
+    parser.add_argument("--endpoints", default="chat,chat_completions")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"any of {', '.join(SCENARIOS)}")
+    parser.add_argument("--ttft", type=float, default=0.2, help="mock model time to first token, seconds")
+    parser.add_argument("--tps", type=float, default=100, help="mock model tokens per second")
+    parser.add_argument("--tokens", type=int, default=100, help="mock model response tokens")
+    parser.add_argument("--reasoning", type=int, default=20, help="mock model reasoning tokens")
+    parser.add_argument("--endpoint", default=None, help="mock operator endpoint, overriding the four options above")
+    parser.add_argument("--output", default=None, help="result file, benchmark/results/chat_load_<commit>.json by default")
+    parser.add_argument("--compare", default=None, help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    endpoint = args.endpoint or f"mock://?ttft={args.ttft}&tps={args.tps}&tokens={args.tokens}&reasoning={args.reasoning}"
+    with tempfile.TemporaryDirectory() as directory:
+        patchers = local_services.install(os.path.join(directory, "bench.db"), endpoint)
+        try:
+            # Imported after install so every module sees the stand-ins
+            from api.api import app
+            from handlers.auth_handlers import create_access_token
+
+            users = local_services.add_users(args.clients)
+            tokens = [create_access_token({"sub": user}, None) for user in users]
+            port = free_port()
+            server = ServerThread(app, port)
+            server.start()
+            try:
+                results = {}
+                for scenario in args.scenarios.split(","):
+                    for name in args.endpoints.split(","):
+                        key = f"{scenario}/{name}"
+                        results[key] = asyncio.run(run_endpoint(
+                            f"http://127.0.0.1:{port}", name, scenario, users, tokens, args.requests, server.loop
+                        ))
+                        print_result(key, results[key])
+            finally:
+                server.stop()
+        finally:
+            for patcher in patchers:
+                patcher.stop()
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "parameters": vars(args),
+        "endpoints": results,
+    }
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", f"chat_load_{commit}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {output}")
+    if args.compare:
+        compare(report, args.compare)
+    errors = sum(result["errors"] for result in results.values())
+    if errors:
+        print(f"\n{errors} requests failed", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Latency of the /memory history query before and after keyset pagination.
+
+Run from the server directory:
+
+    python -m benchmark.bench_memory
+
+A synthetic history is written to a temporary SQLite database built from the
+ORM models, once without the composite indexes (the old schema) and once with
+them. MySQL plans differ in detail, but the shape is the same: the legacy query
+runs two correlated subqueries per chat and returns the whole history.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from handlers import memory_handlers
+from models.db_models import Base
+
+LEGACY_QUERY = text("""
+    SELECT
+        c.id,
+        c.user_name,
+        c.type,
+        c.base_model,
+        c.human_input,
+        c.created_at,
+        COALESCE((SELECT input_location FROM user_input WHERE chat_id = c.id ORDER BY id ASC LIMIT 1), '') as other_input,
+        (SELECT ai_response FROM ai_response WHERE chat_id = c.id ORDER BY id DESC LIMIT 1) as ai_response
+    FROM chat c
+    WHERE c.user_name = :username
+    ORDER BY c.created_at DESC
+""")
+
+
+def build_database(path, chats, users, indexed):
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(
+        engine,
+        "connect",
+        lambda connection, _: connection.create_collation(
+            "utf8mb4_unicode_ci", lambda a, b: (a > b) - (a < b)
+        ),
+    )
+    Base.metadata.create_all(engine)
+    if not indexed:
+        with engine.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    connection.execute(text(f"DROP INDEX {index.name}"))
+    random.seed(0)
+    start = datetime(2024, 1, 1)
+    chat_rows, response_rows, input_rows = [], [], []
+    for chat_id in range(1, chats + 1):
+        user = "heavy_user" if chat_id % 2 else f"user{chat_id % users}"
+        chat_rows.append({
+            "id": chat_id,
+            "user_name": user,
+            "type": "chat",
+            "base_model": "gpt-4",
+            "human_input": f"question {chat_id}",
+            "feedback": "no_response",
+            "created_at": start + timedelta(seconds=chat_id * 30),
+        })
+        for _ in range(random.randint(1, 3)):
+            response_rows.append({"chat_id": chat_id, "ai_response": "answer " * 20})
+        if chat_id % 5 == 0:
+            input_rows.append({"chat_id": chat_id, "input_type": "image", "input_location": "bucket/key.png"})
+    with engine.begin() as connection:
+        connection.execute(Base.metadata.tables["chat"].insert(), chat_rows)
+        connection.execute(Base.metadata.tables["ai_response"].insert(), response_rows)
+        connection.execute(Base.metadata.tables["user_input"].insert(), input_rows)
+    return engine
+
+
+def legacy_get_memory(engine, username):
+    with engine.connect() as connection:
+        return [row for row in connection.execute(LEGACY_QUERY, {"username": username}) if row.ai_response]
+
+
+def measure(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main(chats=10000, users=200, repeat=5):
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_engine = build_database(os.path.join(directory, "legacy.db"), chats, users, indexed=False)
+        engine = build_database(os.path.join(directory, "indexed.db"), chats, users, indexed=True)
+        history = len(legacy_get_memory(engine, "heavy_user"))
+        print(f"heavy_user history: {history} chats")
+
+        # Quadratic without indexes, so it is only timed once
+        legacy_ms = measure(lambda: legacy_get_memory(legacy_engine, "heavy_user"), 1)
+        legacy_indexed_ms = measure(lambda: legacy_get_memory(engine, "heavy_user"), repeat)
+        with patch("utils.mysql_connect.get_session_maker", return_value=sessionmaker(bind=engine)):
+            first_page_ms = measure(lambda: memory_handlers.get_memory_page("heavy_user", 50), repeat)
+            cursor = memory_handlers.get_memory_page("heavy_user", 50)["next_cursor"]
+            next_page_ms = measure(lambda: memory_handlers.get_memory_page("heavy_user", 50, cursor), repeat)
+            full_ms = measure(lambda: memory_handlers.get_memory("heavy_user"), repeat)
+
+    print(f"legacy full history (no indexes)   {legacy_ms:9.2f} ms")
+    print(f"legacy full history (indexed)      {legacy_indexed_ms:9.2f} ms")
+    print(f"first page of 50                   {first_page_ms:9.2f} ms")
+    print(f"second page of 50                  {next_page_ms:9.2f} ms")
+    print(f"full history by pages              {full_ms:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
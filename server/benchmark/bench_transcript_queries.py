@@ -0,0 +1,117 @@
+"""Transcript query latency before and after the index migration.
+
+Run from the server directory:
+
+    python -m benchmark.bench_transcript_queries
+
+A synthetic history is loaded into a temporary SQLite database with the
+pre-migration schema (no secondary indexes). Each query is timed, the database
+is migrated with api.setup.run_migrations, and the same queries are timed
+again. The queries are issued through MysqlConnect exactly as the handlers do.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from api.setup import run_migrations
+from handlers import memory_handlers
+from models.db_models import Base
+from utils.mysql_connect import MysqlConnect
+
+
+def build_legacy_database(path, chats, users):
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(
+        engine,
+        "connect",
+        lambda connection, _: connection.create_collation(
+            "utf8mb4_unicode_ci", lambda a, b: (a > b) - (a < b)
+        ),
+    )
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for table in inspect(connection).get_table_names():
+            for index in inspect(connection).get_indexes(table):
+                connection.execute(text(f"DROP INDEX {index['name']}"))
+
+    random.seed(0)
+    start = datetime(2024, 1, 1)
+    tables = {name: [] for name in ["chat", "ai_response", "ai_reasoning", "user_input", "tool_call", "tool_output"]}
+    for chat_id in range(1, chats + 1):
+        tables["chat"].append({
+            "id": chat_id,
+            "user_name": f"user{chat_id % users}",
+            "type": "chat",
+            "base_model": "gpt-4",
+            "human_input": f"question {chat_id}",
+            "feedback": "no_response",
+            "created_at": start + timedelta(seconds=chat_id * 30),
+        })
+        tables["user_input"].append({"chat_id": chat_id, "input_type": "text", "input_content": "question", "input_location": ""})
+        tables["ai_response"].append({"chat_id": chat_id, "ai_response": "answer " * 20})
+        tables["ai_reasoning"].append({"chat_id": chat_id, "reasoning_process": "thinking " * 20})
+        for n in range(random.randint(0, 2)):
+            call_id = f"call_{chat_id}_{n}"
+            tables["tool_call"].append({"chat_id": chat_id, "call_id": call_id, "tools_name": "tool", "tools_argument": "{}"})
+            tables["tool_output"].append({"chat_id": chat_id, "call_id": call_id, "output_content": "output"})
+    with engine.begin() as connection:
+        for name, rows in tables.items():
+            connection.execute(Base.metadata.tables[name].insert(), rows)
+    return engine
+
+
+def short_term_memory(mysql, chat_ids):
+    for table in ["ai_reasoning", "ai_response", "user_input", "tool_call", "tool_output"]:
+        mysql.read_records(table, conditions={"chat_id": chat_ids})
+
+
+def one_day_chats(mysql, user_name, since):
+    mysql.read_records("chat", {"user_name": user_name, "created_at>=": since})
+
+
+def measure(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run_queries(engine, chats, repeat):
+    with patch("utils.mysql_connect.get_session_maker", return_value=sessionmaker(bind=engine)):
+        mysql = MysqlConnect()
+        recent = list(range(chats - 40, chats, 4))
+        since = datetime(2024, 1, 1) + timedelta(seconds=(chats - 3000) * 30)
+        return {
+            "short_term_memory": measure(lambda: short_term_memory(mysql, recent), repeat),
+            "update_lt_memory": measure(lambda: one_day_chats(mysql, "user7", since), repeat),
+            "update_chat_feedback": measure(lambda: mysql.update_record("chat", {"feedback": "good"}, {"id": chats - 7, "user_name": "user7"}), repeat),
+            "memory_page": measure(lambda: memory_handlers.get_memory_page("user7", 50), repeat),
+        }
+
+
+def main(chats=100000, users=20, repeat=5):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = build_legacy_database(os.path.join(directory, "history.db"), chats, users)
+        before = run_queries(engine, chats, repeat)
+        start = time.perf_counter()
+        run_migrations(engine)
+        migrate_s = time.perf_counter() - start
+        after = run_queries(engine, chats, repeat)
+
+    print(f"migration to head took {migrate_s:.2f} s for {chats} chats")
+    for name in before:
+        print(f"{name:<22} before {before[name]:9.2f} ms   after {after[name]:9.2f} ms   speedup {before[name] / after[name]:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""In-process stand-ins for the services the chat path talks to.
+
+MySQL is replaced by a SQLite file, Redis by a dictionary behind the same
+client interface, S3 by a dictionary of objects, Qdrant by its in-memory
+client with a bag-of-words embedding, and the LLM by the ``mock`` operator
+runtime. Import this module and call ``install`` before importing anything
+that reads the database engine or the Redis client.
+"""
+
+from unittest.mock import patch
+import fnmatch
+import hashlib
+import io
+import math
+import re
+import threading
+import time
+
+from botocore.exceptions import ClientError
+from langchain_core.embeddings import Embeddings
+from sqlalchemy import create_engine, event
+
+MOCK_OPERATOR = "mock"
+MOCK_MODEL = "mock-chat"
+# Seeded by ``install`` for chats that use a knowledge base and images
+KNOWLEDGE_BASE = "bench_kb"
+IMAGE_KEYS = [f"bench/image{i}.png" for i in range(3)]
+
+
+class LocalRedis:
+    """The subset of redis commands used by the server, kept in memory."""
+
+    def __init__(self):
+        self._values = {}
+        self._expires = {}
+        self._lock = threading.RLock()
+
+    def _alive(self, key):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.time():
+            self._values.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._values
+
+    def pipeline(self, transaction=True):
+        return _Pipeline(self)
+
+    def get(self, key):
+        with self._lock:
+            return self._values.get(key) if self._alive(key) else None
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._alive(key):
+                return None
+            self._values[key] = str(value)
+            self._expires.pop(key, None)
+            if ex:
+                self._expires[key] = time.time() + ex
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = sum(1 for key in keys if self._alive(key))
+            for key in keys:
+                self._values.pop(key, None)
+                self._expires.pop(key, None)
+            return removed
+
+    def exists(self, key):
+        with self._lock:
+            return int(self._alive(key))
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            value = int(self.get(key) or 0) + amount
+            self._values[key] = str(value)
+            return value
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if not self._alive(key):
+                return False
+            self._expires[key] = time.time() + seconds
+            return True
+
+    def ttl(self, key):
+        with self._lock:
+            if not self._alive(key):
+                return -2
+            expires = self._expires.get(key)
+            return int(expires - time.time()) if expires else -1
+
+    def keys(self, pattern="*"):
+        with self._lock:
+            return [key for key in list(self._values) if self._alive(key) and fnmatch.fnmatch(key, pattern)]
+
+    def sadd(self, key, *members):
+        with self._lock:
+            values = self._values.setdefault(key, set())
+            before = len(values)
+            values.update(str(member) for member in members)
+            return len(values) - before
+
+    def srem(self, key, *members):
+        with self._lock:
+            values = self._values.get(key, set())
+            before = len(values)
+            values.difference_update(str(member) for member in members)
+            return before - len(values)
+
+    def smembers(self, key):
+        with self._lock:
+            return set(self._values.get(key, set()))
+
+    def sismember(self, key, member):
+        with self._lock:
+            return str(member) in self._values.get(key, set())
+
+    def hget(self, key, field):
+        with self._lock:
+            return self._values.get(key, {}).get(field)
+
+    def hset(self, key, field, value):
+        with self._lock:
+            self._values.setdefault(key, {})[field] = str(value)
+            return 1
+
+    def hgetall(self, key):
+        with self._lock:
+            return dict(self._values.get(key, {}))
+
+
+class _Pipeline:
+    def __init__(self, client):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        with self._client._lock:
+            results = [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+
+class LocalS3:
+    """The subset of the boto3 S3 client used for chat images, kept in memory."""
+
+    def __init__(self):
+        self._objects = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _error(code, operation):
+        return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        data = Body if isinstance(Body, bytes) else str(Body).encode("utf-8")
+        with self._lock:
+            self._objects[(Bucket, Key)] = (data, f'"{hashlib.md5(data).hexdigest()}"')
+        return {}
+
+    def head_object(self, Bucket, Key):
+        with self._lock:
+            if (Bucket, Key) not in self._objects:
+                raise self._error("404", "HeadObject")
+            data, etag = self._objects[(Bucket, Key)]
+        return {"ContentLength": len(data), "ETag": etag}
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        with self._lock:
+            if (Bucket, Key) not in self._objects:
+                raise self._error("NoSuchKey", "GetObject")
+            data, etag = self._objects[(Bucket, Key)]
+        if IfNoneMatch == etag:
+            raise self._error("304", "GetObject")
+        return {"Body": io.BytesIO(data), "ETag": etag, "ContentLength": len(data)}
+
+
+class LocalEmbeddings(Embeddings):
+    """Hashes words into a fixed-size vector, so texts sharing words score as similar."""
+
+    def __init__(self, size):
+        self.size = size
+
+    def _embed(self, text):
+        vector = [0.0] * self.size
+        for word in re.findall(r"\w+", text.lower()):
+            vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.size] += 1
+        norm = math.sqrt(sum(value * value for value in vector)) or 1
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def create_sqlite_engine(path):
+    engine = create_engine(
+        f"sqlite:///{path}",
+        # Each thread gets its own connection; writers wait for the file lock
+        connect_args={"check_same_thread": False, "timeout": 30},
+        pool_size=32,
+        max_overflow=64,
+    )
+    # chat.human_input declares a MySQL collation
+    event.listen(
+        engine,
+        "connect",
+        lambda connection, _: connection.create_collation(
+            "utf8mb4_unicode_ci", lambda a, b: (a > b) - (a < b)
+        ),
+    )
+    return engine
+
+
+def install(db_path, mock_endpoint):
+    """Point the server at the stand-ins and seed the tables the chat path reads.
+
+    Returns the patchers so callers can stop them.
+    """
+    import models.db_models as db_models
+
+    engine = create_sqlite_engine(db_path)
+    db_models._engine = engine
+    db_models._session_maker = None
+    db_models.Base.metadata.create_all(engine)
+
+    from config.config import config
+    from qdrant_client import QdrantClient
+    from utils.redis import redis_cache
+
+    s3 = LocalS3()
+    qdrant = QdrantClient(":memory:")
+    patchers = [
+        patch.object(redis_cache, "client", LocalRedis()),
+        patch("utils.minio_connection.boto3.client", return_value=s3),
+        patch("services.rag.qdrant_api.QdrantClient", return_value=qdrant),
+        patch(
+            "services.rag.qdrant_api.get_embedding_instance",
+            return_value=LocalEmbeddings(config.embedding_size),
+        ),
+    ]
+    for patcher in patchers:
+        patcher.start()
+
+    from sqlalchemy.orm import sessionmaker
+
+    with sessionmaker(bind=engine)() as session:
+        session.add(db_models.Operator(
+            operator=MOCK_OPERATOR, runtime="mock", endpoint=mock_endpoint, api_key="", org_id="", project_id="",
+            embedding_pattern="", image_pattern="", audio_pattern="", video_pattern="", chat_pattern="",
+        ))
+        session.add(db_models.Model(
+            operator=MOCK_OPERATOR, type="chat", model_name=f"{MOCK_OPERATOR}/{MOCK_MODEL}", isAvailable=True,
+            input_image=True,
+        ))
+        session.commit()
+
+    from services.redis_service import setup_redis_cache
+
+    setup_redis_cache()
+    _seed_objects(s3, config.s3_bucket)
+    return patchers
+
+
+def _seed_objects(s3, bucket):
+    """Store the images chats attach and index a knowledge base to retrieve from."""
+    from services.rag.qdrant_api import Qdrant
+
+    for i, key in enumerate(IMAGE_KEYS):
+        # A PNG signature followed by filler, sized like a small screenshot
+        s3.put_object(Bucket=bucket, Key=key, Body=b"\x89PNG\r\n\x1a\n" + bytes([i]) * 64 * 1024)
+    Qdrant(collection_name=KNOWLEDGE_BASE).add_texts(
+        "bench/notes.md",
+        [
+            f"Load test question {i} covers how the agent answers benchmark requests, note {i}"
+            for i in range(200)
+        ],
+    )
+
+
+def add_users(count, prefix="load_user"):
+    """Create users directly in SQLite and the cache; returns their names."""
+    from services.redis_service import refresh_table_cache
+    from utils.mysql_connect import MysqlConnect
+
+    mysql = MysqlConnect()
+    names = [f"{prefix}{i}" for i in range(count)]
+    for name in names:
+        mysql.create_record("user", {"user_name": name, "password": "unused", "long_term_memory": "[]"})
+    refresh_table_cache("user")
+    return names
@@ -16,6 +16,11 @@ class Config(BaseModel):
     s3_secret_key: str
     s3_base_path: str
     s3_region: str
+    s3_multipart_chunksize: int
+    s3_presigned_url_expiration: int
+    s3_max_pool_connections: int
+    s3_cache_max_bytes: int
+    s3_cache_ttl: int
     qdrant_host: str
     qdrant_port: int
     default_operator: str
@@ -46,6 +51,49 @@ class Config(BaseModel):
     smtp_use_ssl: bool
     smtp_username: str
     smtp_password: str
+    ssh_idle_timeout: int
+    ssh_keepalive_interval: int
+    ssh_command_timeout: int
+    ssh_max_output_bytes: int
+    sql_pool_size: int
+    sql_statement_timeout: int
+    sql_max_rows: int
+    sql_schema_cache_ttl: int
+    sql_max_result_bytes: int
+    sql_preview_rows: int
+    mcp_tools_cache_ttl: int
+    http_timeout: int
+    http_max_connections: int
+    http_per_host_concurrency: int
+    smtp_timeout: int
+    smtp_pool_size: int
+    smtp_idle_timeout: int
+    email_max_attempts: int
+    email_status_ttl: int
+    auth_token_cache_size: int
+    bcrypt_rounds: int
+    bcrypt_workers: int
+    login_rate_limit_user: int
+    login_rate_limit_ip: int
+    login_rate_limit_account: int
+    login_rate_limit_window: int
+    forwarded_allow_ips: str
+    memory_page_size: int
+    memory_max_page_size: int
+    prompt_fragment_ttl: int
+    memory_summary_window: int
+    memory_summary_max_words: int
+    memory_summary_ttl: int
+    lt_memory_interval: int
+    lt_memory_lookback_hours: int
+    lt_memory_concurrency: int
+    lt_memory_max_chats: int
+    lt_memory_max_facts: int
+    system_prompt_cache_size: int
+    prompt_template_reload: bool
+    log_format: str
+    log_async: bool
+    metrics_enabled: bool
 
 
 try:
@@ -71,6 +119,21 @@ try:
         "s3_region": os.environ.get("S3_REGION")
         if os.environ.get("S3_REGION")
         else "us-east-1",
+        "s3_multipart_chunksize": int(os.environ.get("S3_MULTIPART_CHUNKSIZE"))
+        if os.environ.get("S3_MULTIPART_CHUNKSIZE")
+        else 8 * 1024 * 1024,
+        "s3_presigned_url_expiration": int(os.environ.get("S3_PRESIGNED_URL_EXPIRATION"))
+        if os.environ.get("S3_PRESIGNED_URL_EXPIRATION")
+        else 3600,
+        "s3_max_pool_connections": int(os.environ.get("S3_MAX_POOL_CONNECTIONS"))
+        if os.environ.get("S3_MAX_POOL_CONNECTIONS")
+        else 32,
+        "s3_cache_max_bytes": int(os.environ.get("S3_CACHE_MAX_BYTES"))
+        if os.environ.get("S3_CACHE_MAX_BYTES")
+        else 256 * 1024 * 1024,
+        "s3_cache_ttl": int(os.environ.get("S3_CACHE_TTL"))
+        if os.environ.get("S3_CACHE_TTL")
+        else 300,
         "s3_base_path": os.environ.get("S3_BASE_PATH")
         if os.environ.get("S3_BASE_PATH")
         else (os.environ.get("ENV") or "prod"),
@@ -164,6 +227,131 @@ try:
         "smtp_password": os.environ.get("SMTP_PASSWORD")
         if os.environ.get("SMTP_PASSWORD")
         else "password",
+        "ssh_idle_timeout": int(os.environ.get("SSH_IDLE_TIMEOUT"))
+        if os.environ.get("SSH_IDLE_TIMEOUT")
+        else 300,
+        "ssh_keepalive_interval": int(os.environ.get("SSH_KEEPALIVE_INTERVAL"))
+        if os.environ.get("SSH_KEEPALIVE_INTERVAL")
+        else 30,
+        "ssh_command_timeout": int(os.environ.get("SSH_COMMAND_TIMEOUT"))
+        if os.environ.get("SSH_COMMAND_TIMEOUT")
+        else 300,
+        "ssh_max_output_bytes": int(os.environ.get("SSH_MAX_OUTPUT_BYTES"))
+        if os.environ.get("SSH_MAX_OUTPUT_BYTES")
+        else 1024 * 1024,
+        "sql_pool_size": int(os.environ.get("SQL_POOL_SIZE"))
+        if os.environ.get("SQL_POOL_SIZE")
+        else 5,
+        "sql_statement_timeout": int(os.environ.get("SQL_STATEMENT_TIMEOUT"))
+        if os.environ.get("SQL_STATEMENT_TIMEOUT")
+        else 30,
+        "sql_max_rows": int(os.environ.get("SQL_MAX_ROWS"))
+        if os.environ.get("SQL_MAX_ROWS")
+        else 1000,
+        "sql_schema_cache_ttl": int(os.environ.get("SQL_SCHEMA_CACHE_TTL"))
+        if os.environ.get("SQL_SCHEMA_CACHE_TTL")
+        else 600,
+        "sql_max_result_bytes": int(os.environ.get("SQL_MAX_RESULT_BYTES"))
+        if os.environ.get("SQL_MAX_RESULT_BYTES")
+        else 4 * 1024 * 1024,
+        "sql_preview_rows": int(os.environ.get("SQL_PREVIEW_ROWS"))
+        if os.environ.get("SQL_PREVIEW_ROWS")
+        else 20,
+        "mcp_tools_cache_ttl": int(os.environ.get("MCP_TOOLS_CACHE_TTL"))
+        if os.environ.get("MCP_TOOLS_CACHE_TTL")
+        else 300,
+        "http_timeout": int(os.environ.get("HTTP_TIMEOUT"))
+        if os.environ.get("HTTP_TIMEOUT")
+        else 30,
+        "http_max_connections": int(os.environ.get("HTTP_MAX_CONNECTIONS"))
+        if os.environ.get("HTTP_MAX_CONNECTIONS")
+        else 100,
+        "http_per_host_concurrency": int(os.environ.get("HTTP_PER_HOST_CONCURRENCY"))
+        if os.environ.get("HTTP_PER_HOST_CONCURRENCY")
+        else 8,
+        "smtp_timeout": int(os.environ.get("SMTP_TIMEOUT"))
+        if os.environ.get("SMTP_TIMEOUT")
+        else 30,
+        "smtp_pool_size": int(os.environ.get("SMTP_POOL_SIZE"))
+        if os.environ.get("SMTP_POOL_SIZE")
+        else 2,
+        "smtp_idle_timeout": int(os.environ.get("SMTP_IDLE_TIMEOUT"))
+        if os.environ.get("SMTP_IDLE_TIMEOUT")
+        else 60,
+        "email_max_attempts": int(os.environ.get("EMAIL_MAX_ATTEMPTS"))
+        if os.environ.get("EMAIL_MAX_ATTEMPTS")
+        else 5,
+        "email_status_ttl": int(os.environ.get("EMAIL_STATUS_TTL"))
+        if os.environ.get("EMAIL_STATUS_TTL")
+        else 7 * 24 * 3600,
+        "auth_token_cache_size": int(os.environ.get("AUTH_TOKEN_CACHE_SIZE"))
+        if os.environ.get("AUTH_TOKEN_CACHE_SIZE")
+        else 4096,
+        "bcrypt_rounds": int(os.environ.get("BCRYPT_ROUNDS"))
+        if os.environ.get("BCRYPT_ROUNDS")
+        else 12,
+        "bcrypt_workers": int(os.environ.get("BCRYPT_WORKERS"))
+        if os.environ.get("BCRYPT_WORKERS")
+        else 2,
+        "login_rate_limit_user": int(os.environ.get("LOGIN_RATE_LIMIT_USER"))
+        if os.environ.get("LOGIN_RATE_LIMIT_USER")
+        else 10,
+        "login_rate_limit_ip": int(os.environ.get("LOGIN_RATE_LIMIT_IP"))
+        if os.environ.get("LOGIN_RATE_LIMIT_IP")
+        else 50,
+        "login_rate_limit_account": int(os.environ.get("LOGIN_RATE_LIMIT_ACCOUNT"))
+        if os.environ.get("LOGIN_RATE_LIMIT_ACCOUNT")
+        else 100,
+        "login_rate_limit_window": int(os.environ.get("LOGIN_RATE_LIMIT_WINDOW"))
+        if os.environ.get("LOGIN_RATE_LIMIT_WINDOW")
+        else 900,
+        "forwarded_allow_ips": os.environ.get("FORWARDED_ALLOW_IPS") or "127.0.0.1",
+        "memory_page_size": int(os.environ.get("MEMORY_PAGE_SIZE"))
+        if os.environ.get("MEMORY_PAGE_SIZE")
+        else 50,
+        "memory_max_page_size": int(os.environ.get("MEMORY_MAX_PAGE_SIZE"))
+        if os.environ.get("MEMORY_MAX_PAGE_SIZE")
+        else 500,
+        "prompt_fragment_ttl": int(os.environ.get("PROMPT_FRAGMENT_TTL"))
+        if os.environ.get("PROMPT_FRAGMENT_TTL")
+        else 7 * 24 * 3600,
+        "memory_summary_window": int(os.environ.get("MEMORY_SUMMARY_WINDOW"))
+        if os.environ.get("MEMORY_SUMMARY_WINDOW")
+        else 6,
+        "memory_summary_max_words": int(os.environ.get("MEMORY_SUMMARY_MAX_WORDS"))
+        if os.environ.get("MEMORY_SUMMARY_MAX_WORDS")
+        else 400,
+        "memory_summary_ttl": int(os.environ.get("MEMORY_SUMMARY_TTL"))
+        if os.environ.get("MEMORY_SUMMARY_TTL")
+        else 30 * 24 * 3600,
+        "lt_memory_interval": int(os.environ.get("LT_MEMORY_INTERVAL"))
+        if os.environ.get("LT_MEMORY_INTERVAL")
+        else 3600,
+        "lt_memory_lookback_hours": int(os.environ.get("LT_MEMORY_LOOKBACK_HOURS"))
+        if os.environ.get("LT_MEMORY_LOOKBACK_HOURS")
+        else 24,
+        "lt_memory_concurrency": int(os.environ.get("LT_MEMORY_CONCURRENCY"))
+        if os.environ.get("LT_MEMORY_CONCURRENCY")
+        else 4,
+        "lt_memory_max_chats": int(os.environ.get("LT_MEMORY_MAX_CHATS"))
+        if os.environ.get("LT_MEMORY_MAX_CHATS")
+        else 200,
+        "lt_memory_max_facts": int(os.environ.get("LT_MEMORY_MAX_FACTS"))
+        if os.environ.get("LT_MEMORY_MAX_FACTS")
+        else 200,
+        "system_prompt_cache_size": int(os.environ.get("SYSTEM_PROMPT_CACHE_SIZE"))
+        if os.environ.get("SYSTEM_PROMPT_CACHE_SIZE")
+        else 1024,
+        "prompt_template_reload": os.environ.get("PROMPT_TEMPLATE_RELOAD") == "true"
+        if os.environ.get("PROMPT_TEMPLATE_RELOAD") is not None
+        else False,
+        "log_format": os.environ.get("LOG_FORMAT") or "text",
+        "log_async": os.environ.get("LOG_ASYNC") == "true"
+        if os.environ.get("LOG_ASYNC") is not None
+        else True,
+        "metrics_enabled": os.environ.get("METRICS_ENABLED") == "true"
+        if os.environ.get("METRICS_ENABLED") is not None
+        else False,
     }
     for key, value in env_vars.items():
         if value is not None:
@@ -1,16 +1,48 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
 
 import bcrypt
 from fastapi import HTTPException, Request
 import jwt
+import redis
 
 from config.config import config
 from models.user_models import UserCreate
 from utils.log import output_log
 from services.redis_service import get_table_record, create_table_record
+from utils.redis import redis_cache
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+# REVOKED_TOKENS_KEY:<sha256 of token> exists until the revoked token would
+# have expired anyway. Tokens revoked before per-token keys existed were kept
+# in a set under REVOKED_TOKENS_KEY itself; migrate_revoked_tokens moves them.
+REVOKED_TOKENS_KEY = "auth:revoked"
+
+# Failure policy: Redis only holds hardening state for auth, namely revocations
+# and login attempt counters. When it is unreachable both checks fail open and
+# log an error. Tokens are still checked for signature and expiry, so an outage
+# does not lock every user out; revocations and rate limits resume with Redis.
+# Storing a new revocation cannot fail open, so revoke_token logs the error and
+# reports it to the caller instead of raising.
+
+# token hash -> (username, exp timestamp); verified claims of recent tokens
+_verified_tokens: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+_verified_tokens_lock = threading.Lock()
+
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event
+# loop while bounding how many cores logins can take at once
+_bcrypt_executor = ThreadPoolExecutor(
+    max_workers=config.bcrypt_workers, thread_name_prefix="bcrypt"
+)
+
+
+def _checkpw(plain_password: str, hashed_password: str) -> bool:
     try:
         plain_bytes = plain_password.encode("utf-8")
         hashed_bytes = (
@@ -24,18 +56,97 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
-def get_password_hash(password: str) -> str:
-    hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
+def _hashpw(password: str) -> str:
+    hashed = bcrypt.hashpw(
+        password.encode("utf-8"), bcrypt.gensalt(rounds=config.bcrypt_rounds)
+    )
     return hashed.decode("utf-8")
 
 
-def authenticate_user(username: str, password: str) -> Optional[Dict]:
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return _bcrypt_executor.submit(_checkpw, plain_password, hashed_password).result()
+
+
+def get_password_hash(password: str) -> str:
+    return _bcrypt_executor.submit(_hashpw, password).result()
+
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(
+        _bcrypt_executor, _checkpw, plain_password, hashed_password
+    )
+
+
+async def aget_password_hash(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(
+        _bcrypt_executor, _hashpw, password
+    )
+
+
+def _login_attempts_key(scope: str, value: str) -> str:
+    return f"auth:login:{scope}:{value}"
+
+
+def check_login_rate_limit(username: str, ip: Optional[str]) -> None:
+    """Count a login attempt and raise 429 once the user or IP is over its limit.
+
+    The tight per-user counter is keyed on the username and client IP together,
+    so failed attempts from one address cannot lock the account out for
+    everyone else. A looser counter on the username alone catches guesses for
+    one account spread over many addresses. ``ip`` must be the client address
+    as resolved from trusted proxies.
+
+    Counters live in Redis so the limit holds across workers. If Redis is
+    unavailable the attempt is let through, following the failure policy above.
+    Blocking; call it from async code through ``asyncio.to_thread``.
+    """
+    limits = [
+        (_login_attempts_key("user", _user_scope(username, ip)), config.login_rate_limit_user),
+        (_login_attempts_key("user", username), config.login_rate_limit_account),
+    ]
+    if ip:
+        limits.append((_login_attempts_key("ip", ip), config.login_rate_limit_ip))
+    try:
+        pipe = redis_cache.client.pipeline()
+        for key, _ in limits:
+            pipe.set(key, 0, ex=config.login_rate_limit_window, nx=True)
+            pipe.incr(key)
+            pipe.ttl(key)
+        results = pipe.execute()
+    except redis.RedisError as e:
+        output_log(f"Login rate limit check failed: {str(e)}", "error")
+        return
+    for i, (key, limit) in enumerate(limits):
+        attempts, ttl = results[i * 3 + 1], results[i * 3 + 2]
+        if attempts > limit:
+            output_log(f"Login rate limit exceeded for {key}", "warning")
+            raise HTTPException(
+                status_code=429,
+                detail="Too many login attempts, please try again later",
+                headers={"Retry-After": str(max(ttl, 1))},
+            )
+
+
+def _user_scope(username: str, ip: Optional[str]) -> str:
+    return f"{username}:{ip or 'unknown'}"
+
+
+def reset_login_attempts(username: str, ip: Optional[str]) -> None:
+    # The account-wide counter is left to expire, so a successful login from
+    # one address does not reset guesses made from others
+    try:
+        redis_cache.client.delete(_login_attempts_key("user", _user_scope(username, ip)))
+    except redis.RedisError as e:
+        output_log(f"Failed to reset login attempts: {str(e)}", "error")
+
+
+async def authenticate_user(username: str, password: str) -> Optional[Dict]:
     try:
         user = get_table_record("user", username)
         if not user:
             output_log(f"User not found: {username}", "warning")
             return None
-        if verify_password(password, user["password"]):
+        if await averify_password(password, user["password"]):
             return user
         output_log(f"Invalid password for user: {username}", "warning")
         return None
@@ -44,13 +155,13 @@ def authenticate_user(username: str, password: str) -> Optional[Dict]:
         return None
 
 
-def create_user(user_data: UserCreate) -> Optional[Dict]:
+async def create_user(user_data: UserCreate) -> Optional[Dict]:
     try:
         existing_user = get_table_record("user", user_data.username)
         if existing_user:
             output_log(f"User already exists: {user_data.username}", "warning")
             raise HTTPException(status_code=400, detail="User already exists")
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await aget_password_hash(user_data.password)
         api_token = create_access_token({"sub": user_data.username}, None)
         created_record = create_table_record(
             "user",
@@ -79,7 +190,9 @@ def create_user(user_data: UserCreate) -> Optional[Dict]:
 
 
 def create_access_token(data: dict, expiration_days: int) -> str:
-    to_encode = data.copy()
+    # jti keeps tokens issued within the same second distinct, so revoking one
+    # never revokes its replacement
+    to_encode = {**data, "jti": uuid.uuid4().hex}
     if expiration_days:
         # Other JWT token has expiration
         expire = datetime.now(timezone.utc) + timedelta(days=expiration_days)
@@ -91,6 +204,108 @@ def create_access_token(data: dict, expiration_days: int) -> str:
     return encoded_jwt
 
 
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _get_verified_token(token_hash: str) -> Optional[str]:
+    with _verified_tokens_lock:
+        entry = _verified_tokens.get(token_hash)
+        if entry is None:
+            return None
+        username, expires_at = entry
+        if expires_at <= time.time():
+            del _verified_tokens[token_hash]
+            return None
+        _verified_tokens.move_to_end(token_hash)
+        return username
+
+
+def _cache_verified_token(token_hash: str, username: str, expires_at: float) -> None:
+    with _verified_tokens_lock:
+        _verified_tokens[token_hash] = (username, expires_at)
+        _verified_tokens.move_to_end(token_hash)
+        # Expired entries are dropped when they are next read
+        while len(_verified_tokens) > config.auth_token_cache_size:
+            _verified_tokens.popitem(last=False)
+
+
+def _revoked_token_key(token_hash: str) -> str:
+    return f"{REVOKED_TOKENS_KEY}:{token_hash}"
+
+
+def revoke_token(token: str) -> bool:
+    """Reject the token on every worker until it would have expired.
+
+    Returns False if the revocation could not be stored in Redis, in which
+    case only this worker's cache forgets the token.
+    """
+    token_hash = _token_hash(token)
+    try:
+        payload = jwt.decode(
+            token, config.jwt_secret_key, algorithms=["HS256"], options={"verify_exp": False}
+        )
+    except jwt.PyJWTError:
+        # Never a valid token, so there is nothing to revoke
+        return True
+    with _verified_tokens_lock:
+        _verified_tokens.pop(token_hash, None)
+    ttl = int(payload["exp"] - time.time()) if payload.get("exp") else None
+    if ttl is None or ttl > 0:
+        try:
+            redis_cache.client.set(_revoked_token_key(token_hash), "1", ex=ttl)
+        except redis.RedisError as e:
+            output_log(f"Failed to revoke an access token: {str(e)}", "error")
+            return False
+    output_log("Revoked an access token", "debug")
+    return True
+
+
+def migrate_revoked_tokens() -> None:
+    """Move revocations from the legacy set to per-token keys."""
+    client = redis_cache.client
+    if client.type(REVOKED_TOKENS_KEY) != "set":
+        return
+    token_hashes = client.smembers(REVOKED_TOKENS_KEY)
+    pipe = client.pipeline()
+    for token_hash in token_hashes:
+        # The token itself is gone, so its expiry is unknown
+        pipe.set(_revoked_token_key(token_hash), "1")
+    pipe.delete(REVOKED_TOKENS_KEY)
+    pipe.execute()
+    output_log(f"Migrated {len(token_hashes)} revoked tokens", "info")
+
+
+def _is_revoked(token_hash: str) -> bool:
+    try:
+        return bool(redis_cache.client.exists(_revoked_token_key(token_hash)))
+    except redis.RedisError as e:
+        output_log(f"Token revocation check failed: {str(e)}", "error")
+        return False
+
+
+def verify_token(token: str) -> str:
+    """Return the username of a valid, unrevoked token.
+
+    Signatures are only checked the first time a token is seen; later calls
+    are served from the verified-claims cache until the token expires. This
+    makes a blocking Redis call, so async callers run it in a thread.
+    """
+    token_hash = _token_hash(token)
+    if _is_revoked(token_hash):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    username = _get_verified_token(token_hash)
+    if username is not None:
+        return username
+    # jwt.decode rejects expired tokens itself
+    payload = jwt.decode(token, config.jwt_secret_key, algorithms=["HS256"])
+    username = payload.get("sub")
+    if username is None:
+        raise HTTPException(status_code=401, detail="Invalid username")
+    _cache_verified_token(token_hash, username, payload.get("exp") or float("inf"))
+    return username
+
+
 async def authenticate_request(request: Request):
     try:
         token = request.headers.get("Authorization")
@@ -98,17 +313,7 @@ async def authenticate_request(request: Request):
             raise HTTPException(status_code=401, detail="Invalid authentication Token")
         if token.startswith("Bearer "):
             token = token[7:]
-        payload = jwt.decode(token, config.jwt_secret_key, algorithms=["HS256"])
-        username: str = payload.get("sub")
-        expiration = payload.get("exp")
-        # If expiration is None, it means the token is infinite
-        # If expiration is not None, check if it is expired with current time
-        if expiration and datetime.fromtimestamp(
-            expiration, tz=timezone.utc
-        ) < datetime.now(timezone.utc):
-            raise HTTPException(status_code=401, detail="Token has expired")
-        if username is None:
-            raise HTTPException(status_code=401, detail="Invalid username")
+        username = await asyncio.to_thread(verify_token, token)
         return {"auth_type": "jwt", "username": username}
     except Exception as e:
         output_log(f"Authentication error: {str(e)}", "error")
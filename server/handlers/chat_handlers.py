@@ -1,14 +1,23 @@
 from models.chat_config import ChatConfig
 from services.peng_agent import PengAgent, AgentState
 from utils.log import output_log
+from utils.metrics import (
+    CHAT_REQUESTS,
+    CHAT_SECONDS,
+    CHAT_STAGE_SECONDS,
+    TIME_TO_FIRST_TOKEN_SECONDS,
+)
 from utils.mysql_connect import MysqlConnect
 import services.prompt_generator as prompt_generator
+import services.memory_summary as memory_summary
 from fastapi.responses import StreamingResponse, JSONResponse
 from langchain_core.messages import (
     AIMessage,
 )
 from typing import List
+import asyncio
 import json
+import time
 from typing import AsyncIterator
 
 
@@ -27,12 +36,15 @@ def _generate_prompt_params(
     )
 
     prompt = []
-    prompt += prompt_generator.system_prompt(user_name, mysql_conn)
-    prompt += prompt_generator.add_short_term_memory_to_prompt(chat_config.short_term_memory, mysql_conn, chat_config.base_model, user_name)
+    prompt += prompt_generator.system_prompt(user_name)
+    if chat_config.memory_mode == "summary":
+        prompt += memory_summary.add_summarized_memory_to_prompt(chat_config.short_term_memory, memory_summary.memory_window(chat_config), mysql_conn, chat_config.base_model, user_name)
+    else:
+        prompt += prompt_generator.add_short_term_memory_to_prompt(chat_config.short_term_memory, mysql_conn, chat_config.base_model, user_name)
     prompt += prompt_generator.add_image_to_prompt(chat_config.base_model, image, user_name=user_name)
     prompt += prompt_generator.add_knowledge_base_to_prompt(knowledge_base, message)
     prompt += prompt_generator.add_human_message_to_prompt(message)
-    output_log(f"Generated Prompt: {prompt}", "DEBUG")
+    output_log("Generated Prompt: %s", "DEBUG", prompt)
 
     chat_id = chat["id"]
     mysql_conn.create_record(
@@ -55,8 +67,14 @@ async def chat_handler(
         "debug",
     )
 
+    started = time.perf_counter()
     mysql = MysqlConnect()
-    prompt, chat_id = _generate_prompt_params(user_name, message, knowledge_base, image, chat_config, mysql)
+    # Prompt assembly does blocking MySQL, Redis and S3 I/O
+    with CHAT_STAGE_SECONDS.time(stage="prompt_assembly"):
+        prompt, chat_id = await asyncio.to_thread(
+            _generate_prompt_params, user_name, message, knowledge_base, image, chat_config, mysql
+        )
+    memory_summary.schedule_summary_refresh(user_name, chat_config)
 
     agent = PengAgent(
         user_name,
@@ -71,9 +89,11 @@ async def chat_handler(
 
     full_response = ""
     pre_chunk_type = ""
+    first_output = True
+    status = "ok"
     try:
         async for chunk in agent.astream(AgentState(messages=prompt)):
-            output_log(f"Received chunk: {chunk}", "DEBUG")
+            output_log("Received chunk: %s", "DEBUG", chunk)
             if chunk:
                 if "call_model" in chunk and "messages" in chunk["call_model"]:
                     message = chunk["call_model"]["messages"]
@@ -119,6 +139,10 @@ async def chat_handler(
                         mysql_conn=mysql,
                         call_id=tool_call_id,
                     )
+                # Incremental output of a running tool, only streamed to the client
+                elif "tool_progress" in chunk:
+                    chunk_content = chunk["tool_progress"]["text"]
+                    chunk_type = "tool_progress"
                 else:
                     chunk_content = ""
                     chunk_type = ""
@@ -132,6 +156,11 @@ async def chat_handler(
                         )
                     pre_chunk_type = chunk_type
                     full_response = ""
+                if first_output and chunk_type in ["output_text", "reasoning_summary", "tool_calls"]:
+                    first_output = False
+                    TIME_TO_FIRST_TOKEN_SECONDS.observe(
+                        time.perf_counter() - started, operator=chat_config.operator, model=chat_config.base_model
+                    )
                 if isinstance(chunk_content, str):
                     yield (
                         json.dumps(
@@ -140,11 +169,16 @@ async def chat_handler(
                         + "\n"
                     )
                     full_response += chunk_content
+    except (asyncio.CancelledError, GeneratorExit):
+        # The client disconnected mid-stream
+        status = "cancelled"
+        raise
     except Exception as e:
+        status = "error"
         output_log(f"Error during streaming: {e}", "error")
         yield (
             json.dumps(
-                {"chunk": f"Error: {str(e)}", "type": "output_text", "done": False}
+                {"chunk": f"Error: {str(e)}", "type": "output_text", "done": False, "error": True}
             )
             + "\n"
         )
@@ -157,7 +191,10 @@ async def chat_handler(
                 mysql_conn=mysql,
             )
         mysql.close()
-        yield json.dumps({"chunk": f"{chat_id}", "done": True}) + "\n"
+        CHAT_SECONDS.observe(time.perf_counter() - started, operator=chat_config.operator, model=chat_config.base_model)
+        CHAT_REQUESTS.inc(operator=chat_config.operator, model=chat_config.base_model, status=status)
+        if status != "cancelled":
+            yield json.dumps({"chunk": f"{chat_id}", "done": True}) + "\n"
 
 def _save_chat_response(chat_id: int, message_type: str, content: str, mysql_conn: MysqlConnect = None, **kwargs):
     mysql = mysql_conn
@@ -250,6 +287,28 @@ def _invoke_message_storage(chat_id, responses, mysql: MysqlConnect):
 
 async def chat_completions_handler(
     user_name: str, message: str, knowledge_base: str, image: List[str], chat_config: ChatConfig
+):
+    started = time.perf_counter()
+    messages, status = await _run_completion(user_name, message, knowledge_base, image, chat_config)
+    if status == "ok":
+        CHAT_SECONDS.observe(time.perf_counter() - started, operator=chat_config.operator, model=chat_config.base_model)
+    CHAT_REQUESTS.inc(operator=chat_config.operator, model=chat_config.base_model, status=status)
+    return messages
+
+
+async def internal_completion(
+    user_name: str, message: str, knowledge_base: str, image: List[str], chat_config: ChatConfig
+):
+    """Completion the server runs for itself, such as shortening tool output.
+
+    Kept out of the chat request metrics, which count user requests only.
+    """
+    messages, _ = await _run_completion(user_name, message, knowledge_base, image, chat_config)
+    return messages
+
+
+async def _run_completion(
+    user_name: str, message: str, knowledge_base: str, image: List[str], chat_config: ChatConfig
 ):
     output_log(
         f"Chat Completion for User: {user_name}, Base: {knowledge_base}, Message: {message}, Image: {image}, Config: {chat_config}",
@@ -257,7 +316,12 @@ async def chat_completions_handler(
     )
 
     mysql = MysqlConnect()
-    prompt, chat_id = _generate_prompt_params(user_name, message, knowledge_base, image, chat_config, mysql)
+    # Prompt assembly does blocking MySQL, Redis and S3 I/O
+    with CHAT_STAGE_SECONDS.time(stage="prompt_assembly"):
+        prompt, chat_id = await asyncio.to_thread(
+            _generate_prompt_params, user_name, message, knowledge_base, image, chat_config, mysql
+        )
+    memory_summary.schedule_summary_refresh(user_name, chat_config)
 
     agent = PengAgent(
         operater=chat_config.operator,
@@ -276,11 +340,12 @@ async def chat_completions_handler(
                         "type": "text",
                         "text": "Error: occurred during chat completion.",
                     }
-                ]
+                ],
+                response_metadata={"error": True},
             )
-        ]
+        ], "error"
     _invoke_message_storage(chat_id, responses, mysql)
-    return responses["messages"]
+    return responses["messages"], "ok"
 
 
 async def create_completion_response(
@@ -6,7 +6,6 @@ import base64
 import datetime
 import mimetypes
 import os
-import re
 
 
 def file_uploader(file_content: str, content_type: str, upload_file_path: str, user_name: str = "default"):
@@ -45,6 +44,20 @@ def _extension_from_content_type(content_type: str) -> str:
     return "bin"
 
 
+def _build_upload_path(content_type: str, file_name: str = None, user_name: str = "default") -> str:
+    timestamp = int(datetime.datetime.now().timestamp() * 1000)
+    date_prefix = datetime.datetime.now().strftime("%Y/%m/%d")
+    safe_file_name = _safe_file_name(file_name or "")
+    extension = _extension_from_content_type(content_type)
+
+    if content_type == "application/pdf":
+        pdf_name = safe_file_name or f"temp_{timestamp}.pdf"
+        if not pdf_name.lower().endswith(".pdf"):
+            pdf_name = f"{pdf_name}.pdf"
+        return f"{config.s3_base_path}/{user_name}/uploads/{date_prefix}/{pdf_name}" if user_name else f"{config.s3_base_path}/uploads/{date_prefix}/{pdf_name}"
+    return f"{config.s3_base_path}/{user_name}/uploads/{date_prefix}/temp_{timestamp}.{extension}" if user_name else f"{config.s3_base_path}/uploads/{date_prefix}/temp_{timestamp}.{extension}"
+
+
 def file_upload_frontend_with_name(
     file_content: str,
     content_type: str,
@@ -55,10 +68,12 @@ def file_upload_frontend_with_name(
         return ["Invalid upload payload", False]
 
     payload = file_content.strip()
-    data_url_match = re.match(r"^data:([^;]+);base64,(.+)$", payload, re.DOTALL)
-    if data_url_match:
-        content_type = data_url_match.group(1).strip()
-        payload = data_url_match.group(2).strip()
+    # Split the data URL header without scanning the whole payload
+    if payload.startswith("data:"):
+        header, separator, data = payload.partition(",")
+        if separator and header.endswith(";base64") and len(header) > len("data:;base64"):
+            content_type = header[len("data:"):-len(";base64")].strip()
+            payload = data.strip()
 
     padded_content = payload + ("=" * (-len(payload) % 4))
     try:
@@ -66,20 +81,46 @@ def file_upload_frontend_with_name(
     except Exception:
         return ["Invalid base64 file content", False]
 
-    timestamp = int(datetime.datetime.now().timestamp() * 1000)
-    date_prefix = datetime.datetime.now().strftime("%Y/%m/%d")
-    safe_file_name = _safe_file_name(file_name or "")
-    extension = _extension_from_content_type(content_type)
+    upload_path = _build_upload_path(content_type, file_name, user_name)
+    return file_uploader(decoded_content, content_type, upload_path, user_name=user_name)
 
-    if content_type == "application/pdf":
-        pdf_name = safe_file_name or f"temp_{timestamp}.pdf"
-        if not pdf_name.lower().endswith(".pdf"):
-            pdf_name = f"{pdf_name}.pdf"
-        upload_path = f"{config.s3_base_path}/{user_name}/uploads/{date_prefix}/{pdf_name}" if user_name else f"{config.s3_base_path}/uploads/{date_prefix}/{pdf_name}"
-    else:
-        upload_path = f"{config.s3_base_path}/{user_name}/uploads/{date_prefix}/temp_{timestamp}.{extension}" if user_name else f"{config.s3_base_path}/uploads/{date_prefix}/temp_{timestamp}.{extension}"
 
-    return file_uploader(decoded_content, content_type, upload_path, user_name=user_name)
+def file_upload_stream(
+    file_obj,
+    content_type: str,
+    file_name: str = None,
+    user_name: str = "default",
+):
+    if file_obj is None or not content_type:
+        return ["Invalid upload payload", False]
+
+    upload_path = _build_upload_path(content_type, file_name, user_name)
+    m = MinioStorage(user_name=user_name)
+    if not m.file_upload_from_fileobj(file_obj, upload_path, content_type, config.s3_bucket):
+        return ["", False]
+    return [f"{config.s3_bucket}://{upload_path}", True]
+
+
+def create_presigned_upload(
+    content_type: str,
+    file_name: str = None,
+    user_name: str = "default",
+):
+    if not content_type:
+        return {"upload_url": "", "upload_path": "Invalid upload payload", "success": False}
+
+    upload_path = _build_upload_path(content_type, file_name, user_name)
+    m = MinioStorage(user_name=user_name)
+    upload_url = m.generate_presigned_upload_url(upload_path, content_type, config.s3_bucket)
+    if not upload_url:
+        return {"upload_url": "", "upload_path": "", "success": False}
+    return {
+        "upload_url": upload_url,
+        "upload_path": f"{config.s3_bucket}://{upload_path}",
+        "method": "PUT",
+        "headers": {"Content-Type": content_type},
+        "success": True,
+    }
 
 
 def file_operator(local_file_path: str):
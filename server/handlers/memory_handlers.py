@@ -1,96 +1,142 @@
-from sqlalchemy import text
+from sqlalchemy import TIMESTAMP, bindparam, text
 from utils.log import output_log
 from utils.mysql_connect import MysqlConnect
-from datetime import datetime, timedelta
+from datetime import datetime
 from config.config import config
+from typing import Optional
+import base64
 import json
 
+# Newest chats first; the EXISTS probe skips chats that never got a response so
+# pages stay full. Chats without a timestamp cannot be placed on a page
+# boundary, so they are left out. Both halves are served by the composite indexes on
+# chat (user_name, created_at, id) and ai_response (chat_id, id).
+_MEMORY_PAGE_QUERY = text("""
+    SELECT c.id, c.user_name, c.type, c.base_model, c.human_input, c.created_at
+    FROM chat c
+    WHERE c.user_name = :username
+      AND c.created_at IS NOT NULL
+      AND (:cursor_created_at IS NULL
+           OR c.created_at < :cursor_created_at
+           OR (c.created_at = :cursor_created_at AND c.id < :cursor_id))
+      AND EXISTS (SELECT 1 FROM ai_response a WHERE a.chat_id = c.id)
+    ORDER BY c.created_at DESC, c.id DESC
+    LIMIT :limit
+""").bindparams(bindparam("cursor_created_at", type_=TIMESTAMP)).columns(created_at=TIMESTAMP)
 
-def get_memory(username: str = ""):
-    output_log("GET /memory", "DEBUG")
+_LAST_RESPONSES_QUERY = text("""
+    SELECT a.chat_id, a.ai_response
+    FROM ai_response a
+    JOIN (SELECT chat_id, MAX(id) AS id FROM ai_response
+          WHERE chat_id IN :chat_ids GROUP BY chat_id) last_response ON last_response.id = a.id
+""").bindparams(bindparam("chat_ids", expanding=True))
+
+_FIRST_INPUTS_QUERY = text("""
+    SELECT u.chat_id, u.input_location
+    FROM user_input u
+    JOIN (SELECT chat_id, MIN(id) AS id FROM user_input
+          WHERE chat_id IN :chat_ids GROUP BY chat_id) first_input ON first_input.id = u.id
+""").bindparams(bindparam("chat_ids", expanding=True))
+
+
+def _encode_cursor(created_at, chat_id: int) -> str:
+    payload = json.dumps({"created_at": str(created_at), "id": chat_id})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str):
+    payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    return datetime.fromisoformat(payload["created_at"]), int(payload["id"])
+
+
+def _read_memory_page(session, username: str, limit: int, cursor_created_at, cursor_id):
+    """Return the page's chat rows and their records in display form."""
+    rows = session.execute(
+        _MEMORY_PAGE_QUERY,
+        {
+            "username": username,
+            "cursor_created_at": cursor_created_at,
+            "cursor_id": cursor_id,
+            "limit": limit,
+        },
+    ).fetchall()
+    if not rows:
+        return rows, []
+    chat_ids = [row.id for row in rows]
+    responses = dict(
+        session.execute(_LAST_RESPONSES_QUERY, {"chat_ids": chat_ids}).fetchall()
+    )
+    inputs = dict(
+        session.execute(_FIRST_INPUTS_QUERY, {"chat_ids": chat_ids}).fetchall()
+    )
+    return rows, [
+        {
+            "id": row.id,
+            "username": row.user_name,
+            "type": row.type,
+            "base_model": row.base_model,
+            "human_input": row.human_input,
+            "other_input": inputs.get(row.id) or "",
+            "ai_response": responses.get(row.id),
+            "created_at": row.created_at,
+        }
+        for row in rows
+        # A response that was saved empty still counts as incomplete
+        if responses.get(row.id)
+    ]
+
+
+def get_memory_page(username: str = "", limit: Optional[int] = None, cursor: Optional[str] = None):
+    """Return one page of a user's chat history, newest first.
+
+    ``next_cursor`` is an opaque token for the following page, or None once
+    the history is exhausted.
+    """
+    output_log("POST /memory/page", "DEBUG")
     if username == "":
-        return []
+        return {"items": [], "next_cursor": None}
+    limit = max(1, min(limit or config.memory_page_size, config.memory_max_page_size))
+    try:
+        cursor_created_at, cursor_id = _decode_cursor(cursor) if cursor else (None, None)
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        output_log(f"Invalid memory cursor: {e}", "warning")
+        raise ValueError("Invalid cursor")
 
     mysql = MysqlConnect()
     with mysql.get_session() as session:
-        # Optimized query to fetch all necessary data in one go
-        # This avoids N+1 problem and fetching excessively large content
-        query = text("""
-            SELECT
-                c.id,
-                c.user_name,
-                c.type,
-                c.base_model,
-                c.human_input,
-                c.created_at,
-                COALESCE((SELECT input_location FROM user_input WHERE chat_id = c.id ORDER BY id ASC LIMIT 1), "") as other_input,
-                (SELECT ai_response FROM ai_response WHERE chat_id = c.id ORDER BY id DESC LIMIT 1) as ai_response
-            FROM chat c
-            WHERE c.user_name = :username
-            ORDER BY c.created_at DESC
-        """)
-
         try:
-            result = session.execute(query, {"username": username})
-
-            records = []
-            for row in result:
-                # If ai_response is missing, skip the record as it's incomplete
-                if not row.ai_response:
-                    continue
-
-                # other_input is handled by COALESCE, so it's always a string (empty if None)
-                records.append(
-                    {
-                        "id": row.id,
-                        "username": row.user_name,
-                        "type": row.type,
-                        "base_model": row.base_model,
-                        "human_input": row.human_input,
-                        "other_input": row.other_input,
-                        "ai_response": row.ai_response,
-                        "created_at": row.created_at,
-                    }
-                )
-            return records
+            # One extra row tells whether another page exists
+            rows, items = _read_memory_page(
+                session, username, limit + 1, cursor_created_at, cursor_id
+            )
         except Exception as e:
             output_log(f"Error executing memory query: {e}", "error")
-            return []
+            return {"items": [], "next_cursor": None}
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        items = [item for item in items if item["id"] != rows[limit].id]
+        next_cursor = _encode_cursor(last.created_at, last.id)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def get_memory(username: str = ""):
+    output_log("GET /memory", "DEBUG")
+    if username == "":
+        return []
+
+    records = []
+    cursor = None
+    while True:
+        page = get_memory_page(username, config.memory_max_page_size, cursor)
+        records += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return records
         
 async def update_lt_memory(username: str):
     output_log("POST /memory/update_lt_memory", "DEBUG")
-    mysql = MysqlConnect()
-    one_day_chat = mysql.read_records("chat", {"user_name": username, "created_at>=": datetime.now() - timedelta(days=1)})
-    if not one_day_chat:
-        return []
-    one_day_memory = [f"Human: {chat['human_input']}\n\n" for chat in one_day_chat]
-    output_log(f"One day chat for {username}: {one_day_memory}", "debug")
-    prompt = f'''Extract important information from the following conversations for long-term memory. You will receive multiple conversation input. You should output the important information in a list format seperated by ";".
-        Sample1: 
-        Input: Human: Using python with uv to develop a web server, what should I do?
-        Output: User prefer python; User want to use uv for python package management;
-        Sample2: 
-        Input: answer this question in actuarial science?
-        Output: 
-        (No record for sample 2 since it's not important information in the conversation)
-        ONLY RECORDED OBVIOUS and IMPORTANT INFORMATION. DO NOT RECORD EVERY DETAIL. IF THE CONVERSATION IS NOT IMPORTANT, JUST SKIP IT.
-        Today's conversation:
-        {one_day_memory}'''
-    from handlers.chat_handlers import chat_completions_handler
-    from models.chat_config import ChatConfig
-    chat_config = ChatConfig(
-        operator=config.default_operator,
-        base_model=config.default_base_model,
-    )
-    lt_memory = await chat_completions_handler(
-        username, prompt, None, None, chat_config
-    )
-    lt_memory = lt_memory[-1].content[0]["text"].strip()
-    lt_memory = lt_memory.replace("\n", "").replace("\r", "")
-    lt_memory = lt_memory.split(";")
-    if lt_memory != [] and lt_memory != [""]:
-        lt_memory = json.dumps(lt_memory)
-        with mysql.get_session():
-            mysql.update_record("user", {"long_term_memory": lt_memory}, {"user_name": username})
-    mysql.close()
+    from services.long_term_memory import extract_user_memory
+
+    await extract_user_memory(username)
     return None
@@ -86,6 +86,10 @@ def get_model_instance(model_name: str = "", operator_name: str = None):
             model=real_model_name,
             reasoning_effect=get_reasoning_effect(full_model_name),
         )
+    elif operator.runtime == "mock":
+        from services.chat_models.mock_langchain import CustomMockLLM
+
+        base_model_ins = CustomMockLLM.from_endpoint(operator.endpoint, real_model_name)
     elif operator.runtime == "huggingface":
         from langchain_huggingface import ChatHuggingFace, HuggingFacePipeline
 
@@ -4,7 +4,8 @@ from fastapi import HTTPException
 from models.user_models import UserProfile, UserUpdate
 from services.redis_service import get_table_record, update_table_record
 from utils.log import output_log
-from handlers.auth_handlers import get_password_hash, create_access_token
+from handlers.auth_handlers import get_password_hash, create_access_token, revoke_token
+from services.prompt_generator import invalidate_system_prompt
 
 def get_user_profile(username: str) -> UserProfile:
     user = get_table_record("user", username)
@@ -75,6 +76,7 @@ def update_user_profile(username: str, user_data: UserUpdate) -> Dict:
             return {"message": "No changes to update"}
 
         update_table_record("user", update_fields, {"user_name": username}, redis_id="user_name")
+        invalidate_system_prompt(username)
 
         return {"message": "User profile updated successfully"}
 
@@ -91,11 +93,17 @@ def regenerate_user_token(username: str) -> Dict:
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        new_token = create_access_token({"sub": username}, None)
+        # Revoke first, so a Redis outage cannot leave the old token valid
+        # after the new one has been handed out
+        if user.get("api_token") and not revoke_token(user["api_token"]):
+            raise HTTPException(status_code=503, detail="Could not revoke the current token, please try again")
 
+        new_token = create_access_token({"sub": username}, None)
         update_table_record("user", {"api_token": new_token}, {"user_name": username}, redis_id="user_name")
 
         return {"api_token": new_token}
+    except HTTPException:
+        raise
     except Exception as e:
         output_log(f"Error regenerating token: {str(e)}", "error")
         raise HTTPException(status_code=500, detail=f"Failed to regenerate token: {str(e)}")
@@ -3,12 +3,25 @@ from api.api import app
 from config.config import config
 import api.setup as setup
 from utils.log import output_log
+from services.long_term_memory import lt_memory_scheduler
+from services.tools.smtp_tools import email_worker
 import importlib.metadata
 
 if __name__ == "__main__":
     setup.set_up()
+    if config.lt_memory_interval > 0:
+        lt_memory_scheduler.ensure_started()
+    # Delivers emails queued before a restart without waiting for a new one
+    email_worker.ensure_started()
     output_log(f"Starting {config.app_name} API", "INFO")
     output_log(f"Version: {importlib.metadata.version('Peng-Agent')}", "INFO")
+    # Only proxies listed in FORWARDED_ALLOW_IPS may set the client address
+    # through X-Forwarded-For, which the login rate limit keys on
     uvicorn.run(
-        app, host=config.host, port=config.port, log_level=config.log_level.lower()
+        app,
+        host=config.host,
+        port=config.port,
+        log_level=config.log_level.lower(),
+        proxy_headers=True,
+        forwarded_allow_ips=config.forwarded_allow_ips,
     )
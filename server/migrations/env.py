@@ -0,0 +1,39 @@
+from alembic import context
+from models.db_models import Base, create_db_engine
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    from models.db_models import get_database_url
+
+    context.configure(
+        url=get_database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # set_up passes its own connection; the CLI falls back to the app engine
+    connection = context.config.attributes.get("connection")
+    if connection is None:
+        with create_db_engine().connect() as connection:
+            _run(connection)
+    else:
+        _run(connection)
+
+
+def _run(connection):
+    context.configure(connection=connection, target_metadata=target_metadata)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
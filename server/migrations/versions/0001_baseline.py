@@ -0,0 +1,172 @@
+"""Baseline: the schema created by Base.metadata.create_all before migrations
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.mysql import VARCHAR
+from config.config import config
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Tables in creation order; foreign keys point only at earlier ones
+TABLES = [
+    "operator", "model", "chat", "ai_response", "ai_reasoning", "user_input",
+    "tool_call", "tool_output", "knowledge_base", "user", "tools",
+]
+
+
+def _id():
+    return sa.Column("id", sa.Integer, primary_key=True, autoincrement=True)
+
+
+def _chat_id():
+    return sa.Column("chat_id", sa.Integer, sa.ForeignKey("chat.id"))
+
+
+def _created_at():
+    return sa.Column("created_at", sa.TIMESTAMP)
+
+
+def upgrade():
+    # Databases from before migrations are stamped at this revision and never
+    # run it. The tables are spelled out rather than read from the models, so
+    # later model changes belong to their own revisions.
+    op.create_table(
+        "operator",
+        _id(),
+        sa.Column("operator", sa.String(64), unique=True, nullable=False),
+        sa.Column("runtime", sa.String(64)),
+        sa.Column("endpoint", sa.Text),
+        sa.Column("api_key", sa.Text),
+        sa.Column("org_id", sa.Text),
+        sa.Column("project_id", sa.Text),
+        sa.Column("embedding_pattern", sa.Text),
+        sa.Column("image_pattern", sa.Text),
+        sa.Column("audio_pattern", sa.Text),
+        sa.Column("video_pattern", sa.Text),
+        sa.Column("chat_pattern", sa.Text),
+    )
+    op.create_table(
+        "model",
+        _id(),
+        sa.Column("operator", sa.String(64), sa.ForeignKey("operator.operator")),
+        sa.Column("type", sa.String(64)),
+        sa.Column("model_name", sa.Text, nullable=False),
+        sa.Column("isAvailable", sa.Boolean),
+        sa.Column("input_text", sa.Boolean),
+        sa.Column("output_text", sa.Boolean),
+        sa.Column("input_image", sa.Boolean),
+        sa.Column("output_image", sa.Boolean),
+        sa.Column("input_audio", sa.Boolean),
+        sa.Column("output_audio", sa.Boolean),
+        sa.Column("input_video", sa.Boolean),
+        sa.Column("output_video", sa.Boolean),
+        sa.Column("reasoning_effect", sa.String(64)),
+    )
+    op.create_table(
+        "chat",
+        _id(),
+        sa.Column("user_name", sa.String(64)),
+        sa.Column("type", sa.String(64)),
+        sa.Column("base_model", sa.Text),
+        # Sized by INPUT_MAX_LENGTH, as create_all did
+        sa.Column(
+            "human_input",
+            VARCHAR(config.input_max_length, charset="utf8mb4", collation="utf8mb4_unicode_ci"),
+            nullable=False,
+        ),
+        sa.Column("knowledge_base", sa.Text),
+        sa.Column("feedback", sa.String(16), nullable=False),
+        _created_at(),
+    )
+    op.create_table(
+        "ai_response",
+        _id(),
+        _chat_id(),
+        sa.Column("ai_response", sa.Text),
+        _created_at(),
+    )
+    op.create_table(
+        "ai_reasoning",
+        _id(),
+        _chat_id(),
+        sa.Column("reasoning_process", sa.Text),
+        _created_at(),
+    )
+    op.create_table(
+        "user_input",
+        _id(),
+        _chat_id(),
+        sa.Column("input_type", sa.String(64)),
+        sa.Column("input_content", sa.Text),
+        sa.Column("input_location", sa.Text),
+        _created_at(),
+    )
+    op.create_table(
+        "tool_call",
+        _id(),
+        _chat_id(),
+        sa.Column("call_id", sa.String(128)),
+        sa.Column("tools_name", sa.String(128)),
+        sa.Column("tools_argument", sa.Text),
+        sa.Column("problem", sa.Text),
+        _created_at(),
+    )
+    op.create_table(
+        "tool_output",
+        _id(),
+        _chat_id(),
+        sa.Column("call_id", sa.String(128)),
+        sa.Column("output_content", sa.Text),
+        _created_at(),
+    )
+    op.create_table(
+        "knowledge_base",
+        _id(),
+        sa.Column("user_name", sa.String(64)),
+        sa.Column("knowledge_base", sa.Text),
+        sa.Column("title", sa.Text),
+        sa.Column("type", sa.Text),
+        sa.Column("path", sa.Text),
+        sa.Column("source", sa.Text),
+        sa.Column("created_by", sa.Text),
+        _created_at(),
+        sa.Column("modified_at", sa.TIMESTAMP),
+    )
+    op.create_table(
+        "user",
+        _id(),
+        sa.Column("user_name", sa.String(64), unique=True, nullable=False),
+        sa.Column("password", sa.String(64), nullable=False),
+        sa.Column("email", sa.String(64)),
+        sa.Column("api_token", sa.String(256)),
+        sa.Column("default_base_model", sa.Text),
+        sa.Column("default_output_model", sa.Text),
+        sa.Column("default_embedding_model", sa.Text),
+        sa.Column("s3_access_key", sa.String(256), nullable=True),
+        sa.Column("s3_secret_key", sa.String(256), nullable=True),
+        sa.Column("system_prompt", sa.Text, nullable=True),
+        sa.Column("long_term_memory", sa.Text, nullable=True),
+        _created_at(),
+        sa.Column("modified_at", sa.TIMESTAMP),
+    )
+    op.create_table(
+        "tools",
+        _id(),
+        sa.Column("name", sa.String(64), unique=True, nullable=False),
+        sa.Column("type", sa.String(64)),
+        sa.Column("url", sa.Text),
+        sa.Column("headers", sa.Text),
+    )
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_table(table)
@@ -0,0 +1,53 @@
+"""Index transcript tables by user and chat
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_chat_user_created", "chat", ["user_name", "created_at", "id"]),
+    ("ix_ai_response_chat", "ai_response", ["chat_id", "id"]),
+    ("ix_ai_reasoning_chat", "ai_reasoning", ["chat_id", "id"]),
+    ("ix_user_input_chat", "user_input", ["chat_id", "id"]),
+    ("ix_tool_call_chat", "tool_call", ["chat_id", "id"]),
+    ("ix_tool_output_chat", "tool_output", ["chat_id", "id"]),
+]
+
+
+def _existing_indexes(table):
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    bind = op.get_bind()
+    for name, table, columns in INDEXES:
+        if name in _existing_indexes(table):
+            continue
+        if bind.dialect.name == "mysql":
+            # Build the index in place without blocking writes to the table
+            op.execute(
+                f"CREATE INDEX {name} ON {table} ({', '.join(columns)}) ALGORITHM=INPLACE LOCK=NONE"
+            )
+        else:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    bind = op.get_bind()
+    for name, table, columns in reversed(INDEXES):
+        if name not in _existing_indexes(table):
+            continue
+        if bind.dialect.name == "mysql" and columns[0] == "chat_id":
+            # InnoDB dropped its implicit foreign key index when ours was added
+            # and refuses to drop ours unless another one covers chat_id
+            op.create_index(f"{table}_chat_id", table, ["chat_id"])
+        op.drop_index(name, table_name=table)
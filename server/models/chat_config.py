@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Literal, Optional
 
 
 class ChatConfig(BaseModel):
@@ -7,3 +7,6 @@ class ChatConfig(BaseModel):
     base_model: str = Field(default="gpt-3.5-turbo")
     tools_name: List[str] = Field(default=[])
     short_term_memory: List[int] = Field(default=[])
+    # "summary" folds turns older than memory_window into a rolling summary
+    memory_mode: Literal["verbatim", "summary"] = Field(default="verbatim")
+    memory_window: Optional[int] = Field(default=None)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, Boolean, TIMESTAMP, create_engine, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, TIMESTAMP, create_engine, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.dialects.mysql import VARCHAR
@@ -94,6 +94,9 @@ class Chat(Base):
     feedback = Column(String(16), nullable=False, default="no_response")
     created_at = Column(TIMESTAMP, default=datetime.now)
 
+    # Keyset pagination of a user's history on (created_at, id)
+    __table_args__ = (Index("ix_chat_user_created", "user_name", "created_at", "id"),)
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -114,6 +117,8 @@ class AIResponse(Base):
     ai_response = Column(Text)
     created_at = Column(TIMESTAMP, default=datetime.now)
 
+    __table_args__ = (Index("ix_ai_response_chat", "chat_id", "id"),)
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -130,6 +135,8 @@ class AIReasooning(Base):
     reasoning_process = Column(Text)
     created_at = Column(TIMESTAMP, default=datetime.now)
 
+    __table_args__ = (Index("ix_ai_reasoning_chat", "chat_id", "id"),)
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -148,6 +155,8 @@ class UserInput(Base):
     input_location = Column(Text)
     created_at = Column(TIMESTAMP, default=datetime.now)
 
+    __table_args__ = (Index("ix_user_input_chat", "chat_id", "id"),)
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -169,6 +178,8 @@ class ToolCall(Base):
     problem = Column(Text)
     created_at = Column(TIMESTAMP, default=datetime.now)
 
+    __table_args__ = (Index("ix_tool_call_chat", "chat_id", "id"),)
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -189,6 +200,8 @@ class ToolOutput(Base):
     output_content = Column(Text)
     created_at = Column(TIMESTAMP, default=datetime.now)
 
+    __table_args__ = (Index("ix_tool_output_chat", "chat_id", "id"),)
+
     def to_dict(self):
         return {
             "id": self.id,
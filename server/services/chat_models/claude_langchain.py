@@ -45,9 +45,9 @@ class CustomClaude(BaseChatModel):
         )
 
     def _claude_prepare(self, prompt: List[BaseMessage], **kwargs: Any):
-        output_log(f"Chat completion request: {prompt}", "debug")
+        output_log("Chat completion request: %s", "debug", prompt)
         prompt_translated = self._prompt_translate(prompt)
-        output_log(f"Translated prompt: {prompt_translated}", "debug")
+        output_log("Translated prompt: %s", "debug", prompt_translated)
         request_params = {
             "model": self.model_name,
             "messages": prompt_translated,
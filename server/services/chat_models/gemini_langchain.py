@@ -48,9 +48,9 @@ class CustomGemini(BaseChatModel):
         )
 
     def _gemini_prepare(self, prompt: List[BaseMessage], **kwargs: Any):
-        output_log(f"Chat completion request: {prompt}", "debug")
+        output_log("Chat completion request: %s", "debug", prompt)
         prompt_translated = self._prompt_translate(prompt)
-        output_log(f"Translated prompt: {prompt_translated}", "debug")
+        output_log("Translated prompt: %s", "debug", prompt_translated)
         request_params = {
             "max_output_tokens": self.max_tokens,
             "temperature": self.temperature,
@@ -129,7 +129,7 @@ class CustomGemini(BaseChatModel):
             config=types.GenerateContentConfig(**request_params),
         )
         for event in stream:
-            output_log(f"Received event: {event}", "debug")
+            output_log("Received event: %s", "debug", event)
             if event.candidates is None:
                 continue
             token = event.candidates[0]
@@ -0,0 +1,250 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Iterator
+from urllib.parse import parse_qs, urlparse
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    HumanMessage,
+    BaseMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field
+from utils.log import output_log
+
+from collections.abc import Sequence
+from typing import Callable, Literal, Union
+from langchain_core.tools import BaseTool
+from langchain_core.runnables import Runnable
+from langchain_core.language_models import LanguageModelInput
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+
+# Transcripts are only read from the benchmark directory, since the endpoint
+# comes from an operator record that admins can edit through the API
+TRANSCRIPT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "benchmark"
+)
+# Called when ``tool_calls`` is set without ``tool``; no agent binds it, so the
+# agent answers "not found" and the round trip has no side effects
+NOOP_TOOL = "mock_noop"
+
+_WORDS = (
+    "the agent reads the request plans a short answer checks the context and "
+    "replies with a clear summary of what it found along with the next steps"
+).split()
+
+
+def _transcript_path(path: str) -> str:
+    root = os.path.realpath(TRANSCRIPT_DIR)
+    resolved = os.path.realpath(os.path.join(root, path.lstrip("/")))
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"Mock transcripts must be inside {TRANSCRIPT_DIR}: {path}")
+    return resolved
+
+
+class CustomMockLLM(BaseChatModel):
+    """Offline chat model streaming scripted or generated content blocks.
+
+    Configured through the operator ``endpoint``, e.g.
+    ``mock://?ttft=0.3&tps=50&tokens=200&reasoning=40&tool_calls=1``, or
+    ``mock:///transcripts/chat.json?tps=80`` to replay a recorded transcript
+    stored under ``TRANSCRIPT_DIR``. A transcript is a JSON list of turns,
+    each with optional ``reasoning``, ``text`` and ``tool_call``
+    ({"name", "args"}) keys. Turn ``n`` answers the ``n``-th model call after
+    the latest human message. Generated tool calls go to the ``tool``
+    parameter, or to ``NOOP_TOOL`` when none is named. ``error=<message>``
+    makes every call fail, to check how callers report model failures.
+    """
+
+    model_name: str = Field(alias="model")
+    time_to_first_token: float = 0.0
+    tokens_per_second: float = 0.0
+    response_tokens: int = 64
+    reasoning_tokens: int = 0
+    tool_calls: int = 0
+    tool_name: str = ""
+    tool_args: Dict[str, Any] = Field(default_factory=dict)
+    transcript: Optional[List[Dict[str, Any]]] = None
+    error: str = ""
+
+    @classmethod
+    def from_endpoint(cls, endpoint: Optional[str], model: str) -> "CustomMockLLM":
+        parsed = urlparse(endpoint or "")
+        params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        transcript = None
+        if parsed.path and parsed.path != "/":
+            with open(_transcript_path(parsed.path), "r") as f:
+                transcript = json.load(f)
+        return cls(
+            model=model,
+            time_to_first_token=float(params.get("ttft", 0)),
+            tokens_per_second=float(params.get("tps", 0)),
+            response_tokens=int(params.get("tokens", 64)),
+            reasoning_tokens=int(params.get("reasoning", 0)),
+            tool_calls=int(params.get("tool_calls", 0)),
+            tool_name=params.get("tool", ""),
+            tool_args=json.loads(params.get("tool_args", "{}")),
+            transcript=transcript,
+            error=params.get("error", ""),
+        )
+
+    def _turn(self, prompt: List[BaseMessage], **kwargs: Any) -> Dict[str, Any]:
+        """Pick the scripted turn, or generate one seeded by the prompt."""
+        if self.error:
+            raise RuntimeError(self.error)
+        last_human = max(
+            (i for i, message in enumerate(prompt) if isinstance(message, HumanMessage)),
+            default=-1,
+        )
+        round_index = sum(
+            1 for message in prompt[last_human + 1:]
+            if isinstance(message, AIMessage)
+            and any(block["type"] == "tool_call" for block in message.content_blocks)
+        )
+        if self.transcript is not None:
+            turns = self.transcript
+            return dict(turns[min(round_index, len(turns) - 1)]) if turns else {"text": ""}
+
+        seed_text = str(prompt[last_human].content) if last_human >= 0 else ""
+        rng = random.Random(hashlib.sha256(seed_text.encode("utf-8")).hexdigest())
+        turn = {}
+        if self.reasoning_tokens:
+            turn["reasoning"] = " ".join(rng.choice(_WORDS) for _ in range(self.reasoning_tokens))
+        if round_index < self.tool_calls:
+            turn["tool_call"] = {"name": self.tool_name or NOOP_TOOL, "args": dict(self.tool_args)}
+        else:
+            turn["text"] = " ".join(rng.choice(_WORDS) for _ in range(self.response_tokens))
+        return turn
+
+    def _blocks(self, prompt: List[BaseMessage], **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        """Content blocks of one turn, a word at a time for text and reasoning."""
+        turn = self._turn(prompt, **kwargs)
+        for word in turn.get("reasoning", "").split(" ") if turn.get("reasoning") else []:
+            yield {"type": "reasoning", "reasoning": word + " ", "extras": {}}
+        for word in turn.get("text", "").split(" ") if turn.get("text") else []:
+            yield {"type": "text", "text": word + " ", "extras": {}}
+        if turn.get("tool_call"):
+            call = turn["tool_call"]
+            yield {
+                "type": "tool_call",
+                "name": call["name"],
+                "args": call.get("args", {}),
+                "id": call.get("id") or f"mock_call_{hashlib.sha1(json.dumps(call, sort_keys=True).encode()).hexdigest()[:12]}",
+            }
+
+    def _delays(self) -> Iterator[float]:
+        yield self.time_to_first_token
+        gap = 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0
+        while True:
+            yield gap
+
+    def _generate(
+        self,
+        prompt: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = ""
+        reasoning = ""
+        tool_call = None
+        for block, delay in zip(self._blocks(prompt, **kwargs), self._delays()):
+            time.sleep(delay)
+            if block["type"] == "text":
+                text += block["text"]
+            elif block["type"] == "reasoning":
+                reasoning += block["reasoning"]
+            else:
+                tool_call = block
+        blocks = []
+        if reasoning:
+            blocks.append({"type": "reasoning", "reasoning": reasoning.strip()})
+        if tool_call:
+            blocks.append(tool_call)
+        else:
+            blocks.append({"type": "text", "text": text.strip()})
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content_blocks=blocks))])
+
+    def _stream(
+        self,
+        prompt: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        for block, delay in zip(self._blocks(prompt, **kwargs), self._delays()):
+            time.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content_blocks=[block]))
+
+    async def _astream(
+        self,
+        prompt: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        for block, delay in zip(self._blocks(prompt, **kwargs), self._delays()):
+            # Yield to the loop even without a delay, like a network stream would
+            await asyncio.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content_blocks=[block]))
+
+    def bind_tools(
+        self,
+        tools: Sequence[Union[dict[str, Any], type, Callable, BaseTool]],
+        *,
+        tool_choice: Optional[
+            Union[dict, str, Literal["auto", "none", "required", "any"], bool]
+        ] = None,
+        strict: Optional[bool] = None,
+        **kwargs: Any,
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        kwargs["tools"] = [convert_to_openai_tool(tool, strict=strict) for tool in tools]
+        return super().bind(**kwargs)
+
+    def list_models(self):
+        return "mock-chat"
+
+    def list_parameters(self):
+        return f"""
+        model_id: {self.model_name}
+        time_to_first_token: {self.time_to_first_token}
+        tokens_per_second: {self.tokens_per_second}
+        response_tokens: {self.response_tokens}
+        """
+
+    def set_parameters(self, name, value) -> str:
+        if name == "model_id" or name == "model":
+            self.model_name = str(value)
+            return f"Model set to {self.model_name}"
+        elif name in ["time_to_first_token", "tokens_per_second"]:
+            setattr(self, name, float(value))
+            return f"{name} set to {value}"
+        elif name in ["response_tokens", "reasoning_tokens", "tool_calls"]:
+            setattr(self, name, int(value))
+            return f"{name} set to {value}"
+        else:
+            output_log(f"Invalid parameter: {name}", "error")
+            return f"Invalid parameter: {name}, {value}"
+
+    @property
+    def _llm_type(self) -> str:
+        return "Mock"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {
+            "model_name": self.model_name,
+            "time_to_first_token": self.time_to_first_token,
+            "tokens_per_second": self.tokens_per_second,
+        }
@@ -52,7 +52,7 @@ class CustomOpenAICompletion(BaseChatModel):
         self, prompt: List[BaseMessage], streaming: bool, **kwargs: Any
     ) -> Dict[str, Any]:
         prompt_translated = self._prompt_translate(prompt)
-        output_log(f"Translated prompt: {prompt_translated}", "debug")
+        output_log("Translated prompt: %s", "debug", prompt_translated)
         request_params = {
             "model": self.model_name,
             "messages": prompt_translated,
@@ -165,7 +165,7 @@ class CustomOpenAICompletion(BaseChatModel):
         tool_calls_args = ""
         tool_calls_id = ""
         for event in stream:
-            output_log(f"Received event: {event}", "debug")
+            output_log("Received event: %s", "debug", event)
             choice = event.choices[0]
             token = choice.delta
             if getattr(token, "tool_calls", None):
@@ -50,7 +50,7 @@ class CustomOpenAIResponse(BaseChatModel):
         self, prompt: List[BaseMessage], streaming: bool = False, **kwargs
     ) -> Dict[str, Any]:
         prompt_translated = self._prompt_translate(prompt)
-        output_log(f"Translated prompt: {prompt_translated}", "debug")
+        output_log("Translated prompt: %s", "debug", prompt_translated)
         request_params = {
             "model": self.model_name,
             "input": prompt_translated,
@@ -46,7 +46,7 @@ class CustomOpenRouterCompletion(BaseChatModel):
         self, prompt: List[BaseMessage], streaming: bool, **kwargs: Any
     ) -> Dict[str, Any]:
         prompt_translated = self._prompt_translate(prompt)
-        output_log(f"Translated prompt: {prompt_translated}", "debug")
+        output_log("Translated prompt: %s", "debug", prompt_translated)
         request_params = {
             "model": self.model_name,
             "messages": prompt_translated,
@@ -143,7 +143,7 @@ class CustomOpenRouterCompletion(BaseChatModel):
         tool_calls_args = ""
         tool_calls_id = ""
         for event in stream:
-            output_log(f"Received event: {event}", "debug")
+            output_log("Received event: %s", "debug", event)
             if not event.choices or len(event.choices) == 0:
                 continue
             choice = event.choices[0]
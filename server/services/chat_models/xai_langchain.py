@@ -46,7 +46,7 @@ class CustomXAIResponse(BaseChatModel):
         self, prompt: List[BaseMessage], **kwargs
     ) -> Dict[str, Any]:
         prompt_translated = self._prompt_translate(prompt)
-        output_log(f"Translated prompt: {prompt_translated}", "debug")
+        output_log("Translated prompt: %s", "debug", prompt_translated)
         request_params = {
             "model": self.model_name,
             "messages": prompt_translated,
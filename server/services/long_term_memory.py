@@ -0,0 +1,245 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from langchain_core.messages import HumanMessage
+from sqlalchemy import text
+from config.config import config
+from utils.log import output_log
+from utils.mysql_connect import MysqlConnect
+from utils.http_client import close_http_clients
+from utils.redis import redis_cache
+from services.memory_summary import _message_text, _release_lock
+from services.prompt_generator import invalidate_system_prompt
+from services.redis_service import get_table_record, update_table_record
+import asyncio
+import json
+import threading
+import uuid
+
+# Hash of user name -> id of the last chat whose facts were extracted
+LT_MEMORY_WATERMARK_KEY = "lt_memory:watermark"
+# Held by the instance running a scheduled pass so replicas do not duplicate it
+LT_MEMORY_LOCK_KEY = "lt_memory:lock"
+
+_EXTRACT_PROMPT = """Extract important information about the user from the following conversations for long-term memory. Output the information as a list separated by ";".
+Sample1:
+Input: Human: Using python with uv to develop a web server, what should I do?
+Output: User prefer python; User want to use uv for python package management;
+Sample2:
+Input: Human: answer this question in actuarial science?
+Output:
+(No record for sample 2 since it's not important information in the conversation)
+ONLY RECORD OBVIOUS and IMPORTANT INFORMATION. DO NOT RECORD EVERY DETAIL. DO NOT REPEAT WHAT IS ALREADY KNOWN. IF THE CONVERSATION IS NOT IMPORTANT, OUTPUT NOTHING.
+Already known about the user:
+{known}
+Conversations:
+{conversations}"""
+
+# Users with chats newer than their watermark, within the lookback window
+_PENDING_USERS_QUERY = text("""
+    SELECT user_name, MAX(id) AS last_chat_id
+    FROM chat
+    WHERE created_at >= :since
+    GROUP BY user_name
+""")
+
+
+def _since() -> datetime:
+    return datetime.now() - timedelta(hours=config.lt_memory_lookback_hours)
+
+
+def _watermarks() -> Dict[str, int]:
+    return {user: int(chat_id) for user, chat_id in redis_cache.client.hgetall(LT_MEMORY_WATERMARK_KEY).items()}
+
+
+def _fact_key(fact: str) -> str:
+    return " ".join(fact.lower().split()).rstrip(".")
+
+
+def merge_facts(existing: List[str], new: List[str], limit: int) -> List[str]:
+    """Append new facts that are not already known, keeping the newest ``limit``."""
+    merged = []
+    seen = set()
+    for fact in existing + new:
+        fact = fact.strip()
+        key = _fact_key(fact)
+        if key and key not in seen:
+            seen.add(key)
+            merged.append(fact)
+    return merged[-limit:]
+
+
+def parse_facts(output: str) -> List[str]:
+    return [fact.strip() for fact in output.replace("\r", "").replace("\n", ";").split(";") if fact.strip()]
+
+
+def _known_facts(user_name: str) -> List[str]:
+    user = get_table_record("user", user_name)
+    if not user or not user.get("long_term_memory"):
+        return []
+    try:
+        return json.loads(user["long_term_memory"])
+    except json.JSONDecodeError:
+        return []
+
+
+def _pending_chats(mysql: MysqlConnect, user_name: str, watermark: Optional[int]) -> List[dict]:
+    conditions = {"user_name": user_name, "created_at>=": _since()}
+    if watermark is not None:
+        conditions["id>"] = watermark
+    chats = sorted(mysql.read_records("chat", conditions), key=lambda chat: chat["id"])
+    return chats[: config.lt_memory_max_chats]
+
+
+async def _extract(user_name: str, known: List[str], chats: List[dict]) -> List[str]:
+    from services.peng_agent import PengAgent, AgentState
+
+    agent = PengAgent(user_name, config.default_operator, config.default_base_model, [])
+    prompt = _EXTRACT_PROMPT.format(
+        known="; ".join(known) or "(nothing yet)",
+        conversations="\n\n".join(f"Human: {chat['human_input']}" for chat in chats),
+    )
+    response = await agent.ainvoke(AgentState(messages=[HumanMessage(prompt)]))
+    return parse_facts(_message_text(response["messages"][-1]))
+
+
+async def extract_user_memory(user_name: str, watermark: Optional[int] = None) -> int:
+    """Fold facts from a user's chats after ``watermark`` into their long-term memory.
+
+    Without a watermark the chats of the lookback window are read. Returns the
+    number of new facts stored.
+    """
+    if watermark is None:
+        stored = await asyncio.to_thread(redis_cache.client.hget, LT_MEMORY_WATERMARK_KEY, user_name)
+        watermark = int(stored) if stored else None
+    mysql = MysqlConnect()
+    chats = await asyncio.to_thread(_pending_chats, mysql, user_name, watermark)
+    if not chats:
+        return 0
+    known = await asyncio.to_thread(_known_facts, user_name)
+    facts = await _extract(user_name, known, chats)
+    merged = merge_facts(known, facts, config.lt_memory_max_facts)
+    added = len([fact for fact in merged if fact not in known])
+    if merged != known:
+        await asyncio.to_thread(
+            update_table_record,
+            "user",
+            {"long_term_memory": json.dumps(merged)},
+            {"user_name": user_name},
+            "user_name",
+        )
+        invalidate_system_prompt(user_name)
+    await asyncio.to_thread(redis_cache.client.hset, LT_MEMORY_WATERMARK_KEY, user_name, chats[-1]["id"])
+    output_log(f"Long-term memory for {user_name}: {added} new facts from {len(chats)} chats", "debug")
+    return added
+
+
+def pending_users() -> Dict[str, Optional[int]]:
+    """Map users with unprocessed chats to their current watermark."""
+    watermarks = _watermarks()
+    mysql = MysqlConnect()
+    with mysql.get_session() as session:
+        rows = session.execute(_PENDING_USERS_QUERY, {"since": _since()}).fetchall()
+    return {
+        row.user_name: watermarks.get(row.user_name)
+        for row in rows
+        if row.last_chat_id > watermarks.get(row.user_name, 0)
+    }
+
+
+async def run_extraction() -> int:
+    """Process every user with new chats, ``lt_memory_concurrency`` at a time."""
+    users = await asyncio.to_thread(pending_users)
+    semaphore = asyncio.Semaphore(config.lt_memory_concurrency)
+
+    async def extract(user_name, watermark):
+        async with semaphore:
+            try:
+                return await extract_user_memory(user_name, watermark)
+            except Exception as e:
+                output_log(f"Long-term memory extraction failed for {user_name}: {e}", "error")
+                return 0
+
+    added = await asyncio.gather(*[extract(user, watermark) for user, watermark in users.items()])
+    output_log(f"Long-term memory pass: {sum(added)} new facts for {len(users)} users", "info")
+    return len(users)
+
+
+class LongTermMemoryScheduler:
+    """Background thread running an extraction pass every ``lt_memory_interval`` seconds."""
+
+    def __init__(self):
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="lt-memory-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def run_once(self, loop=None) -> bool:
+        """Run a pass unless another instance holds the lock; return whether it ran.
+
+        The scheduler thread passes its long-lived loop so pooled HTTP clients,
+        which belong to the loop that created them, are reused across passes.
+        """
+        if loop is None:
+            return asyncio.run(self._run_and_close())
+        return loop.run_until_complete(self._locked_pass())
+
+    async def _run_and_close(self) -> bool:
+        try:
+            return await self._locked_pass()
+        finally:
+            await close_http_clients()
+
+    async def _locked_pass(self) -> bool:
+        token = uuid.uuid4().hex
+        if not await asyncio.to_thread(
+            redis_cache.client.set, LT_MEMORY_LOCK_KEY, token, nx=True, ex=config.lt_memory_interval
+        ):
+            return False
+        refresher = asyncio.create_task(self._refresh_lock(token))
+        try:
+            await run_extraction()
+        finally:
+            refresher.cancel()
+            await asyncio.to_thread(_release_lock, LT_MEMORY_LOCK_KEY, token)
+        return True
+
+    async def _refresh_lock(self, token: str) -> None:
+        # Keep the lock while a pass outlasts the interval so no replica starts another
+        while True:
+            await asyncio.sleep(max(config.lt_memory_interval / 3, 1))
+            try:
+                if await asyncio.to_thread(redis_cache.client.get, LT_MEMORY_LOCK_KEY) != token:
+                    return
+                await asyncio.to_thread(
+                    redis_cache.client.expire, LT_MEMORY_LOCK_KEY, config.lt_memory_interval
+                )
+            except Exception as e:
+                output_log(f"Failed to refresh long-term memory lock: {e}", "warning")
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        try:
+            while not self._stop.wait(config.lt_memory_interval):
+                try:
+                    self.run_once(loop)
+                except Exception as e:
+                    output_log(f"Long-term memory scheduler error: {str(e)}", "error")
+        finally:
+            loop.run_until_complete(close_http_clients())
+            loop.close()
+
+
+lt_memory_scheduler = LongTermMemoryScheduler()
@@ -0,0 +1,174 @@
+from langchain_core.messages import HumanMessage, SystemMessage
+from config.config import config
+from utils.log import output_log
+from utils.mysql_connect import MysqlConnect
+from utils.redis import redis_cache
+import services.prompt_generator as prompt_generator
+import asyncio
+import json
+import redis
+import uuid
+
+_SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an AI assistant.
+Fold the new turns into the existing summary. Keep facts, decisions, open questions, names, numbers and code identifiers the assistant may need later. Drop greetings and repetition. Write plain prose, at most {max_words} words.
+
+Existing summary:
+{summary}
+
+New turns:
+{turns}"""
+
+# Held while a refresh runs so replicas do not summarize the same turns twice
+_REFRESH_LOCK_TTL = 300
+
+# The event loop only keeps weak references to tasks
+_background_tasks = set()
+
+
+def _summary_key(user_name: str, older: list) -> str:
+    # A conversation only grows at the end, so its first turn identifies it
+    return f"memory_summary:{user_name}:{older[0]}"
+
+
+def split_memory(short_term_memory: list, window: int):
+    """Split turns into those folded into the summary and the last ``window`` kept verbatim."""
+    if window <= 0:
+        return list(short_term_memory), []
+    return list(short_term_memory[:-window]), list(short_term_memory[-window:])
+
+
+def load_summary(user_name: str, older: list) -> dict:
+    """Return the stored summary if it covers a prefix of ``older``."""
+    empty = {"chat_ids": [], "summary": ""}
+    if not older:
+        return empty
+    try:
+        payload = redis_cache.client.get(_summary_key(user_name, older))
+    except redis.RedisError as e:
+        output_log(f"Memory summary cache unavailable: {e}", "warning")
+        return empty
+    if not payload:
+        return empty
+    stored = json.loads(payload)
+    if older[:len(stored["chat_ids"])] != stored["chat_ids"]:
+        # The user picked a different set of earlier turns
+        return empty
+    return stored
+
+
+def add_summarized_memory_to_prompt(short_term_memory, window, mysql_conn, model_name, user_name) -> list:
+    """Replay the summary of older turns followed by the remaining turns verbatim.
+
+    Turns that aged out after the stored summary was computed are replayed
+    verbatim until the background refresh folds them in, so the hot path never
+    waits for the LLM.
+    """
+    if not isinstance(short_term_memory, list) or not short_term_memory:
+        return []
+    older, _ = split_memory(short_term_memory, window)
+    stored = load_summary(user_name, older)
+    result = []
+    if stored["summary"]:
+        result.append(SystemMessage(f"Summary of the earlier conversation with the user:\n{stored['summary']}"))
+    result += prompt_generator.add_short_term_memory_to_prompt(
+        short_term_memory[len(stored["chat_ids"]):], mysql_conn, model_name, user_name
+    )
+    return result
+
+
+def _render_turns(chat_ids: list) -> str:
+    mysql = MysqlConnect()
+    fragments = prompt_generator._load_fragments(chat_ids, mysql)
+    turns = []
+    for chat_id in chat_ids:
+        fragment = fragments.get(chat_id)
+        if fragment is None:
+            continue
+        if fragment["input"]:
+            turns.append(f"User: {fragment['input']}")
+        turns += [f"Assistant: {response}" for response in fragment["responses"]]
+    return "\n\n".join(turns)
+
+
+def _message_text(message) -> str:
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else str(block)
+        for block in message.content
+    )
+
+
+async def _summarize(user_name: str, summary: str, turns: str) -> str:
+    from services.peng_agent import PengAgent, AgentState
+
+    agent = PengAgent(user_name, config.default_operator, config.default_base_model, [])
+    prompt = _SUMMARY_PROMPT.format(
+        max_words=config.memory_summary_max_words,
+        summary=summary or "(none yet)",
+        turns=turns,
+    )
+    response = await agent.ainvoke(AgentState(messages=[HumanMessage(prompt)]))
+    return _message_text(response["messages"][-1]).strip()
+
+
+async def refresh_summary(user_name: str, short_term_memory: list, window: int) -> None:
+    """Fold turns that aged out of the verbatim window into the stored summary."""
+    older, _ = split_memory(short_term_memory or [], window)
+    if not older:
+        return
+    key = _summary_key(user_name, older)
+    lock_key = f"{key}:lock"
+    token = uuid.uuid4().hex
+    try:
+        if not await asyncio.to_thread(
+            redis_cache.client.set, lock_key, token, nx=True, ex=_REFRESH_LOCK_TTL
+        ):
+            return
+    except redis.RedisError as e:
+        output_log(f"Memory summary cache unavailable: {e}", "warning")
+        return
+    try:
+        stored = await asyncio.to_thread(load_summary, user_name, older)
+        new_turns = older[len(stored["chat_ids"]):]
+        if not new_turns:
+            return
+        turns = await asyncio.to_thread(_render_turns, new_turns)
+        summary = await _summarize(user_name, stored["summary"], turns) if turns else stored["summary"]
+        if not summary:
+            return
+        await asyncio.to_thread(
+            redis_cache.client.set,
+            key,
+            json.dumps({"chat_ids": older, "summary": summary}, separators=(",", ":")),
+            ex=config.memory_summary_ttl,
+        )
+        output_log(f"Updated memory summary {key} through chat {older[-1]}", "debug")
+    except Exception as e:
+        output_log(f"Failed to refresh memory summary {key}: {e}", "error")
+    finally:
+        await asyncio.to_thread(_release_lock, lock_key, token)
+
+
+def _release_lock(lock_key: str, token: str) -> None:
+    try:
+        # Leave the lock alone if it expired and another refresh took it
+        if redis_cache.client.get(lock_key) == token:
+            redis_cache.client.delete(lock_key)
+    except redis.RedisError as e:
+        output_log(f"Failed to release memory summary lock {lock_key}: {e}", "warning")
+
+
+def schedule_summary_refresh(user_name: str, chat_config) -> None:
+    """Start a background refresh for a summary-mode chat; a no-op otherwise."""
+    if chat_config.memory_mode != "summary" or not chat_config.short_term_memory:
+        return
+    task = asyncio.create_task(
+        refresh_summary(user_name, chat_config.short_term_memory, memory_window(chat_config))
+    )
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def memory_window(chat_config) -> int:
+    return chat_config.memory_window if chat_config.memory_window is not None else config.memory_summary_window
@@ -15,7 +15,10 @@ from langgraph.graph.message import add_messages
 from langgraph.config import get_stream_writer
 from config.config import config
 from utils.log import output_log
-import os
+from utils.metrics import MODEL_CALL_SECONDS, TOOL_CALL_SECONDS, TOOL_TRUNCATION_SECONDS
+from services.prompt_templates import get_template
+import time
+import uuid
 
 
 class AgentState(TypedDict):
@@ -40,6 +43,8 @@ class PengAgent:
         self.graph = self.init_agent_graph()
         self.tool_call_history: list[ToolCall] = []
         self.total_tool_calls = 25 if operater == "anthropic" else 10
+        # Identifies this run to tools that keep state across calls
+        self.run_id = str(uuid.uuid4())
 
     def init_agent_graph(self) -> Any:
         graph = StateGraph(AgentState)
@@ -70,9 +75,10 @@ class PengAgent:
 
     async def ainvoke(self, state: AgentState) -> Any:
         await self._ensure_tools()
-        return await self.graph.ainvoke(
-            state, {"recursion_limit": (self.total_tool_calls + 1) * 2}
-        )
+        try:
+            return await self.graph.ainvoke(state, self._run_config())
+        finally:
+            await self.release_tools()
 
     async def truncate_tool_message(self, observation: str) -> str:
         if self.operator in ["gemini", "grok", "openai_response", "anthropic"]:
@@ -81,19 +87,18 @@ class PengAgent:
             max_length = 200000 * 0.7 / self.total_tool_calls
         output_log(f"Truncating tool message if exceeds {int(max_length)} characters. Current length: {len(observation)} characters.", "DEBUG")
         if len(observation) > max_length:
-            from handlers.chat_handlers import chat_completions_handler
+            from handlers.chat_handlers import internal_completion
             from models.chat_config import ChatConfig
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            with open(os.path.join(current_dir, "prompts/tool_truncate.md"), "r") as f:
-                prompt = f.read().format(observation=observation, max_length=int(max_length))
+            prompt = get_template("tool_truncate.md").format(observation=observation, max_length=int(max_length))
             chat_config = ChatConfig(
                 operator=config.default_operator,
                 base_model=config.default_base_model,
             )
             try:
-                truncated_observation = await chat_completions_handler(
-                    self.user_name, prompt, None, None, chat_config
-                )
+                with TOOL_TRUNCATION_SECONDS.time():
+                    truncated_observation = await internal_completion(
+                        self.user_name, prompt, None, None, chat_config
+                    )
                 truncated_observation = truncated_observation[-1].content[0]["text"].strip()
                 return truncated_observation
             except Exception:
@@ -103,17 +108,36 @@ class PengAgent:
 
     async def astream(self, state: AgentState) -> AsyncGenerator[Any, None]:
         await self._ensure_tools()
-        async for chunk in self.graph.astream(
-            state,
-            stream_mode="custom",
-            config={"recursion_limit": (self.total_tool_calls + 1) * 2},
-        ):
-            yield chunk
+        try:
+            async for chunk in self.graph.astream(
+                state,
+                stream_mode="custom",
+                config=self._run_config(),
+            ):
+                yield chunk
+        finally:
+            await self.release_tools()
+
+    def _run_config(self) -> dict:
+        return {
+            "recursion_limit": (self.total_tool_calls + 1) * 2,
+            "configurable": {"run_id": self.run_id},
+        }
+
+    async def release_tools(self) -> None:
+        if not self._tools_input:
+            return
+        from services.tools.tools_routers import release_tool_sessions
+
+        try:
+            await release_tool_sessions(self.run_id)
+        except Exception as e:
+            output_log(f"Error releasing tool sessions for run {self.run_id}: {e}", "error")
 
     async def call_model(self, state: AgentState):
         from handlers.model_utils import get_model_instance
 
-        output_log(f"Node: Call Model. Current state {state}", "DEBUG")
+        output_log("Node: Call Model. Current state %s", "DEBUG", state)
         writer = get_stream_writer()
         await self._ensure_tools()
         if not hasattr(self, "_llm_instance") or self._llm_instance is None:
@@ -126,15 +150,16 @@ class PengAgent:
         final_response = ""
         final_reasoning = ""
         tool_calls = ""
-        async for chunk in llm.astream(state["messages"]):
-            if isinstance(chunk, AIMessage) and chunk.content_blocks:
-                writer({"call_model": {"messages": chunk.content_blocks[0]}})
-                if chunk.content_blocks[0]["type"] == "text":
-                    final_response += chunk.content_blocks[0]["text"]
-                elif chunk.content_blocks[0]["type"] == "reasoning":
-                    final_reasoning += chunk.content_blocks[0]["reasoning"]
-                elif chunk.content_blocks[0]["type"] == "tool_call":
-                    tool_calls = chunk
+        with MODEL_CALL_SECONDS.time(operator=self.operator, model=self.model):
+            async for chunk in llm.astream(state["messages"]):
+                if isinstance(chunk, AIMessage) and chunk.content_blocks:
+                    writer({"call_model": {"messages": chunk.content_blocks[0]}})
+                    if chunk.content_blocks[0]["type"] == "text":
+                        final_response += chunk.content_blocks[0]["text"]
+                    elif chunk.content_blocks[0]["type"] == "reasoning":
+                        final_reasoning += chunk.content_blocks[0]["reasoning"]
+                    elif chunk.content_blocks[0]["type"] == "tool_call":
+                        tool_calls = chunk
         if final_response != "":
             final_response = AIMessage(
                 content_blocks=[
@@ -156,7 +181,7 @@ class PengAgent:
         return {"messages": [response for response in [final_reasoning, final_response, tool_calls] if response != ""]}
 
     async def call_tools(self, state: AgentState):
-        output_log(f"Node: Call Tools. Current state {state}", "DEBUG")
+        output_log("Node: Call Tools. Current state %s", "DEBUG", state)
         writer = get_stream_writer()
         self.total_tool_calls -= 1
         last_message = list(state["messages"])[-1]
@@ -213,10 +238,14 @@ class PengAgent:
                 )
             }
         tool = self.tools[name]
+        status = "ok"
+        start = time.perf_counter()
         try:
             observation = await tool.ainvoke(args)
         except Exception as e:
+            status = "error"
             observation = f"Error calling tool '{name}': {e}"
+        TOOL_CALL_SECONDS.observe(time.perf_counter() - start, tool=name, status=status)
         if isinstance(observation, list):
             observation = "\n".join(observation)
         observation = await self.truncate_tool_message(observation.strip())
@@ -236,7 +265,7 @@ class PengAgent:
         return {"messages": message}
 
     def should_continue(self, state: AgentState) -> str:
-        output_log(f"Node: Should Continue. Current state {state}", "DEBUG")
+        output_log("Node: Should Continue. Current state %s", "DEBUG", state)
         last_message = list(state["messages"])[-1]
         if (
             isinstance(last_message, AIMessage)
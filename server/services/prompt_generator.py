@@ -5,18 +5,38 @@ from langchain_core.messages import (
     AIMessage,
 )
 from utils.minio_connection import MinioStorage
+from services.prompt_templates import get_template, on_reload
+from services.redis_service import get_table_record
 from utils.log import output_log
+from utils.metrics import CHAT_STAGE_SECONDS
+from utils.redis import redis_cache
+from config.config import config
+from collections import OrderedDict
+from typing import Optional, Tuple
 import base64
+import hashlib
 import json
-import os
-
-def system_prompt(user_name, mysql_conn):
-    user_profile = mysql_conn.read_records("user", conditions={"user_name": user_name})
-    system_prompt = str(user_profile[0]["system_prompt"]) if user_profile and "system_prompt" in user_profile[0] else "You are a helpful assistant."
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    with open(os.path.join(current_dir, "prompts/markdown_format.md"), "r") as f:
-        markdown_format = f.read()
-    lt_mem = json.loads(user_profile[0]["long_term_memory"]) if user_profile and "long_term_memory" in user_profile[0] and user_profile[0]["long_term_memory"] else []
+import redis
+import threading
+
+# user_name -> (profile digest, compiled system messages)
+_system_prompts: "OrderedDict[str, Tuple[str, list]]" = OrderedDict()
+_system_prompts_lock = threading.Lock()
+
+
+def invalidate_system_prompt(user_name: Optional[str] = None) -> None:
+    """Drop the compiled prompt of one user, or of everyone."""
+    with _system_prompts_lock:
+        if user_name is None:
+            _system_prompts.clear()
+        else:
+            _system_prompts.pop(user_name, None)
+
+
+def _compile_system_prompt(user_profile) -> list:
+    system_prompt = (user_profile or {}).get("system_prompt") or "You are a helpful assistant."
+    markdown_format = get_template("markdown_format.md")
+    lt_mem = json.loads(user_profile["long_term_memory"]) if user_profile and user_profile.get("long_term_memory") else []
     lt_mem_str = ";".join(lt_mem) if lt_mem != [] else "No background information about the user."
     return [
         SystemMessage(system_prompt + markdown_format),
@@ -24,53 +44,144 @@ def system_prompt(user_name, mysql_conn):
     ]
 
 
-def add_short_term_memory_to_prompt(short_term_memory, mysql_conn, model_name, user_name) -> list:
-    result = []
-    if isinstance(short_term_memory, list) and short_term_memory:
-        reasonings_list = mysql_conn.read_records("ai_reasoning", conditions={"chat_id": short_term_memory})
-        responses_list = mysql_conn.read_records("ai_response", conditions={"chat_id": short_term_memory})
-        user_input_list = mysql_conn.read_records("user_input", conditions={"chat_id": short_term_memory})
+def _profile_digest(user_profile) -> str:
+    # Hash what the prompt is built from; timestamps only resolve to the second
+    if not user_profile:
+        return ""
+    content = "\0".join(str(user_profile.get(field) or "") for field in ("system_prompt", "long_term_memory"))
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
 
-        # Sort by id to ensure deterministic order (assuming id is auto-incrementing)
-        reasonings_list.sort(key=lambda x: x["id"])
-        responses_list.sort(key=lambda x: x["id"])
-        user_input_list.sort(key=lambda x: x["id"])
 
-        reasonings_map = {}
-        for r in reasonings_list:
-            reasonings_map.setdefault(r["chat_id"], []).append(r)
+def system_prompt(user_name):
+    """Return the user's system messages, compiled once per profile content.
 
-        responses_map = {}
-        for r in responses_list:
-            responses_map.setdefault(r["chat_id"], []).append(r)
+    The profile comes from the Redis user cache and is keyed by a digest of the
+    fields the prompt is built from, so edits made through any worker are
+    picked up.
+    """
+    if config.prompt_template_reload:
+        # Fires the reload listener below when the template changed on disk
+        get_template("markdown_format.md")
+    user_profile = get_table_record("user", user_name)
+    version = _profile_digest(user_profile)
+    with _system_prompts_lock:
+        entry = _system_prompts.get(user_name)
+        if entry is not None and entry[0] == version:
+            _system_prompts.move_to_end(user_name)
+            return list(entry[1])
+    compiled = _compile_system_prompt(user_profile)
+    with _system_prompts_lock:
+        _system_prompts[user_name] = (version, compiled)
+        _system_prompts.move_to_end(user_name)
+        while len(_system_prompts) > config.system_prompt_cache_size:
+            _system_prompts.popitem(last=False)
+    return list(compiled)
 
-        user_input_map = {}
-        for r in user_input_list:
-            user_input_map.setdefault(r["chat_id"], []).append(r)
 
-        for msg_id in short_term_memory:
-            reasonings = reasonings_map.get(msg_id, [])
-            responses = responses_map.get(msg_id, [])
-            user_inputs = user_input_map.get(msg_id, [])
+# Every compiled prompt embeds the markdown format template
+on_reload(lambda name: invalidate_system_prompt())
+
+
+def _fragment_key(chat_id) -> str:
+    return f"prompt_fragment:{chat_id}"
+
+
+def _build_fragments(chat_ids, mysql_conn) -> dict:
+    """Read finished turns from MySQL into model-independent fragments."""
+    reasonings_list = mysql_conn.read_records("ai_reasoning", conditions={"chat_id": chat_ids})
+    responses_list = mysql_conn.read_records("ai_response", conditions={"chat_id": chat_ids})
+    user_input_list = mysql_conn.read_records("user_input", conditions={"chat_id": chat_ids})
+
+    # Sort by id to ensure deterministic order (assuming id is auto-incrementing)
+    reasonings_list.sort(key=lambda x: x["id"])
+    responses_list.sort(key=lambda x: x["id"])
+    user_input_list.sort(key=lambda x: x["id"])
+
+    fragments = {
+        chat_id: {"input": "", "images": [], "reasoning": [], "responses": []}
+        for chat_id in chat_ids
+    }
+    seen_input = set()
+    for r in user_input_list:
+        if r["chat_id"] in seen_input:
+            continue
+        seen_input.add(r["chat_id"])
+        fragments[r["chat_id"]]["input"] = r["input_content"] or ""
+        fragments[r["chat_id"]]["images"] = r["input_location"].split("|") if r["input_location"] else []
+    for r in reasonings_list:
+        fragments[r["chat_id"]]["reasoning"].append(r["reasoning_process"])
+    for r in responses_list:
+        fragments[r["chat_id"]]["responses"].append(r["ai_response"])
+    return fragments
+
+
+def _load_fragments(chat_ids, mysql_conn) -> dict:
+    """Fetch turn fragments with one Redis MGET, falling back to MySQL for misses.
+
+    Finished turns never change, so every fragment with a response is cached.
+    Images are kept as S3 references and resolved through the object cache.
+    """
+    fragments = {}
+    try:
+        cached = redis_cache.client.mget([_fragment_key(chat_id) for chat_id in chat_ids])
+        fragments = {chat_id: json.loads(payload) for chat_id, payload in zip(chat_ids, cached) if payload}
+    except redis.RedisError as e:
+        output_log(f"Prompt fragment cache unavailable: {e}", "warning")
+    missing = [chat_id for chat_id in chat_ids if chat_id not in fragments]
+    if not missing:
+        return fragments
+
+    built = _build_fragments(missing, mysql_conn)
+    fragments.update(built)
+    try:
+        pipe = redis_cache.client.pipeline()
+        for chat_id, fragment in built.items():
+            # A turn without a response may still be in progress
+            if fragment["responses"]:
+                pipe.set(
+                    _fragment_key(chat_id),
+                    json.dumps(fragment, separators=(",", ":")),
+                    ex=config.prompt_fragment_ttl,
+                )
+        pipe.execute()
+    except redis.RedisError as e:
+        output_log(f"Failed to cache prompt fragments: {e}", "warning")
+    return fragments
+
+
+def add_short_term_memory_to_prompt(short_term_memory, mysql_conn, model_name, user_name) -> list:
+    result = []
+    if isinstance(short_term_memory, list) and short_term_memory:
+        fragments = _load_fragments(short_term_memory, mysql_conn)
 
-            if user_inputs:
-                user_input = user_inputs[0]
-                result += add_human_message_to_prompt(user_input["input_content"]) if user_input["input_content"] else []
-                result += add_image_to_prompt(model_name, user_name, user_input["input_location"]) if user_input["input_location"] else []
+        images = {}
+        if check_multimodal(model_name):
+            # One concurrent download for every image in the conversation
+            images = _download_images(
+                [image for fragment in fragments.values() for image in fragment["images"]],
+                user_name,
+            )
 
-            if reasonings:
+        for msg_id in short_term_memory:
+            fragment = fragments.get(msg_id)
+            if fragment is None:
+                continue
+            result += add_human_message_to_prompt(fragment["input"]) if fragment["input"] else []
+            if images and fragment["images"]:
+                result += _image_message(fragment["images"], images)
+            if fragment["reasoning"]:
                 result.append(AIMessage(content_blocks=[
                     {
                         "type": "reasoning",
-                        "reasoning": reasoning["reasoning_process"],
+                        "reasoning": reasoning,
 
                     }
-                    for reasoning in reasonings
+                    for reasoning in fragment["reasoning"]
                 ]))
-            for response in responses:
-                result.append(AIMessage(response["ai_response"]))
+            for response in fragment["responses"]:
+                result.append(AIMessage(response))
 
-    output_log(f"Short-term memory added to prompt: {result}", "debug")
+    output_log("Short-term memory added to prompt: %s", "debug", result)
     return result
 
 
@@ -87,37 +198,30 @@ def add_knowledge_base_to_prompt(knowledge_base, message) -> list[SystemMessage]
         from services.rag.rag_usage import RagUsage
 
         rag = RagUsage(collection_name=knowledge_base)
-        result = rag.similarity_search(message, k=5, score_threshold=0.3)
+        with CHAT_STAGE_SECONDS.time(stage="rag_retrieval"):
+            result = rag.similarity_search(message, k=5, score_threshold=0.3)
         context = "\n\n".join([doc.page_content for doc in result])
         return [SystemMessage(f"Knowledge Base Context:\n{context}")]
     return []
 
 
-def _download_image_to_base64(image, user_name, mime_type="image/png"):
+def _image_mime_type(image, mime_type="image/png"):
+    # Compute per-image mime_type from file extension
+    file_name = image.split("/")[-1]
+    file_ext = file_name.split('.')[-1]
+    return f"image/{file_ext}" if file_ext else mime_type
+
+
+def _download_images(images, user_name) -> dict:
+    s3_images = list(dict.fromkeys(image for image in images if not image.startswith("data:image")))
+    if not s3_images:
+        return {}
+    # Fetch all referenced objects concurrently instead of one by one
     m = MinioStorage(user_name=user_name)
-    img_data = m.file_download_to_memory(file_name=image)
-    if img_data:
-        # Compute per-image mime_type from file extension
-        file_name = image.split("/")[-1]
-        file_ext = file_name.split('.')[-1]
-        img_mime_type = f"image/{file_ext}" if file_ext else mime_type
-        return {
-            "data": img_data,
-            "mime_type": img_mime_type
-        }
-    return {
-        "data": None,
-        "mime_type": mime_type
-    }
+    return dict(zip(s3_images, m.files_download_to_memory(s3_images, cached=True)))
 
-def add_image_to_prompt(model_name, images, user_name, mime_type="image/png") -> list:
-    if images is None or images == "":
-        return []
 
-    if not isinstance(images, list):
-        images = [images]
-    
-    output_log(f"Adding images to prompt for model {model_name}: {images}", "debug")
+def _image_message(images, downloaded, mime_type="image/png") -> list:
     messages = []
     for image in images:
         if image.startswith("data:image"):
@@ -127,19 +231,33 @@ def add_image_to_prompt(model_name, images, user_name, mime_type="image/png") ->
                 "data": image.split(',')[1].encode("utf-8"),
                 "mime_type": mime_type
             })
-        else:
-            data = _download_image_to_base64(image, user_name=user_name)
-            if data["data"]:
-                messages.append(data)
-    if check_multimodal(model_name) and messages:
-        return [HumanMessage(
-            content_blocks=[
-                {
-                    "type": "image",
-                    "base64": base64.b64encode(msg["data"]),
-                    "mime_type": msg["mime_type"],
-                }
-                for msg in messages
-            ]
-        )]
-    return []
+        elif downloaded.get(image):
+            messages.append({
+                "data": downloaded[image],
+                "mime_type": _image_mime_type(image, mime_type)
+            })
+    if not messages:
+        return []
+    return [HumanMessage(
+        content_blocks=[
+            {
+                "type": "image",
+                "base64": base64.b64encode(msg["data"]),
+                "mime_type": msg["mime_type"],
+            }
+            for msg in messages
+        ]
+    )]
+
+
+def add_image_to_prompt(model_name, images, user_name, mime_type="image/png") -> list:
+    if images is None or images == "":
+        return []
+
+    if not isinstance(images, list):
+        images = [images]
+    
+    output_log("Adding images to prompt for model %s: %s", "debug", model_name, images)
+    if not check_multimodal(model_name):
+        return []
+    return _image_message(images, _download_images(images, user_name), mime_type)
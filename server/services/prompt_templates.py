@@ -0,0 +1,49 @@
+from config.config import config
+from utils.log import output_log
+import os
+import threading
+
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+
+# name -> (mtime, text), read once at import
+_templates = {}
+_templates_lock = threading.Lock()
+_listeners = []
+
+
+def _read(name: str):
+    path = os.path.join(PROMPTS_DIR, name)
+    with open(path, "r") as f:
+        return os.path.getmtime(path), f.read()
+
+
+def load_templates() -> None:
+    with _templates_lock:
+        for name in sorted(os.listdir(PROMPTS_DIR)):
+            if name.endswith(".md"):
+                _templates[name] = _read(name)
+
+
+def on_reload(listener) -> None:
+    """Call ``listener(name)`` whenever a template changes on disk."""
+    _listeners.append(listener)
+
+
+def get_template(name: str) -> str:
+    """Return a prompt template from memory.
+
+    With ``prompt_template_reload`` enabled the file is checked for changes
+    first, which is meant for editing prompts during development.
+    """
+    if config.prompt_template_reload:
+        mtime = os.path.getmtime(os.path.join(PROMPTS_DIR, name))
+        if name not in _templates or _templates[name][0] != mtime:
+            with _templates_lock:
+                _templates[name] = _read(name)
+            output_log(f"Reloaded prompt template {name}", "debug")
+            for listener in _listeners:
+                listener(name)
+    return _templates[name][1]
+
+
+load_templates()
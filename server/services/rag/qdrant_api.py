@@ -3,6 +3,7 @@ from qdrant_client.models import VectorParams, Distance
 from langchain_qdrant import QdrantVectorStore, RetrievalMode
 from handlers.model_utils import get_embedding_instance
 from utils.log import output_log
+from utils.metrics import QDRANT_SECONDS, timed
 from config.config import config
 
 
@@ -51,11 +52,13 @@ class Qdrant:
         )
         return f"Alias {alias_name} added to collection {collection_name}"
 
+    @timed(QDRANT_SECONDS, operation="add_documents")
     def add_documents(self, local_path, chunks):
         self.setup()
         self._remove_document(local_path)
         self.qdrant_vector.add_documents(chunks)
 
+    @timed(QDRANT_SECONDS, operation="add_texts")
     def add_texts(self, local_path, texts):
         self.setup()
         self._remove_document(local_path)
@@ -80,6 +83,7 @@ class Qdrant:
             collection_name=self.collection_name, points_selector=point_filter
         )
 
+    @timed(QDRANT_SECONDS, operation="similarity_search")
     def similarity_search(self, query, k=5, score_threshold=0.65):
         self.setup()
         results = self.qdrant_vector.similarity_search(
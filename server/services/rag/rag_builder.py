@@ -74,20 +74,20 @@ class RagBuilder:
     async def file_process(self, file_path, type_of_file) -> None:
         m = self.minio
         local_path = os.path.join(self.temp_dir, os.path.basename(file_path))
-        m.file_download(file_path, local_path)
+        await m.afile_download(file_path, local_path)
         if type_of_file == "standard":
             chucks = self._pure_text_pdf_process(local_path)
             self.qdrant.add_documents(local_path.split("/")[-1], chucks)
         elif type_of_file == "handwriting":
             chucks = await self._handwriting_pdf_process(local_path)
             self.qdrant.add_texts(local_path.split("/")[-1], chucks)
-        output_log(f"Text chunks: {chucks}", "debug")
+        output_log("Text chunks: %s", "debug", chucks)
         self._add_to_db(local_path, type_of_file, file_path)
         os.remove(local_path)
 
     def text_process(self, local_path, text, file_path, create_by="Text") -> None:
         chunks = self._pure_text_text_process(text)
-        output_log(f"Text chunks: {chunks}", "debug")
+        output_log("Text chunks: %s", "debug", chunks)
         self.qdrant.add_texts(local_path.split("/")[-1], chunks)
         self._add_to_db(local_path, "standard", file_path, create_by)
 
@@ -130,7 +130,7 @@ class RagBuilder:
         return chunks
 
     async def _process_single_image(self, base64_image):
-        from handlers.chat_handlers import chat_completions_handler
+        from handlers.chat_handlers import internal_completion
         from models.chat_config import ChatConfig
 
         prompt = """
@@ -146,7 +146,7 @@ class RagBuilder:
             base_model=config.default_base_model,
         )
         try:
-            orc_result = await chat_completions_handler(
+            orc_result = await internal_completion(
                 user_name=self.user_name,
                 message=prompt,
                 knowledge_base=None,
@@ -165,7 +165,7 @@ class RagBuilder:
         for image in base64_images:
             ocr_result = await self._process_single_image(image)
             results.append(ocr_result)
-        output_log(f"Text chunks: {results}", "debug")
+        output_log("Text chunks: %s", "debug", results)
         combined_text = ""
         for result in results:
             if isinstance(result, list):
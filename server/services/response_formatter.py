@@ -30,5 +30,5 @@ def response_formatter_main(operator: str, response: str):
             response_format = ""
         response_format = response_format.replace("\\[", "\n$").replace("\\]", "$\n")
         response_format = response_format.replace("\\(", "$").replace("\\)", "$")
-    output_log(f"After formatting response: {response_format}", "DEBUG")
+    output_log("After formatting response: %s", "DEBUG", response_format)
     return response_format
@@ -1,63 +1,269 @@
 from langchain_core.tools import StructuredTool
 from utils.minio_connection import MinioStorage
-import tempfile
-from math import exp, log
+from functools import lru_cache
+from io import BytesIO
+import hashlib
+import threading
+import numpy as np
 import pandas as pd
 
+ALTAM_TABLES_PATH = 'peng://Actuarial/ExamALTAM/altam_tables.xlsx'
+GM_MIN_AGE = 20
+GM_MAX_AGE = 110
+RADIX = 100000
+# The SULT follows Makeham's law with these parameters
+SULT_A = 0.00022
+SULT_B = 0.0000027
+SULT_C = 1.124
+
+# Parsed sheets of the ALTAM workbook, keyed by the workbook's content digest
+_altam_lock = threading.Lock()
+_altam_frames = {"digest": None, "service": None, "sult": None}
+
+def _read_altam_tables() -> bytes:
+    data = MinioStorage().file_read_cached(ALTAM_TABLES_PATH)
+    if data is None:
+        raise FileNotFoundError(f"Could not read {ALTAM_TABLES_PATH}")
+    return data
+
+def _parse_altam_tables(data: bytes):
+    with pd.ExcelFile(BytesIO(data)) as xls:
+        df_service = xls.parse('Service Table', header=0, skiprows=4)
+        df_single = xls.parse('Single Life', header=0, skiprows=2)
+        df_joint = xls.parse('Joint Life', header=0, skiprows=2)
+    df = pd.merge(df_single, df_joint, on='x', how='left')
+    df = df.rename(columns={"Unnamed: 6": "äx_10", "Unnamed: 7": "Ax_10", "Unnamed: 8_x": "äx_20", "Unnamed: 9": "Ax_20", "Unnamed: 4": "äxx_10"})
+    df = df.drop(columns=['Unnamed: 13', 'Unnamed: 14', 'Unnamed: 8_y'])
+    return df_service, df
+
+def _altam_table(name: str) -> pd.DataFrame:
+    data = _read_altam_tables()
+    digest = hashlib.sha1(data).hexdigest()
+    with _altam_lock:
+        if _altam_frames["digest"] != digest:
+            _altam_frames["service"], _altam_frames["sult"] = _parse_altam_tables(data)
+            _altam_frames["digest"] = digest
+        return _altam_frames[name]
+
+@lru_cache(maxsize=64)
+def _gm_table(interest: float, A: float, B: float, c: float) -> pd.DataFrame:
+    """Full Gompertz–Makeham table for ages 20-110 with commutation columns.
+
+    The result is shared between callers and must not be modified in place.
+    """
+    x = np.arange(GM_MIN_AGE, GM_MAX_AGE + 1)
+    p_x = np.exp(-A) * np.exp(-(B * c ** x) / np.log(c) * (c - 1))
+    l_x = RADIX * np.concatenate(([1.0], np.cumprod(p_x[:-1])))
+    # Everyone left at the final age dies within the year.
+    d_x = np.append(l_x[:-1] - l_x[1:], l_x[-1])
+    v = (1 + interest) ** -x.astype(float)
+    D_x = v * l_x
+    C_x = v / (1 + interest) * d_x
+    N_x = np.cumsum(D_x[::-1])[::-1]
+    M_x = np.cumsum(C_x[::-1])[::-1]
+    return pd.DataFrame({
+        'x': x,
+        'p_x': p_x,
+        'q_x': 1 - p_x,
+        'l_x': l_x,
+        'd_x': d_x,
+        'D_x': D_x,
+        'N_x': N_x,
+        'C_x': C_x,
+        'M_x': M_x,
+        'a_due_x': N_x / D_x,
+        'A_x': M_x / D_x,
+    })
+
 def actsc_life_table(from_x: int, to_x: int, interest=0.05, A=0.00022, B=0.0000027, c=1.124):
-    def p_x(x):
-        return exp(-A) * exp(- (B * c ** x)/log(c) * (c - 1))
     from_x = max(20, from_x)
     to_x = min(110, to_x)
     if from_x > to_x:
         temp = from_x
         from_x = to_x
         to_x = temp
-    
-    ages = range(20, 111)
-    p_vals = [p_x(x) for x in ages]
-    q_vals = [1 - p for p in p_vals]
-    l_x = [100000]
-    for p in p_vals[:-1]:
-        l_x.append(max(l_x[-1] * p, 0))
-    d_x = [prev - curr for prev, curr in zip(l_x, l_x[1:])] + [l_x[-1]]
-    a_due_x = [
-        sum(i / l_x[x - 20] * (1 + interest) ** (-t) for t, i in enumerate(l_x[x - 20:91]))
-        for x in ages
-    ]
-    A_x = [
-        sum(d / l_x[x - 20] * (1 + interest) ** (-t - 1) for t, d in enumerate(d_x[x - 20:91]))
-        for x in ages
-    ]
+
+    df = _gm_table(float(interest), float(A), float(B), float(c))
+    return df.loc[lambda d: (d['x'] >= from_x) & (d['x'] <= to_x), ['x', 'p_x', 'q_x', 'l_x', 'a_due_x', 'A_x']].to_string(index=False)
+
+def _basis_table(basis: str, interest: float, A: float, B: float, c: float) -> pd.DataFrame:
+    if basis == 'sult':
+        A, B, c = SULT_A, SULT_B, SULT_C
+    elif basis != 'gm':
+        raise ValueError(f"Unsupported basis: {basis}")
+    return _gm_table(float(interest), float(A), float(B), float(c))
+
+def _age_range(from_x: int, to_x: int) -> np.ndarray:
+    from_x, to_x = sorted((from_x, to_x))
+    return np.arange(max(GM_MIN_AGE, from_x), min(GM_MAX_AGE, to_x) + 1)
+
+def _at(values: np.ndarray, ages: np.ndarray) -> np.ndarray:
+    """Look up a table column by age, returning 0 past the end of the table."""
+    padded = np.append(values, 0.0)
+    idx = np.clip(np.asarray(ages) - GM_MIN_AGE, -1, len(values))
+    return np.where(idx >= 0, padded[idx], 0.0)
+
+def _whole_years(**values) -> str | None:
+    """Ages and durations index the table by year, so fractions are rejected."""
+    for name, value in values.items():
+        if value is not None and float(value) != int(value):
+            return f"{name} must be a whole number of years; got {value}."
+    return None
+
+def _check_terms(ages: np.ndarray, **terms) -> str | None:
+    """Validate durations up front so a bad argument is reported instead of producing nan or inf."""
+    for name, value in terms.items():
+        if value < 0:
+            return f"{name} must not be negative."
+    if len(ages) == 0:
+        return f"No ages between from_x and to_x fall within {GM_MIN_AGE} and {GM_MAX_AGE}."
+    oldest = int(ages.max()) + sum(terms.values())
+    if oldest > GM_MAX_AGE:
+        return (
+            f"The table ends at age {GM_MAX_AGE}, but age {int(ages.max())} plus {' + '.join(terms)} "
+            f"reaches {oldest}. Lower to_x or the durations."
+        )
+    return None
+
+def _joint_columns(df: pd.DataFrame, age_difference: int, interest: float):
+    """Commutation columns for (x, x + age_difference), assuming independent lives."""
+    x = df['x'].to_numpy()
+    l_xy = df['l_x'].to_numpy() * _at(df['l_x'].to_numpy(), x + age_difference)
+    D_xy = (1 + interest) ** -x.astype(float) * l_xy
+    N_xy = np.cumsum(D_xy[::-1])[::-1]
+    return D_xy, N_xy
+
+def actsc_commutation_functions(from_x: int, to_x: int, basis='gm', interest=0.05, A=0.00022, B=0.0000027, c=1.124):
+    try:
+        df = _basis_table(basis, interest, A, B, c)
+    except ValueError as e:
+        return str(e)
+    error = _whole_years(from_x=from_x, to_x=to_x)
+    if error:
+        return error
+    ages = _age_range(int(from_x), int(to_x))
+    return df.loc[df['x'].isin(ages), ['x', 'l_x', 'd_x', 'D_x', 'N_x', 'C_x', 'M_x']].to_string(index=False)
+
+def actsc_insurance_annuity_values(from_x: int, to_x: int, n=10, u=0, basis='gm', interest=0.05, A=0.00022, B=0.0000027, c=1.124):
+    try:
+        df = _basis_table(basis, interest, A, B, c)
+    except ValueError as e:
+        return str(e)
+    error = _whole_years(from_x=from_x, to_x=to_x, n=n, u=u)
+    if error:
+        return error
+    n, u = int(n), int(u)
+    x = _age_range(int(from_x), int(to_x))
+    error = _check_terms(x, u=u, n=n)
+    if error:
+        return error
+    D, N, M = (df[col].to_numpy() for col in ('D_x', 'N_x', 'M_x'))
+    D_x = _at(D, x)
+    term = (_at(M, x) - _at(M, x + n)) / D_x
+    pure_endowment = _at(D, x + n) / D_x
     return pd.DataFrame({
-        'x': ages,
-        'p_x': p_vals,
-        'q_x': q_vals,
-        'l_x': l_x,
-        'a_due_x': a_due_x,
-        'A_x': A_x
-    }).loc[lambda d: (d['x'] >= from_x) & (d['x'] <= to_x)].to_string(index=False)
+        'x': x,
+        'A_x': _at(M, x) / D_x,
+        f'A1_x:{n}': term,
+        f'{n}E_x': pure_endowment,
+        f'A_x:{n}': term + pure_endowment,
+        'ä_x': _at(N, x) / D_x,
+        f'ä_x:{n}': (_at(N, x) - _at(N, x + n)) / D_x,
+        f'{u}|ä_x': _at(N, x + u) / D_x,
+        f'{u}|ä_x:{n}': (_at(N, x + u) - _at(N, x + u + n)) / D_x,
+        f'{u}|A_x': _at(M, x + u) / D_x,
+    }).to_string(index=False)
+
+def actsc_joint_life_values(from_x: int, to_x: int, age_difference=0, n=10, basis='gm', interest=0.05, A=0.00022, B=0.0000027, c=1.124):
+    try:
+        df = _basis_table(basis, interest, A, B, c)
+    except ValueError as e:
+        return str(e)
+    error = _whole_years(from_x=from_x, to_x=to_x, age_difference=age_difference, n=n)
+    if error:
+        return error
+    age_difference, n = int(age_difference), int(n)
+    if age_difference < 0:
+        return "age_difference must not be negative; make the first life the younger one."
+    x = _age_range(int(from_x), int(to_x))
+    x = x[x + age_difference <= GM_MAX_AGE]
+    error = _check_terms(x, age_difference=age_difference, n=n)
+    if error:
+        return error
+    y = x + age_difference
+    d = interest / (1 + interest)
+    D, N = df['D_x'].to_numpy(), df['N_x'].to_numpy()
+    D_xy, N_xy = _joint_columns(df, age_difference, interest)
+    a_x = _at(N, x) / _at(D, x)
+    a_y = _at(N, y) / _at(D, y)
+    a_xy = _at(N_xy, x) / _at(D_xy, x)
+    a_xy_n = (_at(N_xy, x) - _at(N_xy, x + n)) / _at(D_xy, x)
+    a_x_n = (_at(N, x) - _at(N, x + n)) / _at(D, x)
+    a_y_n = (_at(N, y) - _at(N, y + n)) / _at(D, y)
+    return pd.DataFrame({
+        'x': x,
+        'y': y,
+        'ä_xy': a_xy,
+        'A_xy': 1 - d * a_xy,
+        f'ä_xy:{n}': a_xy_n,
+        f'{n}p_xy': _at(D_xy, x + n) / _at(D_xy, x) * (1 + interest) ** n,
+        'ä_x̄ȳ': a_x + a_y - a_xy,
+        'A_x̄ȳ': 1 - d * (a_x + a_y - a_xy),
+        f'ä_x̄ȳ:{n}': a_x_n + a_y_n - a_xy_n,
+    }).to_string(index=False)
+
+def actsc_premium_reserves(x: int, product='whole_life', n=None, premium_term=None, sum_insured=1.0, basis='gm', interest=0.05, A=0.00022, B=0.0000027, c=1.124):
+    try:
+        df = _basis_table(basis, interest, A, B, c)
+    except ValueError as e:
+        return str(e)
+    if product not in ('whole_life', 'term', 'endowment'):
+        return f"Unsupported product: {product}"
+    error = _whole_years(x=x, n=n, premium_term=premium_term)
+    if error:
+        return error
+    x = int(x)
+    n = int(n) if n is not None else None
+    premium_term = int(premium_term) if premium_term is not None else None
+    if not GM_MIN_AGE <= x <= GM_MAX_AGE:
+        return f"Issue age must be between {GM_MIN_AGE} and {GM_MAX_AGE}."
+    if product == 'whole_life':
+        n = GM_MAX_AGE + 1 - x
+    elif n is None or n <= 0:
+        return "Term n is required for term and endowment products."
+    elif x + n > GM_MAX_AGE:
+        return f"The table ends at age {GM_MAX_AGE}, so x + n must not exceed it; got {x + n}."
+    if premium_term is not None and premium_term <= 0:
+        return "premium_term must be at least 1 year."
+    m = min(premium_term or n, n)
+    D, N, M = (df[col].to_numpy() for col in ('D_x', 'N_x', 'M_x'))
+    # Whole life cover ends with certain death at the terminal age
+    t = np.arange(0, n if product == 'whole_life' else n + 1)
+    ages = x + t
+    D_t = _at(D, ages)
+    benefit = (_at(M, ages) - _at(M, x + n)) / D_t
+    if product == 'endowment':
+        benefit = benefit + _at(D, x + n) / D_t
+    annuity = np.where(t < m, (_at(N, ages) - _at(N, x + m)) / D_t, 0.0)
+    premium = sum_insured * benefit[0] / annuity[0]
+    return f"Annual net premium: {premium:.6f}\n" + pd.DataFrame({
+        't': t,
+        'age': ages,
+        'PV_benefits': sum_insured * benefit,
+        'PV_premiums': premium * annuity,
+        'tV': sum_insured * benefit - premium * annuity,
+    }).to_string(index=False)
 
 def actsc_service_table(from_x: int, to_x: int):
     from_x = max(20, from_x)
     to_x = min(65, to_x)
-    minio = MinioStorage()
-    with tempfile.NamedTemporaryFile() as temp_file:
-        minio.file_download('peng://Actuarial/ExamALTAM/altam_tables.xlsx', temp_file.name)
-        df = pd.read_excel(temp_file.name, sheet_name='Service Table', header=0, skiprows=4)
+    df = _altam_table("service")
     return df.loc[lambda d: (d['x'] >= from_x) & (d['x'] <= to_x)].to_string(index=False)
 
 def actsc_standard_mortality_table(from_x: int, to_x: int):
     from_x = max(20, from_x)
     to_x = min(100, to_x)
-    minio = MinioStorage()
-    with tempfile.NamedTemporaryFile() as temp_file:
-        minio.file_download('peng://Actuarial/ExamALTAM/altam_tables.xlsx', temp_file.name)
-        df_single = pd.read_excel(temp_file.name, sheet_name='Single Life', header=0, skiprows=2)
-        df_joint = pd.read_excel(temp_file.name, sheet_name='Joint Life', header=0, skiprows=2)
-    df = pd.merge(df_single, df_joint, on='x', how='left')
-    df = df.rename(columns={"Unnamed: 6": "äx_10", "Unnamed: 7": "Ax_10", "Unnamed: 8_x": "äx_20", "Unnamed: 9": "Ax_20", "Unnamed: 4": "äxx_10"})
-    df = df.drop(columns=['Unnamed: 13', 'Unnamed: 14', 'Unnamed: 8_y'])
+    df = _altam_table("sult")
     return df.loc[lambda d: (d['x'] >= from_x) & (d['x'] <= to_x)].to_string(index=False)
 
 actsc_life_table_tool = StructuredTool.from_function(
@@ -109,4 +315,91 @@ actsc_standard_mortality_table_tool = StructuredTool.from_function(
     return_direct=False,
 )
 
-actuarial_tools = [actsc_life_table_tool, actsc_service_table_tool, actsc_standard_mortality_table_tool]
+_basis_properties = {
+    "basis": {"type": "string", "enum": ["gm", "sult"], "description": "Mortality basis: 'gm' uses the Gompertz–Makeham parameters A, B and c; 'sult' uses the standard ultimate life table mortality (Makeham A=0.00022, B=0.0000027, c=1.124) and ignores A, B and c (default is 'gm')."},
+    "interest": {"type": "number", "description": "The annual effective interest rate (default is 0.05)."},
+    "A": {"type": "number", "description": "The first params in Gompertz–Makeham Mortality Model (default is 0.00022)"},
+    "B": {"type": "number", "description": "The second params in Gompertz–Makeham Mortality Model (default is 0.0000027)"},
+    "c": {"type": "number", "description": "The third params in Gompertz–Makeham Mortality Model (default is 1.124)"},
+}
+
+actsc_commutation_functions_tool = StructuredTool.from_function(
+    func=actsc_commutation_functions,
+    name="actsc_commutation_functions",
+    description="Returns the commutation functions l_x, d_x, D_x = v^x l_x, N_x, C_x = v^(x+1) d_x and M_x for ages between from_x and to_x, inclusive. Use this tool when a question asks for commutation functions or when you need them to build a custom present value.",
+    args_schema={
+        "type": "object",
+        "properties": {
+            "from_x": {"type": "integer", "description": "The starting age (must be between 20 and 110)."},
+            "to_x": {"type": "integer", "description": "The ending age (must be between 20 and 110)."},
+            **_basis_properties,
+        },
+        "required": ["from_x", "to_x"],
+    },
+    return_direct=False,
+)
+
+actsc_insurance_annuity_values_tool = StructuredTool.from_function(
+    func=actsc_insurance_annuity_values,
+    name="actsc_insurance_annuity_values",
+    description="Returns, for every age between from_x and to_x inclusive, the present values of whole life insurance (A_x), n-year term insurance (A1_x:n), n-year pure endowment (nE_x), n-year endowment insurance (A_x:n), whole life annuity due (ä_x), n-year temporary annuity due (ä_x:n), u-year deferred whole life and temporary annuities due (u|ä_x, u|ä_x:n) and u-year deferred whole life insurance (u|A_x). Insurance benefits are 1 paid at the end of the year of death. Use this tool instead of combining table lookups by hand.",
+    args_schema={
+        "type": "object",
+        "properties": {
+            "from_x": {"type": "integer", "description": "The starting age (must be between 20 and 110)."},
+            "to_x": {"type": "integer", "description": "The ending age (must be between 20 and 110)."},
+            "n": {"type": "integer", "description": "The term in years for term, endowment and temporary annuity values (default is 10)."},
+            "u": {"type": "integer", "description": "The deferral period in years for deferred values (default is 0)."},
+            **_basis_properties,
+        },
+        "required": ["from_x", "to_x"],
+    },
+    return_direct=False,
+)
+
+actsc_joint_life_values_tool = StructuredTool.from_function(
+    func=actsc_joint_life_values,
+    name="actsc_joint_life_values",
+    description="Returns joint-life and last-survivor values for two independent lives aged x and y = x + age_difference, for every x between from_x and to_x inclusive. Columns are the joint life annuity due (ä_xy) and insurance (A_xy), the n-year joint life annuity due (ä_xy:n), the n-year joint survival probability (np_xy), and the last-survivor annuity due and insurance (ä_x̄ȳ, A_x̄ȳ, ä_x̄ȳ:n). Both lives follow the same mortality basis.",
+    args_schema={
+        "type": "object",
+        "properties": {
+            "from_x": {"type": "integer", "description": "The starting age of the first life (must be between 20 and 110)."},
+            "to_x": {"type": "integer", "description": "The ending age of the first life (must be between 20 and 110)."},
+            "age_difference": {"type": "integer", "description": "The age of the second life minus the age of the first life (default is 0)."},
+            "n": {"type": "integer", "description": "The term in years for temporary values (default is 10)."},
+            **_basis_properties,
+        },
+        "required": ["from_x", "to_x"],
+    },
+    return_direct=False,
+)
+
+actsc_premium_reserves_tool = StructuredTool.from_function(
+    func=actsc_premium_reserves,
+    name="actsc_premium_reserves",
+    description="Returns the level annual net premium and the net premium reserve (tV) at every policy duration for a policy issued at age x. Supports whole life, n-year term and n-year endowment insurance with the sum insured paid at the end of the year of death, and premiums payable annually in advance for premium_term years.",
+    args_schema={
+        "type": "object",
+        "properties": {
+            "x": {"type": "integer", "description": "The issue age (must be between 20 and 110)."},
+            "product": {"type": "string", "enum": ["whole_life", "term", "endowment"], "description": "The type of insurance (default is 'whole_life')."},
+            "n": {"type": "integer", "description": "The policy term in years. Required for term and endowment insurance."},
+            "premium_term": {"type": "integer", "description": "The number of years premiums are payable (default is the policy term)."},
+            "sum_insured": {"type": "number", "description": "The sum insured (default is 1)."},
+            **_basis_properties,
+        },
+        "required": ["x"],
+    },
+    return_direct=False,
+)
+
+actuarial_tools = [
+    actsc_life_table_tool,
+    actsc_service_table_tool,
+    actsc_standard_mortality_table_tool,
+    actsc_commutation_functions_tool,
+    actsc_insurance_annuity_values_tool,
+    actsc_joint_life_values_tool,
+    actsc_premium_reserves_tool,
+]
@@ -1,28 +1,166 @@
-from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.sessions import create_session
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp import types
+from config.config import config
+from utils.log import output_log
+import anyio
+import asyncio
+import httpx
+import json
+import time
+
+# Failures that mean the session itself is gone and a new one should be opened
+_CONNECTION_ERRORS = (
+    httpx.TransportError,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    ConnectionError,
+)
+
+# (tool_name, url, headers) -> McpSession
+_sessions = {}
+
+
+class McpSession:
+    """A long-lived MCP client session shared by every chat using the server.
+
+    The session is held open by a background task, since the transport's
+    context managers must be entered and exited in the same task. The object
+    also stands in for the ClientSession handed to ``load_mcp_tools``, so the
+    generated tools survive reconnects.
+    """
+
+    def __init__(self, tool_name: str, url: str, headers: dict | None):
+        self.tool_name = tool_name
+        self.connection = {"url": url, "transport": "streamable_http"}
+        if headers:
+            self.connection["headers"] = headers
+        self.connection["session_kwargs"] = {"message_handler": self._handle_message}
+        self.loop = asyncio.get_running_loop()
+        self._session = None
+        self._runner = None
+        self._closed = None
+        self._lock = asyncio.Lock()
+        self._tools = None
+        self._tools_fetched_at = 0.0
+
+    async def _handle_message(self, message):
+        if isinstance(message, types.ServerNotification) and isinstance(
+            message.root, types.ToolListChangedNotification
+        ):
+            output_log(f"MCP server {self.tool_name} changed its tool list", "debug")
+            self._tools = None
+
+    async def _run(self, ready: asyncio.Future):
+        try:
+            async with create_session(self.connection) as session:
+                await session.initialize()
+                self._session = session
+                ready.set_result(session)
+                await self._closed.wait()
+        except BaseException as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                output_log(f"MCP session {self.tool_name} closed: {e}", "warning")
+        finally:
+            self._session = None
+
+    async def _ensure_session(self):
+        if self._session is not None:
+            return self._session
+        async with self._lock:
+            if self._session is not None:
+                return self._session
+            self._closed = asyncio.Event()
+            ready = self.loop.create_future()
+            self._runner = asyncio.create_task(self._run(ready))
+            session = await ready
+            output_log(f"Opened MCP session for {self.tool_name}", "debug")
+            return session
+
+    async def _reconnect(self, error):
+        output_log(f"MCP session {self.tool_name} failed, reconnecting: {error}", "warning")
+        await self.close()
+        return await self._ensure_session()
+
+    async def list_tools(self, cursor=None, **kwargs):
+        # Listing is read-only, so it is safe to replay on a fresh session
+        session = await self._ensure_session()
+        try:
+            return await session.list_tools(cursor=cursor, **kwargs)
+        except _CONNECTION_ERRORS as e:
+            session = await self._reconnect(e)
+            return await session.list_tools(cursor=cursor, **kwargs)
+
+    async def call_tool(self, name, arguments=None, **kwargs):
+        # A tool call may have side effects that already happened on the server,
+        # so it is never replayed; the agent gets the failure and decides
+        session = await self._ensure_session()
+        try:
+            return await session.call_tool(name, arguments, **kwargs)
+        except _CONNECTION_ERRORS as e:
+            try:
+                await self._reconnect(e)
+            except Exception as reconnect_error:
+                output_log(f"Could not reopen MCP session {self.tool_name}: {reconnect_error}", "error")
+            return types.CallToolResult(
+                isError=True,
+                content=[
+                    types.TextContent(
+                        type="text",
+                        text=(
+                            f"The connection to MCP server {self.tool_name} was lost while calling {name}, "
+                            "so the call may or may not have taken effect. Check before calling it again."
+                        ),
+                    )
+                ],
+            )
+
+    async def get_tools(self):
+        if self._tools is not None and time.monotonic() - self._tools_fetched_at < config.mcp_tools_cache_ttl:
+            return self._tools
+        tools = await load_mcp_tools(self, server_name=self.tool_name)
+        self._tools = tools
+        self._tools_fetched_at = time.monotonic()
+        return tools
+
+    async def close(self):
+        if self._closed is not None:
+            self._closed.set()
+        if self._runner is not None:
+            try:
+                await self._runner
+            except BaseException:
+                pass
+        self._runner = None
+        self._session = None
+
+
+def _session_key(tool_name, url, header):
+    return (tool_name, url, json.dumps(header or {}, sort_keys=True))
+
+
+def get_mcp_session(tool_name, url, header) -> McpSession:
+    key = _session_key(tool_name, url, header)
+    session = _sessions.get(key)
+    # Sessions are bound to the event loop that opened them
+    if session is None or session.loop is not asyncio.get_running_loop():
+        session = McpSession(tool_name, url, header)
+        _sessions[key] = session
+    return session
+
+
+async def close_mcp_sessions():
+    """Close every session opened on this loop; called when the API shuts down."""
+    for session in list(_sessions.values()):
+        if session.loop is asyncio.get_running_loop():
+            await session.close()
+    _sessions.clear()
 
 
 async def create_mcp_tools(tool_name, url, header):
     if not url:
         return []
-    if not header:
-        client = MultiServerMCPClient(
-            {
-                tool_name: {
-                    "url": url,
-                    "transport": "streamable_http",
-                }
-            }
-        )
-    else:
-        client = MultiServerMCPClient(
-            {
-                tool_name: {
-                    "url": url,
-                    "headers": header,
-                    "transport": "streamable_http",
-                }
-            }
-        )
-
-    tools = await client.get_tools()
-    return tools
+    return await get_mcp_session(tool_name, url, header).get_tools()
@@ -0,0 +1,233 @@
+import asyncio
+import base64
+import codecs
+import json
+import re
+import uuid
+from config.config import config
+from utils.log import output_log
+from services.tools.ssh_tools import (
+    _PID_LINE,
+    _POLL_INTERVAL,
+    _RECV_SIZE,
+    _get_ssh_connection,
+    _kill_remote_process,
+    _open_command_channel,
+    _release_ssh_connection,
+)
+
+# Written by the remote REPL to stdout and stderr once a request has finished;
+# each request gets its own random suffix so user output cannot fake it
+_RESPONSE_MARKER = "__PENG_RESULT__"
+_PID_LINE_BYTES = re.compile(_PID_LINE.pattern.encode("ascii"))
+
+# Runs on the remote host. Reads one JSON request per line and executes the
+# code in a namespace that lives as long as the process. Output goes straight
+# to the real stdout and stderr so it can be streamed while the code runs.
+_REPL_SERVER = """
+import json, sys, traceback
+namespace = {"__name__": "__main__"}
+for line in sys.stdin:
+    request = json.loads(line)
+    try:
+        exec(compile(request["code"], "<session>", "exec"), namespace)
+    except SystemExit:
+        pass
+    except BaseException:
+        traceback.print_exc()
+    for stream in (sys.__stdout__, sys.__stderr__):
+        stream.write(request["marker"])
+        stream.flush()
+"""
+
+_REPL_COMMAND = (
+    "uv run python -u -c \"import base64; exec(base64.b64decode('"
+    + base64.b64encode(_REPL_SERVER.encode("utf-8")).decode("ascii")
+    + "'))\""
+)
+
+# (run_id, hostname) -> PythonSession
+_sessions = {}
+# (run_id, hostname) -> asyncio.Lock guarding session start-up
+_session_locks = {}
+
+
+class SessionError(Exception):
+    pass
+
+
+class PythonSession:
+    """A long-lived remote Python interpreter reached over a pooled SSH connection.
+
+    The connection stays checked out until the session is closed, so the pool
+    never closes it as idle underneath a running interpreter.
+    """
+
+    def __init__(self, hostname: str):
+        self.hostname = hostname
+        self.ssh = None
+        self.channel = None
+        self.pid = None
+        self._buffers = {"stdout": b"", "stderr": b""}
+        self._lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self.channel is not None and not self.channel.exit_status_ready()
+
+    async def start(self, timeout: float):
+        self.ssh = await asyncio.to_thread(_get_ssh_connection, self.hostname)
+        if self.ssh is None:
+            raise SessionError("SSH connection could not be established.")
+        self.channel = await asyncio.to_thread(
+            _open_command_channel, self.ssh, _REPL_COMMAND, None, False
+        )
+        deadline = asyncio.get_running_loop().time() + timeout
+        # Shell startup files may print before the PID line; none of it is kept
+        while True:
+            match = _PID_LINE_BYTES.search(self._buffers["stdout"])
+            if match is not None:
+                self.pid = int(match.group(1))
+                self._buffers["stdout"] = self._buffers["stdout"][match.end():]
+                return
+            if len(self._buffers["stdout"]) > config.ssh_max_output_bytes:
+                raise SessionError("Python session did not report its PID.")
+            await self._receive(deadline)
+
+    async def execute(self, code: str, timeout: float, max_output_bytes: int, on_output=None) -> dict:
+        """Run code and collect its output, passing it to ``on_output(stream, text)`` as it arrives."""
+        async with self._lock:
+            marker = f"{_RESPONSE_MARKER}{uuid.uuid4().hex}\n"
+            request = json.dumps({"code": code, "marker": marker}) + "\n"
+            await asyncio.to_thread(self.channel.sendall, request.encode("utf-8"))
+            deadline = asyncio.get_running_loop().time() + timeout
+            marker = marker.encode("ascii")
+            decoders = {
+                "stdout": codecs.getincrementaldecoder("utf-8")(errors="replace"),
+                "stderr": codecs.getincrementaldecoder("utf-8")(errors="replace"),
+            }
+            output = {"stdout": [], "stderr": []}
+            finished = set()
+            total_bytes = 0
+            while True:
+                for stream in ("stdout", "stderr"):
+                    if stream in finished:
+                        continue
+                    buffer = self._buffers[stream]
+                    index = buffer.find(marker)
+                    if index >= 0:
+                        data, self._buffers[stream] = buffer[:index], buffer[index + len(marker):]
+                        finished.add(stream)
+                    else:
+                        # Hold back a tail that could be the start of the marker
+                        split = max(len(buffer) - len(marker) + 1, 0)
+                        data, self._buffers[stream] = buffer[:split], buffer[split:]
+                    total_bytes += len(data)
+                    text = decoders[stream].decode(data, final=stream in finished)
+                    if text:
+                        output[stream].append(text)
+                        if on_output is not None:
+                            on_output(stream, text)
+                if total_bytes > max_output_bytes:
+                    raise SessionError(f"Output exceeded {max_output_bytes} bytes.")
+                if len(finished) == 2:
+                    return {"stdout": "".join(output["stdout"]), "stderr": "".join(output["stderr"])}
+                await self._receive(deadline)
+
+    async def _receive(self, deadline: float):
+        """Read at most one batch per stream, waiting briefly when nothing is ready."""
+        received = False
+        if self.channel.recv_ready():
+            self._buffers["stdout"] += self.channel.recv(_RECV_SIZE)
+            received = True
+        if self.channel.recv_stderr_ready():
+            self._buffers["stderr"] += self.channel.recv_stderr(_RECV_SIZE)
+            received = True
+        if received:
+            await asyncio.sleep(0)
+            return
+        if self.channel.exit_status_ready():
+            raise SessionError(
+                "Python session exited. " + self._buffers["stderr"].decode("utf-8", errors="replace").strip()
+            )
+        if asyncio.get_running_loop().time() > deadline:
+            raise asyncio.TimeoutError()
+        await asyncio.sleep(_POLL_INTERVAL)
+
+    async def close(self):
+        if self.pid is not None and self.ssh is not None:
+            await asyncio.to_thread(_kill_remote_process, self.ssh, self.pid)
+        if self.channel is not None:
+            self.channel.close()
+        if self.ssh is not None:
+            _release_ssh_connection(self.hostname, self.ssh)
+        self.channel = None
+        self.ssh = None
+
+
+async def _get_session(run_id: str, hostname: str) -> PythonSession:
+    key = (run_id, hostname)
+    # Parallel tool calls in one run must share a single interpreter
+    async with _session_locks.setdefault(key, asyncio.Lock()):
+        session = _sessions.get(key)
+        if session is not None and session.alive:
+            return session
+        if session is not None:
+            await session.close()
+        session = PythonSession(hostname)
+        _sessions[key] = session
+        try:
+            await session.start(config.ssh_command_timeout)
+        except BaseException:
+            _sessions.pop(key, None)
+            await session.close()
+            raise
+        output_log(f"Started Python session for run {run_id} on {hostname}", "debug")
+        return session
+
+
+async def _close_session(key: tuple):
+    session = _sessions.pop(key, None)
+    if session is not None:
+        await session.close()
+        output_log(f"Closed Python session for run {key[0]} on {key[1]}", "debug")
+
+
+async def aexecute_python_session(
+    run_id: str,
+    code: str,
+    hostname: str = "homelab",
+    timeout: float | None = None,
+    max_output_bytes: int | None = None,
+    on_output=None,
+):
+    """Run code in the run's warm interpreter, starting it on first use.
+
+    Output is passed to ``on_output(stream, text)`` as it arrives. A session
+    that times out or overflows the output limit is killed, so the next call
+    starts from a fresh interpreter.
+    """
+    timeout = timeout or config.ssh_command_timeout
+    max_output_bytes = max_output_bytes or config.ssh_max_output_bytes
+    try:
+        session = await _get_session(run_id, hostname)
+        response = await session.execute(code, timeout, max_output_bytes, on_output)
+    except asyncio.TimeoutError:
+        await _close_session((run_id, hostname))
+        return {"error": f"Execution timed out after {timeout} seconds. The Python session was restarted and its state was lost."}
+    except Exception as e:
+        await _close_session((run_id, hostname))
+        return {"error": f"{e} The Python session was restarted and its state was lost."}
+    stdout = response["stdout"].strip()
+    stderr = response["stderr"].strip()
+    if stderr:
+        return {"error": "\n".join(part for part in [stdout, stderr] if part)}
+    return {"output": stdout}
+
+
+async def close_python_session(run_id: str):
+    """Close every session the run started."""
+    for key in [key for key in _sessions if key[0] == run_id]:
+        await _close_session(key)
+    for key in [key for key in _session_locks if key[0] == run_id]:
+        _session_locks.pop(key, None)
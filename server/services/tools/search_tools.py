@@ -1,45 +1,123 @@
 from langchain_core.tools import StructuredTool
 from config.config import config
+from utils.http_client import get_http_client, host_limit, request
+import asyncio
+
+TAVILY_API_URL = "https://api.tavily.com"
+WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+# URLs per Tavily extract request; batches are sent concurrently
+TAVILY_EXTRACT_BATCH_SIZE = 5
+
+
+async def _wikipedia_summary(title: str) -> str:
+    response = await request(
+        "GET",
+        WIKIPEDIA_API_URL,
+        params={
+            "action": "query",
+            "prop": "extracts",
+            "exintro": 1,
+            "explaintext": 1,
+            "redirects": 1,
+            "titles": title,
+            "format": "json",
+        },
+    )
+    response.raise_for_status()
+    pages = response.json().get("query", {}).get("pages", {})
+    return next(iter(pages.values()), {}).get("extract", "")
 
 
-def _wikipedia_search(query) -> str:
-    from langchain_community.tools import WikipediaQueryRun
-    from langchain_community.utilities import WikipediaAPIWrapper
+async def _wikipedia_search(query) -> str:
+    response = await request(
+        "GET",
+        WIKIPEDIA_API_URL,
+        params={"action": "query", "list": "search", "srsearch": query, "srlimit": 3, "format": "json"},
+    )
+    response.raise_for_status()
+    titles = [result["title"] for result in response.json().get("query", {}).get("search", [])]
+    summaries = await asyncio.gather(*[_wikipedia_summary(title) for title in titles])
+    results = "\n\n".join(
+        f"Page: {title}\nSummary: {summary}"
+        for title, summary in zip(titles, summaries)
+        if summary
+    )
+    return results[:10000] if results else "No good Wikipedia Search Result was found"
 
-    wikipedia = WikipediaAPIWrapper(doc_content_chars_max=10000)
-    search = WikipediaQueryRun(api_wrapper=wikipedia)
-    results = search.run(query)
-    return results
 
-def requests_toolkit():
-    from langchain_community.agent_toolkits.openapi.toolkit import RequestsToolkit
-    from langchain_community.utilities.requests import TextRequestsWrapper
-
-    HEADERS = {
-        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36"
-    }
-    toolkit = RequestsToolkit(
-        requests_wrapper=TextRequestsWrapper(headers=HEADERS),
-        allow_dangerous_requests=True,
+async def _requests_get(url: str) -> str:
+    response = await request("GET", url)
+    return response.text
+
+
+async def _requests_post(url: str, data: dict) -> str:
+    response = await request("POST", url, json=data)
+    return response.text
+
+
+async def _requests_patch(url: str, data: dict) -> str:
+    response = await request("PATCH", url, json=data)
+    return response.text
+
+
+async def _requests_put(url: str, data: dict) -> str:
+    response = await request("PUT", url, json=data)
+    return response.text
+
+
+async def _requests_delete(url: str) -> str:
+    response = await request("DELETE", url)
+    return response.text
+
+
+def _requests_tool(coroutine, method: str, description: str, with_data: bool) -> StructuredTool:
+    properties = {"url": {"type": "string", "description": "The url to send the request to."}}
+    if with_data:
+        properties["data"] = {"type": "object", "description": f"The JSON body of the {method} request."}
+    return StructuredTool.from_function(
+        coroutine=coroutine,
+        name=f"requests_{method.lower()}",
+        description=description,
+        args_schema={
+            "type": "object",
+            "properties": properties,
+            "required": list(properties),
+        },
+        return_direct=False,
     )
-    tools = toolkit.get_tools()
-    return tools
 
 
-def _tavily_search(query: str, topic="general") -> list[str]:
-    from tavily import TavilyClient
+def requests_toolkit():
+    return [
+        _requests_tool(_requests_get, "GET", "Send a GET request to a url and return the response text. Use this when you need to get specific content from a website.", False),
+        _requests_tool(_requests_post, "POST", "Send a POST request with a JSON body to a url and return the response text. Use this when you want to post data to a website.", True),
+        _requests_tool(_requests_patch, "PATCH", "Send a PATCH request with a JSON body to a url and return the response text. Use this when you want to patch data on a website.", True),
+        _requests_tool(_requests_put, "PUT", "Send a PUT request with a JSON body to a url and return the response text. Use this when you want to update data on a website.", True),
+        _requests_tool(_requests_delete, "DELETE", "Send a DELETE request to a url and return the response text. Use this when you want to delete data on a website.", False),
+    ]
 
-    client = TavilyClient(
+
+def _tavily_client():
+    from tavily import AsyncTavilyClient
+
+    # Tavily gets its own pooled client because it carries the API key header
+    return AsyncTavilyClient(
         api_key=config.tavily_api_key,
+        client=get_http_client("tavily", base_url=TAVILY_API_URL),
     )
-    response = client.search(
-        query=query,
-        topic=topic,
-        search_depth="advanced",
-        max_results=config.web_search_max_results,
-        include_images=True,
-        include_image_descriptions=True,
-    )
+
+
+async def _tavily_search(query: str, topic="general") -> list[str]:
+    async with host_limit(TAVILY_API_URL):
+        response = await _tavily_client().search(
+            query=query,
+            topic=topic,
+            search_depth="advanced",
+            max_results=config.web_search_max_results,
+            include_images=True,
+            include_image_descriptions=True,
+            timeout=config.http_timeout,
+        )
     return [
         f"{result['title']} --- {result['url']}: {result['content']}"
         for result in response["results"]] + [
@@ -47,42 +125,56 @@ def _tavily_search(query: str, topic="general") -> list[str]:
         for result in response["images"]
     ]
 
-def _tavily_extract(url: str) -> list[str]:
-    from tavily import TavilyClient
-
-    client = TavilyClient(
-        api_key=config.tavily_api_key,
-    )
-    response = client.extract(
-        urls=[url],
-        extract_depth="advanced",
-    )
-    return [
-        f"{result['title']} --- {result['raw_content']}"
-        for result in response["results"]
+async def _tavily_extract_batch(urls: list[str]) -> dict:
+    async with host_limit(TAVILY_API_URL):
+        return await _tavily_client().extract(
+            urls=urls,
+            extract_depth="advanced",
+            timeout=config.http_timeout,
+        )
+
+async def _tavily_extract(urls: list[str] | str) -> list[str]:
+    if isinstance(urls, str):
+        urls = [urls]
+    batches = [
+        urls[i:i + TAVILY_EXTRACT_BATCH_SIZE]
+        for i in range(0, len(urls), TAVILY_EXTRACT_BATCH_SIZE)
     ]
-
-def _tavily_crawler(url: str, instructions: str) -> list[str]:
-    from tavily import TavilyClient
-
-    client = TavilyClient(
-        api_key=config.tavily_api_key,
-    )
-    response = client.crawl(
-        url=url,
-        instructions=instructions,
-        max_depth=3,
-        max_breadth=20,
-        limit=30,
-        allow_external=False,
+    responses = await asyncio.gather(
+        *[_tavily_extract_batch(batch) for batch in batches], return_exceptions=True
     )
+    results = []
+    for batch, response in zip(batches, responses):
+        if isinstance(response, Exception):
+            results += [f"Failed to extract {url}: {response}" for url in batch]
+            continue
+        results += [
+            f"{result.get('title', result['url'])} --- {result['raw_content']}"
+            for result in response["results"]
+        ]
+        results += [
+            f"Failed to extract {result['url']}: {result.get('error', 'unknown error')}"
+            for result in response.get("failed_results", [])
+        ]
+    return results
+
+async def _tavily_crawler(url: str, instructions: str) -> list[str]:
+    async with host_limit(TAVILY_API_URL):
+        response = await _tavily_client().crawl(
+            url=url,
+            instructions=instructions,
+            max_depth=3,
+            max_breadth=20,
+            limit=30,
+            allow_external=False,
+        )
     return [
         f"{result['url']}: {result['raw_content']}"
         for result in response["results"]
     ]
 
 tavily_search_tool = StructuredTool.from_function(
-    func=_tavily_search,
+    coroutine=_tavily_search,
     name="tavily_search_tool",
     description="A search engine using Tavily (SaaS remote provider) that searches the web for relevant information. Input should be a query string for search. Use this tool when you want to search the web for information and did not have a specific url to start with",
     args_schema={
@@ -99,7 +191,7 @@ tavily_search_tool = StructuredTool.from_function(
 )
 
 tavily_crawler_tool = StructuredTool.from_function(
-    func=_tavily_crawler,
+    coroutine=_tavily_crawler,
     name="tavily_crawler_tool",
     description="A web crawler using Tavily (SaaS remote provider) that crawls a given url and extract relevant information based on the given instructions. Input should be a url and instructions for crawling. Use this tool when you have a specific url to start with and want to crawl the url and extract relevant information based on the instructions. The instructions should be specific about what information to extract",
     args_schema={
@@ -120,18 +212,19 @@ tavily_crawler_tool = StructuredTool.from_function(
 )
 
 tavily_extract_tool = StructuredTool.from_function(
-    func=_tavily_extract,
+    coroutine=_tavily_extract,
     name="tavily_extract_tool",
-    description="A web content extractor using Tavily (SaaS remote provider) that extract raw content from a given url. Input should be a url. Use this tool when you have a specific url to start with and want to extract the raw content from the url without crawling other websites",
+    description="A web content extractor using Tavily (SaaS remote provider) that extract raw content from one or more given urls. Input should be a list of urls; all of them are fetched in parallel in one call. Use this tool when you have specific urls to start with and want to extract the raw content from them without crawling other websites",
     args_schema={
         "type": "object",
         "properties": {
-            "url": {
-                "type": "string",
-                "description": "The url to extract content from.",
+            "urls": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "The urls to extract content from.",
             },
         },
-        "required": ["url"],
+        "required": ["urls"],
     },
     return_direct=False,
 )
@@ -139,7 +232,7 @@ tavily_extract_tool = StructuredTool.from_function(
 tavily_tools = [tavily_search_tool, tavily_crawler_tool, tavily_extract_tool]
 
 wikipedia_search_tool = StructuredTool.from_function(
-    func=_wikipedia_search,
+    coroutine=_wikipedia_search,
     name="wikipedia_search_tool",
     description="Search Wikipedia for Professional and Detailed information. Input should be a query string for search.",
     args_schema={
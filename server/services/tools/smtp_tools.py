@@ -1,5 +1,10 @@
+import json
+import queue
 import smtplib
+import threading
 import time
+import uuid
+from contextlib import contextmanager
 from email import encoders
 from email.mime.base import MIMEBase
 from email.mime.text import MIMEText
@@ -7,150 +12,347 @@ from email.mime.multipart import MIMEMultipart
 from typing import Dict, List, Optional, Any
 from config.config import config
 from utils.log import output_log
+from utils.redis import redis_cache
 from langchain_core.tools import StructuredTool
+import asyncio
 
+# Redis keys of the durable send queue. Each sender thread moves the id it is
+# working on to its own list, EMAIL_PROCESSING_KEY:<worker id>:<slot>.
+EMAIL_QUEUE_KEY = "email:queue"
+EMAIL_PROCESSING_KEY = "email:processing"
+EMAIL_RETRY_KEY = "email:retry"
+# EMAIL_WORKER_KEY:<worker id> exists while that worker's process is alive
+EMAIL_WORKER_KEY = "email:worker"
+# Blocking pop timeout, also how often due retries are promoted
+_WORKER_POLL_SECONDS = 1
+_HEARTBEAT_TTL = 30
+# How often processing lists of dead workers are looked for
+_RECOVER_INTERVAL = 60
 
-class SmtpEmailSender:
-    def __init__(self):
-        """Initialize the EmailSender with SMTP credentials.
 
-        Args:
-            username: The email address to send from
-            password: The password for the email account
-        """
-        self.username = config.smtp_username
-        self.password = config.smtp_password
-        self.smtp_server = config.smtp_server
-        self.smtp_port = config.smtp_port
-        self.use_ssl = config.smtp_use_ssl
-        self.connection = None
+def _email_key(email_id: str) -> str:
+    return f"email:{email_id}"
 
-    def connect(self) -> bool:
-        """Connect to the SMTP server.
 
-        Returns:
-            bool: True if connection is successful, False otherwise
-        """
+class SmtpConnectionPool:
+    """Authenticated SMTP connections kept open between sends.
+
+    Idle connections are checked with NOOP before reuse and dropped once they
+    have been idle longer than ``smtp_idle_timeout``.
+    """
+
+    def __init__(self, size: int, idle_timeout: float):
+        self.idle_timeout = idle_timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def _connect(self) -> smtplib.SMTP:
         output_log(
-            f"Connecting to SMTP server {self.smtp_server} on port {self.smtp_port} with SSL {self.use_ssl} | Username: {self.username}; Password: {self.password}",
+            f"Connecting to SMTP server {config.smtp_server} on port {config.smtp_port} with SSL {config.smtp_use_ssl} | Username: {config.smtp_username}",
             "debug",
         )
+        if config.smtp_use_ssl:
+            connection = smtplib.SMTP_SSL(
+                config.smtp_server, config.smtp_port, timeout=config.smtp_timeout
+            )
+        else:
+            connection = smtplib.SMTP(
+                config.smtp_server, config.smtp_port, timeout=config.smtp_timeout
+            )
+            connection.starttls()
         try:
-            # Attempt to connect to SMTP server with retry logic
-            for attempt in range(5):
-                try:
-                    if self.use_ssl:
-                        self.connection = smtplib.SMTP_SSL(
-                            self.smtp_server, self.smtp_port
-                        )
-                    else:
-                        self.connection = smtplib.SMTP(self.smtp_server, self.smtp_port)
-                        self.connection.starttls()
-
-                    self.connection.login(self.username, self.password)
-                    output_log(f"Connected to SMTP server {self.smtp_server}", "info")
-                    return True
-                except Exception as e:
-                    if attempt < 4:  # Try 5 times total
-                        wait_time = 2**attempt  # Exponential backoff
-                        output_log(
-                            f"SMTP connection attempt {attempt + 1} failed, retrying in {wait_time}s: {str(e)}",
-                            "warning",
-                        )
-                        time.sleep(wait_time)
-                    else:
-                        raise e
-        except Exception as e:
-            output_log(f"Failed to connect to SMTP server: {str(e)}", "error")
+            connection.login(config.smtp_username, config.smtp_password)
+        except Exception:
+            self._close(connection)
+            raise
+        output_log(f"Connected to SMTP server {config.smtp_server}", "info")
+        return connection
+
+    @staticmethod
+    def _is_alive(connection: smtplib.SMTP) -> bool:
+        try:
+            return connection.noop()[0] == 250
+        except Exception:
             return False
 
-    def disconnect(self) -> None:
-        """Disconnect from the SMTP server."""
-        if self.connection:
-            self.connection.quit()
+    @staticmethod
+    def _close(connection: smtplib.SMTP) -> None:
+        try:
+            connection.quit()
+        except Exception:
+            connection.close()
 
-    def send_email(
+    def _take_idle(self) -> Optional[smtplib.SMTP]:
+        while True:
+            try:
+                connection, released_at = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            if time.monotonic() - released_at < self.idle_timeout and self._is_alive(connection):
+                return connection
+            self._close(connection)
+
+    @contextmanager
+    def connection(self):
+        connection = self._take_idle() or self._connect()
+        try:
+            yield connection
+        except Exception:
+            # The connection may be in an unknown state after a failed send
+            self._close(connection)
+            raise
+        try:
+            self._idle.put_nowait((connection, time.monotonic()))
+        except queue.Full:
+            self._close(connection)
+
+    def close(self) -> None:
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(connection)
+
+
+smtp_pool = SmtpConnectionPool(config.smtp_pool_size, config.smtp_idle_timeout)
+
+
+class SmtpEmailSender:
+    def __init__(self, pool: SmtpConnectionPool = smtp_pool):
+        """Initialize the EmailSender on top of a shared connection pool.
+
+        Args:
+            pool: The pool that hands out authenticated SMTP connections
+        """
+        self.username = config.smtp_username
+        self.pool = pool
+
+    def build_message(
         self,
         to_address: str,
         subject: str,
         body: str,
         attachments: Optional[List[Dict[str, Any]]] = None,
     ) -> str:
-        """Send an email using SMTP.
+        msg = MIMEMultipart()
+        msg["From"] = self.username
+        msg["To"] = to_address
+        msg["Subject"] = subject
 
-        Args:
-            to_address: The recipient email address
-            subject: The email subject
-            body: The email body text
-            attachments: Optional list of attachment dictionaries with 'filename' and 'content' keys
+        # Attach the body
+        msg.attach(MIMEText(body, "plain"))
 
-        Returns:
-            bool: True if email was sent successfully, False otherwise
-        """
-        if not self.connection:
-            output_log(
-                "No SMTP connection established, attempting to connect.", "debug"
+        # Add attachments if any
+        for attachment in attachments or []:
+            filename = attachment.get("filename", "")
+            content = attachment.get("content", b"")
+
+            part = MIMEBase("application", "octet-stream")
+            part.set_payload(content)
+            encoders.encode_base64(part)
+            part.add_header(
+                "Content-Disposition", f'attachment; filename="{filename}"'
             )
-            if not self.connect():
-                return "Failed to connect to SMTP server."
+            msg.attach(part)
+        return msg.as_string()
+
+    def send_email(
+        self,
+        to_address: str,
+        subject: str,
+        body: str,
+        attachments: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """Send an email once over a pooled connection.
+
+        Raises on failure; retries are left to the send queue.
+        """
+        message = self.build_message(to_address, subject, body, attachments)
+        with self.pool.connection() as connection:
+            connection.sendmail(self.username, to_address, message)
+        output_log(f"Email sent to {to_address}", "info")
 
+
+def enqueue_email(
+    to_address: str,
+    subject: str,
+    body: str,
+    attachments: Optional[List[Dict[str, Any]]] = None,
+) -> str:
+    """Store the email in Redis and queue it for delivery.
+
+    Returns:
+        str: The id used to look up the delivery status
+    """
+    email_id = uuid.uuid4().hex
+    record = {
+        "id": email_id,
+        "to_address": to_address,
+        "subject": subject,
+        "body": body,
+        "attachments": attachments or [],
+        "status": "queued",
+        "attempts": 0,
+        "error": None,
+        "created_at": time.time(),
+        "updated_at": time.time(),
+    }
+    pipe = redis_cache.client.pipeline()
+    pipe.set(_email_key(email_id), json.dumps(record), ex=config.email_status_ttl)
+    pipe.lpush(EMAIL_QUEUE_KEY, email_id)
+    pipe.execute()
+    output_log(f"Queued email {email_id} to {to_address}", "debug")
+    email_worker.ensure_started()
+    return email_id
+
+
+def get_email_status(email_id: str) -> Optional[Dict[str, Any]]:
+    payload = redis_cache.client.get(_email_key(email_id))
+    if not payload:
+        return None
+    record = json.loads(payload)
+    return {
+        key: record[key]
+        for key in ["id", "to_address", "subject", "status", "attempts", "error", "created_at", "updated_at"]
+    }
+
+
+class EmailWorker:
+    """Background threads delivering queued emails with exponential backoff.
+
+    ``smtp_pool_size`` sender threads share the connection pool. Each moves
+    the id it is sending to its own processing list, and a supervisor thread
+    keeps a heartbeat key alive for the worker. Processing lists whose worker
+    has no heartbeat, because its process died, are queued again; lists of
+    live workers, including other replicas, are left alone.
+    """
+
+    def __init__(self, sender: Optional[SmtpEmailSender] = None, concurrency: Optional[int] = None):
+        self.sender = sender or SmtpEmailSender()
+        self.concurrency = concurrency or config.smtp_pool_size
+        self.worker_id = uuid.uuid4().hex
+        self._threads = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def processing_key(self, slot: int) -> str:
+        return f"{EMAIL_PROCESSING_KEY}:{self.worker_id}:{slot}"
+
+    def ensure_started(self) -> None:
+        with self._lock:
+            if any(thread.is_alive() for thread in self._threads):
+                return
+            self._stop.clear()
+            self._threads = [threading.Thread(target=self._supervise, name="email-supervisor", daemon=True)]
+            self._threads += [
+                threading.Thread(target=self._run, args=(self.processing_key(slot),), name=f"email-worker-{slot}", daemon=True)
+                for slot in range(self.concurrency)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self.sender.pool.close()
         try:
-            msg = MIMEMultipart()
-            msg["From"] = self.username
-            msg["To"] = to_address
-            msg["Subject"] = subject
-
-            # Attach the body
-            msg.attach(MIMEText(body, "plain"))
-
-            # Add attachments if any
-            if attachments:
-                for attachment in attachments:
-                    filename = attachment.get("filename", "")
-                    content = attachment.get("content", b"")
-
-                    part = MIMEBase("application", "octet-stream")
-                    part.set_payload(content)
-                    encoders.encode_base64(part)
-                    part.add_header(
-                        "Content-Disposition", f'attachment; filename="{filename}"'
-                    )
-                    msg.attach(part)
-
-            # Attempt to send the email with retry logic
-            for attempt in range(5):
-                try:
-                    self.connection.sendmail(self.username, to_address, msg.as_string())
-                    output_log(f"Email sent to {to_address}", "info")
-                    return f"Email sent to {to_address}"
-                except Exception as e:
-                    if attempt < 4:  # Try 5 times total
-                        wait_time = 2**attempt  # Exponential backoff
-                        output_log(
-                            f"Email send attempt {attempt + 1} failed, retrying in {wait_time}s: {str(e)}",
-                            "warning",
-                        )
-                        time.sleep(wait_time)
-                        # Try to reconnect
-                        self.disconnect()
-                        self.connect()
-                    else:
-                        raise e
+            # Anything still in our processing lists is picked up by another worker
+            redis_cache.client.delete(f"{EMAIL_WORKER_KEY}:{self.worker_id}")
         except Exception as e:
-            output_log(f"Failed to send email to {to_address}: {str(e)}", "error")
-            return f"Failed to send email to {to_address}: {str(e)}"
-        finally:
-            self.disconnect()
-        return f"Failed to send email to {to_address} after multiple attempts."
+            output_log(f"Error removing email worker heartbeat: {str(e)}", "error")
+
+    def _heartbeat(self) -> None:
+        redis_cache.client.set(f"{EMAIL_WORKER_KEY}:{self.worker_id}", "1", ex=_HEARTBEAT_TTL)
+
+    def _recover(self) -> None:
+        client = redis_cache.client
+        for key in client.scan_iter(match=f"{EMAIL_PROCESSING_KEY}:*"):
+            worker_id = key[len(EMAIL_PROCESSING_KEY) + 1:].split(":", 1)[0]
+            if worker_id == self.worker_id or client.exists(f"{EMAIL_WORKER_KEY}:{worker_id}"):
+                continue
+            output_log(f"Re-queueing emails left by stopped worker {worker_id}", "warning")
+            while client.rpoplpush(key, EMAIL_QUEUE_KEY):
+                pass
 
+    def _promote_due_retries(self) -> None:
+        client = redis_cache.client
+        for email_id in client.zrangebyscore(EMAIL_RETRY_KEY, 0, time.time()):
+            # Only the caller that removes the entry re-queues it
+            if client.zrem(EMAIL_RETRY_KEY, email_id):
+                client.lpush(EMAIL_QUEUE_KEY, email_id)
 
-def send_email_tool(
+    def _supervise(self) -> None:
+        next_recovery = 0.0
+        while not self._stop.is_set():
+            try:
+                self._heartbeat()
+                self._promote_due_retries()
+                if time.monotonic() >= next_recovery:
+                    self._recover()
+                    next_recovery = time.monotonic() + _RECOVER_INTERVAL
+            except Exception as e:
+                output_log(f"Email supervisor error: {str(e)}", "error")
+            self._stop.wait(_WORKER_POLL_SECONDS)
+
+    def _run(self, processing_key: str) -> None:
+        while not self._stop.is_set():
+            try:
+                email_id = redis_cache.client.brpoplpush(
+                    EMAIL_QUEUE_KEY, processing_key, timeout=_WORKER_POLL_SECONDS
+                )
+                if email_id:
+                    self.process(email_id, processing_key)
+            except Exception as e:
+                output_log(f"Email worker error: {str(e)}", "error")
+                self._stop.wait(_WORKER_POLL_SECONDS)
+
+    def process(self, email_id: str, processing_key: str) -> None:
+        client = redis_cache.client
+        key = _email_key(email_id)
+        payload = client.get(key)
+        if not payload:
+            client.lrem(processing_key, 1, email_id)
+            return
+        record = json.loads(payload)
+        record["attempts"] += 1
+        try:
+            self.sender.send_email(
+                record["to_address"], record["subject"], record["body"], record["attachments"]
+            )
+            record["status"] = "sent"
+            record["error"] = None
+        except Exception as e:
+            record["error"] = str(e)
+            if record["attempts"] < config.email_max_attempts:
+                record["status"] = "retrying"
+                wait_time = 2 ** (record["attempts"] - 1)  # Exponential backoff
+                client.zadd(EMAIL_RETRY_KEY, {email_id: time.time() + wait_time})
+                output_log(
+                    f"Email {email_id} attempt {record['attempts']} failed, retrying in {wait_time}s: {str(e)}",
+                    "warning",
+                )
+            else:
+                record["status"] = "failed"
+                output_log(f"Failed to send email {email_id} to {record['to_address']}: {str(e)}", "error")
+        record["updated_at"] = time.time()
+        pipe = client.pipeline()
+        pipe.set(key, json.dumps(record), ex=config.email_status_ttl)
+        pipe.lrem(processing_key, 1, email_id)
+        pipe.execute()
+
+
+email_worker = EmailWorker()
+
+
+async def send_email_tool(
     to_address: str,
     subject: str,
     body: str,
     attachments: Optional[List[Dict[str, Any]]] = None,
 ) -> str:
-    """Send an email using the SmtpEmailSender class.
+    """Queue an email for background delivery.
 
     Args:
         to_address: The recipient email address
@@ -159,17 +361,27 @@ def send_email_tool(
         attachments: Optional list of attachment dictionaries with 'filename' and 'content' keys
 
     Returns:
-        bool: True if email was sent successfully, False otherwise
+        str: Confirmation with the id to check the delivery status
     """
-    sender = SmtpEmailSender()
-    sender.connect()
-    return sender.send_email(to_address, subject, body, attachments)
+    try:
+        email_id = await asyncio.to_thread(enqueue_email, to_address, subject, body, attachments)
+    except Exception as e:
+        output_log(f"Failed to queue email to {to_address}: {str(e)}", "error")
+        return f"Failed to queue email to {to_address}: {str(e)}"
+    return f"Email to {to_address} queued for delivery with id {email_id}"
+
+
+async def email_status_tool_func(email_id: str) -> str:
+    status = await asyncio.to_thread(get_email_status, email_id)
+    if status is None:
+        return f"No email found with id {email_id}"
+    return json.dumps(status)
 
 
 email_send_tool = StructuredTool.from_function(
-    func=send_email_tool,
+    coroutine=send_email_tool,
     name="email_send_tool",
-    description="Send an email using SMTP. Input should be a dictionary with 'to_address', 'subject', 'body', and optional 'attachments'.",
+    description="Send an email using SMTP. Input should be a dictionary with 'to_address', 'subject', 'body', and optional 'attachments'. The email is queued and delivered in the background; the returned id can be passed to email_status_tool to check whether it was sent.",
     args_schema={
         "type": "object",
         "properties": {
@@ -203,3 +415,20 @@ email_send_tool = StructuredTool.from_function(
     },
     return_direct=True,
 )
+
+email_status_tool = StructuredTool.from_function(
+    coroutine=email_status_tool_func,
+    name="email_status_tool",
+    description="Check the delivery status (queued, retrying, sent or failed) of an email queued by email_send_tool. Input should be the email id returned when it was queued.",
+    args_schema={
+        "type": "object",
+        "properties": {
+            "email_id": {
+                "type": "string",
+                "description": "The id returned by email_send_tool.",
+            },
+        },
+        "required": ["email_id"],
+    },
+    return_direct=False,
+)
@@ -1,20 +1,244 @@
 from handlers.tool_handlers import get_tool_by_name
+from config.config import config
+from utils.log import output_log
+from utils.minio_connection import MinioStorage
+from langchain_community.utilities.sql_database import SQLDatabase
+from langchain_core.tools import StructuredTool
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import SQLAlchemyError
+import datetime
+import functools
+import threading
+import time
+import pandas as pd
 
+# url -> Engine, shared by every chat that uses the tool
+_engines = {}
+# url -> {"db": CachedSQLDatabase, "created_at": monotonic time}
+_databases = {}
+_lock = threading.RLock()
+# Rows pulled from the server-side cursor per round trip
+_FETCH_SIZE = 500
 
-def get_sql_engine(tool_name: str):
+
+class CachedSQLDatabase(SQLDatabase):
+    """SQLDatabase that memoizes table info and caps the rows a query returns.
+
+    Instances are rebuilt after ``sql_schema_cache_ttl`` seconds, which also
+    expires the memoized table info.
+    """
+
+    def __init__(self, *args, max_rows: int = config.sql_max_rows, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._max_rows = max_rows
+        self._table_info = {}
+        self._table_info_lock = threading.Lock()
+
+    def get_table_info(self, table_names=None) -> str:
+        key = tuple(sorted(table_names)) if table_names else None
+        with self._table_info_lock:
+            if key not in self._table_info:
+                self._table_info[key] = super().get_table_info(table_names)
+            return self._table_info[key]
+
+    def _execute(self, command, fetch="all", *, parameters=None, execution_options=None):
+        if fetch != "all" or self._schema is not None:
+            return super()._execute(
+                command, fetch, parameters=parameters, execution_options=execution_options
+            )
+        with self._engine.begin() as connection:
+            result = connection.execute(
+                text(command) if isinstance(command, str) else command,
+                parameters or {},
+                execution_options=execution_options or {},
+            )
+            if not result.returns_rows:
+                return []
+            return [row._asdict() for row in result.fetchmany(self._max_rows)]
+
+
+def _create_engine(url: str):
+    timeout_ms = config.sql_statement_timeout * 1000
+    kwargs = {"pool_pre_ping": True, "pool_recycle": 3600}
+    if not url.startswith("sqlite"):
+        kwargs["pool_size"] = config.sql_pool_size
+        kwargs["max_overflow"] = config.sql_pool_size
+    if url.startswith("postgresql"):
+        # A SET inside the connect event would be rolled back with the first transaction
+        kwargs["connect_args"] = {"options": f"-c statement_timeout={timeout_ms}"}
+    engine = create_engine(url, **kwargs)
+
+    if engine.dialect.name in ("mysql", "mariadb"):
+        @event.listens_for(engine, "connect")
+        def _set_statement_timeout(dbapi_connection, _connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute(f"SET SESSION max_execution_time = {timeout_ms}")
+            finally:
+                cursor.close()
+
+    return engine
+
+
+def _get_tool_url(tool_name: str) -> str:
     tool = get_tool_by_name(tool_name)
     if not tool:
         raise ValueError(f"Tool {tool_name} not found in database.")
-
-    from sqlalchemy import create_engine
-
     if not tool["url"]:
         raise ValueError(f"Tool {tool_name} does not have a valid URL.")
-    return create_engine(tool["url"])
+    return tool["url"]
+
+
+def _get_engine(url: str):
+    with _lock:
+        if url not in _engines:
+            _engines[url] = _create_engine(url)
+        return _engines[url]
+
+
+def get_sql_engine(tool_name: str):
+    return _get_engine(_get_tool_url(tool_name))
+
+
+def get_sql_database(tool_name: str) -> CachedSQLDatabase:
+    url = _get_tool_url(tool_name)
+    with _lock:
+        cached = _databases.get(url)
+        if cached is not None and time.monotonic() - cached["created_at"] < config.sql_schema_cache_ttl:
+            return cached["db"]
+    # Reflection can be slow, so it runs outside the lock
+    output_log(f"Reflecting database schema for {tool_name}", "debug")
+    db = CachedSQLDatabase(_get_engine(url))
+    with _lock:
+        _databases[url] = {"db": db, "created_at": time.monotonic()}
+    return db
+
+
+def _stream_query(engine, query: str, max_rows: int, max_bytes: int):
+    """Run a query on a server-side cursor, stopping once the row or byte budget is spent.
+
+    Returns (columns, rows, truncated), or None for statements without a result set.
+    """
+    with engine.begin() as connection:
+        result = connection.execution_options(
+            stream_results=True, max_row_buffer=_FETCH_SIZE
+        ).execute(text(query))
+        if not result.returns_rows:
+            return None
+        columns = list(result.keys())
+        rows = []
+        size = 0
+        truncated = False
+        for partition in result.partitions(_FETCH_SIZE):
+            for row in partition:
+                row_size = sum(len(str(value)) for value in row)
+                if len(rows) >= max_rows or size + row_size > max_bytes:
+                    truncated = True
+                    break
+                rows.append(tuple(row))
+                size += row_size
+            if truncated:
+                break
+        result.close()
+    return columns, rows, truncated
+
+
+def _column_summary(df: pd.DataFrame) -> pd.DataFrame:
+    summary = []
+    for column in df.columns:
+        values = df[column]
+        stats = {
+            "column": column,
+            "type": str(values.infer_objects().dtype),
+            "non_null": int(values.notna().sum()),
+            "distinct": int(values.nunique(dropna=True)),
+            "min": "",
+            "max": "",
+            "mean": "",
+        }
+        numeric = pd.to_numeric(values, errors="coerce")
+        if numeric.notna().any() and numeric.notna().sum() == values.notna().sum():
+            stats.update(min=numeric.min(), max=numeric.max(), mean=round(numeric.mean(), 6))
+        elif values.notna().any():
+            try:
+                stats.update(min=values.dropna().min(), max=values.dropna().max())
+            except TypeError:
+                pass
+        summary.append(stats)
+    return pd.DataFrame(summary)
+
+
+def _export_result(df: pd.DataFrame, tool_name: str):
+    timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
+    path = f"{config.s3_base_path}/sql_results/{tool_name}/{timestamp}.csv"
+    if MinioStorage().file_upload_from_string(df.to_csv(index=False).encode("utf-8"), path, "text/csv"):
+        return f"{config.s3_bucket}://{path}"
+    return None
+
+
+def sql_query(db: SQLDatabase, tool_name: str, query: str, export: bool = False) -> str:
+    try:
+        streamed = _stream_query(
+            db._engine, query, config.sql_max_rows, config.sql_max_result_bytes
+        )
+    except SQLAlchemyError as e:
+        return f"Error: {e}"
+    if streamed is None:
+        return "Statement executed. No rows returned."
+    columns, rows, truncated = streamed
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    lines = [f"Returned {len(df)} rows and {len(columns)} columns."]
+    if truncated:
+        lines.append(
+            f"The result was cut off at {len(df)} rows to stay within {config.sql_max_rows} rows / {config.sql_max_result_bytes} bytes; "
+            "add filters, aggregation or a LIMIT to see the rest."
+        )
+    if df.empty:
+        return "\n".join(lines)
+    lines += ["", "Column summary:", _column_summary(df).to_string(index=False)]
+    preview = df.head(config.sql_preview_rows)
+    lines += ["", f"First {len(preview)} rows:", preview.to_string(index=False, max_colwidth=100)]
+    if export:
+        # The export holds exactly the rows fetched above, never more
+        location = _export_result(df, tool_name)
+        if location is None:
+            lines += ["", "Failed to save the result."]
+        elif truncated:
+            lines += ["", f"Saved the first {len(df)} rows to {location}. The result was cut off, so the file is incomplete."]
+        else:
+            lines += ["", f"Saved all {len(df)} rows to {location}."]
+    return "\n".join(lines)
+
+
+def _create_query_tool(db: SQLDatabase, tool_name: str):
+    return StructuredTool.from_function(
+        func=functools.partial(sql_query, db, tool_name),
+        name="sql_db_query",
+        description=(
+            "Input to this tool is a detailed and correct SQL query, output is a summary of the result: "
+            "the row count, per-column statistics and the first rows. Large results are cut off at a row "
+            "and size budget, so prefer aggregation and filters. If the query is not correct, an error message "
+            "will be returned. If an error is returned, rewrite the query, check the query, and try again. "
+            "If you encounter an issue with Unknown column 'xxxx' in 'field list', use sql_db_schema to query "
+            "the correct table fields. Set export to true to save the returned rows as CSV in MinIO; the file is "
+            "subject to the same row and size budget, and the output says when it is incomplete."
+        ),
+        args_schema={
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "A detailed and correct SQL query."},
+                "export": {
+                    "type": "boolean",
+                    "description": "Save the returned rows, up to the row and size budget, as a CSV file in MinIO and return its path (default is false).",
+                },
+            },
+            "required": ["query"],
+        },
+        return_direct=False,
+    )
 
 
 def create_sql_tool(tool_name: str):
-    from langchain_community.utilities.sql_database import SQLDatabase
     from langchain_community.agent_toolkits.sql.toolkit import SQLDatabaseToolkit
     from handlers.operator_handlers import get_operator
     from langchain.chat_models import init_chat_model
@@ -23,8 +247,12 @@ def create_sql_tool(tool_name: str):
 
     operator = get_operator("openai")
     os.environ["OPENAI_API_KEY"] = operator.api_key
-    db = SQLDatabase(get_sql_engine(tool_name))
+    db = get_sql_database(tool_name)
     llm = init_chat_model("gpt-4o-mini", model_provider="openai")
 
     toolkit = SQLDatabaseToolkit(db=db, llm=llm)
-    return toolkit.get_tools()
+    # Replace the toolkit's query tool, which renders the whole result set as one string
+    return [
+        _create_query_tool(db, tool_name) if tool.name == "sql_db_query" else tool
+        for tool in toolkit.get_tools()
+    ]
@@ -1,43 +1,169 @@
 import paramiko
+import asyncio
+import codecs
 import json
-import os
+import re
+import threading
+import time
 from langchain_core.tools import StructuredTool
+from langgraph.config import get_config, get_stream_writer
 from utils.minio_connection import MinioStorage
+from utils.log import output_log
 from config.config import config
 from io import StringIO, BytesIO
 
+# hostname -> (host entry, parsed private key); key material never touches disk
+_hosts = {}
+# hostname -> {"client": SSHClient, "last_used": monotonic time, "active": checkouts}
+_connections = {}
+_connections_lock = threading.RLock()
+# hostname -> lock serialising the handshake, so the pool lock is never held while connecting
+_connect_locks = {}
 
-def _establish_ssh_connection(hostname: str):
+# The remote shell prints its PID behind this marker before exec'ing the command
+_PID_MARKER = "__PENG_PID__"
+_PID_LINE = re.compile(rf"{_PID_MARKER}(\d+)\n")
+_POLL_INTERVAL = 0.05
+_RECV_SIZE = 32768
+
+_LANGUAGE_COMMANDS = {
+    "python": "uv run python -",
+    "r": "Rscript -",
+    "bash": "bash -s",
+    "javascript": "node -",
+}
+
+
+def _load_host(hostname: str):
+    if hostname in _hosts:
+        return _hosts[hostname]
     minio = MinioStorage()
-    ssh_data = minio.file_download_to_memory(f"{config.s3_base_path}/ssh_connection.json")
+    ssh_data = minio.file_read_cached(f"{config.s3_base_path}/ssh_connection.json")
     if ssh_data is None:
         return None
     ssh_config = json.loads(BytesIO(ssh_data).read().decode("utf-8"))
     for entry in ssh_config:
         if entry["hostname"] == hostname:
-            minio.file_download(entry["private_key_path"], "temp_private_key", bucket_name=config.s3_bucket)
-            file = ""
-            with open("temp_private_key", "r") as f:
-                file = f.read()
-            os.remove("temp_private_key")
-            key_file_obj = StringIO(file)
+            key_data = minio.file_read_cached(entry["private_key_path"], bucket_name=config.s3_bucket)
+            if key_data is None:
+                return None
+            key_file_obj = StringIO(key_data.decode("utf-8"))
             private_key = paramiko.Ed25519Key.from_private_key(key_file_obj)
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(
-                hostname=entry["IP"],
-                port=entry.get("port", 22),
-                username=entry["user"],
-                pkey=private_key,
-            )
-            return ssh
+            _hosts[hostname] = (entry, private_key)
+            return _hosts[hostname]
     return None
 
+
+def _establish_ssh_connection(hostname: str):
+    host = _load_host(hostname)
+    if host is None:
+        return None
+    entry, private_key = host
+    ssh = paramiko.SSHClient()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    ssh.connect(
+        hostname=entry["IP"],
+        port=entry.get("port", 22),
+        username=entry["user"],
+        pkey=private_key,
+    )
+    transport = ssh.get_transport()
+    if transport is not None:
+        transport.set_keepalive(config.ssh_keepalive_interval)
+    return ssh
+
+
+def _is_alive(ssh) -> bool:
+    transport = ssh.get_transport()
+    return transport is not None and transport.is_active()
+
+
+def _pop_idle_connections(now: float) -> list:
+    """Remove clients nobody is using that have sat idle past the timeout."""
+    idle = []
+    for hostname, pooled in list(_connections.items()):
+        if pooled["active"] == 0 and now - pooled["last_used"] > config.ssh_idle_timeout:
+            output_log(f"Closing idle SSH connection to {hostname}", "debug")
+            idle.append(_connections.pop(hostname)["client"])
+    return idle
+
+
+def _checkout(hostname: str):
+    pooled = _connections.get(hostname)
+    if pooled is None or not _is_alive(pooled["client"]):
+        return None
+    pooled["active"] += 1
+    pooled["last_used"] = time.monotonic()
+    return pooled["client"]
+
+
+def _get_ssh_connection(hostname: str):
+    """Check out a pooled SSH client for the host, connecting if needed.
+
+    Every successful checkout must be paired with ``_release_ssh_connection``;
+    clients that are checked out are never closed as idle.
+    """
+    with _connections_lock:
+        stale = _pop_idle_connections(time.monotonic())
+        ssh = _checkout(hostname)
+        connect_lock = _connect_locks.setdefault(hostname, threading.Lock())
+    for client in stale:
+        client.close()
+    if ssh is not None:
+        return ssh
+    with connect_lock:
+        with _connections_lock:
+            # Another caller may have connected while we waited for the lock
+            ssh = _checkout(hostname)
+            dead = None if ssh is not None else _connections.pop(hostname, None)
+        if ssh is not None:
+            return ssh
+        if dead is not None:
+            dead["client"].close()
+        try:
+            ssh = _establish_ssh_connection(hostname)
+        except Exception as e:
+            output_log(f"Error connecting to SSH host {hostname}: {e}", "error")
+            _hosts.pop(hostname, None)
+            return None
+        if ssh is not None:
+            with _connections_lock:
+                _connections[hostname] = {"client": ssh, "last_used": time.monotonic(), "active": 1}
+        return ssh
+
+
+def _release_ssh_connection(hostname: str, ssh):
+    """Return a checked-out client to the pool and restart its idle clock."""
+    with _connections_lock:
+        pooled = _connections.get(hostname)
+        if pooled is not None and pooled["client"] is ssh:
+            pooled["active"] = max(pooled["active"] - 1, 0)
+            pooled["last_used"] = time.monotonic()
+
+
+def _discard_ssh_connection(hostname: str, ssh):
+    with _connections_lock:
+        pooled = _connections.get(hostname)
+        if pooled is not None and pooled["client"] is ssh:
+            _connections.pop(hostname)
+    ssh.close()
+
+
+def close_ssh_connections():
+    """Close every pooled client; called when the API shuts down."""
+    with _connections_lock:
+        clients = [pooled["client"] for pooled in _connections.values()]
+        _connections.clear()
+    for client in clients:
+        client.close()
+
+
 def execute_ssh_command(hostname: str, command: str, stdin_data: str | None = None):
-    ssh = _establish_ssh_connection(hostname)
+    ssh = _get_ssh_connection(hostname)
     if ssh is None:
         return {"error": "SSH connection could not be established."}
     try:
+        # Each call runs on its own channel of the pooled transport
         stdin, stdout, stderr = ssh.exec_command("source ~/.zshrc\n" + command)
         if stdin_data is not None:
             stdin.write(stdin_data)
@@ -50,33 +176,194 @@ def execute_ssh_command(hostname: str, command: str, stdin_data: str | None = No
         if error:
             return {"error": error}
         return {"output": output}
+    except Exception as e:
+        _discard_ssh_connection(hostname, ssh)
+        return {"error": str(e)}
+    finally:
+        _release_ssh_connection(hostname, ssh)
+
+
+def _open_command_channel(ssh, command: str, stdin_data: str | None, close_stdin: bool = True):
+    channel = ssh.get_transport().open_session()
+    channel.exec_command(f"source ~/.zshrc\necho {_PID_MARKER}$$\nexec {command}")
+    if stdin_data is not None:
+        channel.sendall(stdin_data.encode("utf-8"))
+    if close_stdin:
+        channel.shutdown_write()
+    return channel
+
+
+def _kill_remote_process(ssh, pid: int):
+    """Kill the process group of a runaway command, falling back to the process itself."""
+    try:
+        channel = ssh.get_transport().open_session()
+        channel.settimeout(10)
+        channel.exec_command(f"kill -KILL -- -{pid} 2>/dev/null || kill -KILL {pid}")
+        channel.recv_exit_status()
+        channel.close()
+    except Exception as e:
+        output_log(f"Error killing remote process {pid}: {e}", "error")
+
+
+async def _collect_channel_output(ssh, channel, timeout: float, max_output_bytes: int, on_output=None):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    decoders = {
+        "stdout": codecs.getincrementaldecoder("utf-8")(errors="replace"),
+        "stderr": codecs.getincrementaldecoder("utf-8")(errors="replace"),
+    }
+    output = {"stdout": [], "stderr": []}
+    header = ""
+    pid = None
+    total_bytes = 0
+    truncated = False
+    timed_out = False
+
+    def emit(stream: str, data: bytes):
+        nonlocal header, pid
+        text = decoders[stream].decode(data)
+        if stream == "stdout" and pid is None:
+            # Shell startup files may print before the marker line
+            header += text
+            match = _PID_LINE.search(header)
+            if match is not None:
+                pid, text = int(match.group(1)), header[:match.start()] + header[match.end():]
+            elif len(header) > _RECV_SIZE:
+                pid, text = -1, header
+            else:
+                return
+        if text:
+            output[stream].append(text)
+            if on_output is not None:
+                on_output(stream, text)
+
+    while True:
+        # One read per stream per pass keeps the output limit and the event
+        # loop in check even when the remote end floods the channel
+        received = False
+        if channel.recv_ready():
+            data = channel.recv(_RECV_SIZE)
+            total_bytes += len(data)
+            emit("stdout", data)
+            received = True
+        if channel.recv_stderr_ready():
+            data = channel.recv_stderr(_RECV_SIZE)
+            total_bytes += len(data)
+            emit("stderr", data)
+            received = True
+        if total_bytes > max_output_bytes:
+            truncated = True
+            break
+        if channel.exit_status_ready() and not channel.recv_ready() and not channel.recv_stderr_ready():
+            break
+        if loop.time() > deadline:
+            timed_out = True
+            break
+        await asyncio.sleep(0 if received else _POLL_INTERVAL)
+
+    if pid is None and header:
+        output["stdout"].append(header)
+    if (truncated or timed_out) and pid is not None and pid > 0:
+        await asyncio.to_thread(_kill_remote_process, ssh, pid)
+
+    stdout = "".join(output["stdout"]).strip()
+    stderr = "".join(output["stderr"]).strip()
+    if timed_out:
+        return {"error": "\n".join(part for part in [stdout, stderr, f"Execution timed out after {timeout} seconds and was terminated."] if part)}
+    if truncated:
+        stdout = f"{stdout}\n[Output exceeded {max_output_bytes} bytes; execution was terminated.]"
+    if stderr:
+        return {"error": stderr}
+    return {"output": stdout}
+
+
+async def aexecute_ssh_command(
+    hostname: str,
+    command: str,
+    stdin_data: str | None = None,
+    timeout: float | None = None,
+    max_output_bytes: int | None = None,
+    on_output=None,
+):
+    """Run a command on a pooled connection without blocking the event loop.
+
+    stdout and stderr are passed to ``on_output(stream, text)`` as they arrive.
+    Commands exceeding the wall-clock or output limits are killed.
+    """
+    ssh = await asyncio.to_thread(_get_ssh_connection, hostname)
+    if ssh is None:
+        return {"error": "SSH connection could not be established."}
+    try:
+        channel = await asyncio.to_thread(_open_command_channel, ssh, command, stdin_data)
+    except Exception as e:
+        _discard_ssh_connection(hostname, ssh)
+        return {"error": str(e)}
+    try:
+        return await _collect_channel_output(
+            ssh,
+            channel,
+            timeout or config.ssh_command_timeout,
+            max_output_bytes or config.ssh_max_output_bytes,
+            on_output,
+        )
     except Exception as e:
         return {"error": str(e)}
     finally:
-        ssh.close()
+        channel.close()
+        _release_ssh_connection(hostname, ssh)
 
 
-def code_execution_tool(language: str, code: str):
-    if language.lower() == "python":
-        result = execute_ssh_command(
-            "homelab", "uv run python -", stdin_data=code
+def _tool_progress_writer(tool_name: str):
+    try:
+        writer = get_stream_writer()
+    except Exception:
+        return None
+
+    def on_output(stream: str, text: str):
+        writer({"tool_progress": {"name": tool_name, "stream": stream, "text": text}})
+
+    return on_output
+
+
+def _current_run_id():
+    try:
+        return get_config().get("configurable", {}).get("run_id")
+    except Exception:
+        return None
+
+
+async def acode_execution_tool(language: str, code: str, session: bool = True):
+    command = _LANGUAGE_COMMANDS.get(language.lower())
+    if command is None:
+        return f"Unsupported language: {language}. Supported languages are Python, R, Bash, and JavaScript."
+    run_id = _current_run_id()
+    if language.lower() == "python" and session and run_id is not None:
+        from services.tools.python_sessions import aexecute_python_session
+
+        result = await aexecute_python_session(
+            run_id, code, on_output=_tool_progress_writer("code_execution")
         )
         return result["output"] if "output" in result else result["error"]
-    elif language.lower() == "r":
-        result = execute_ssh_command("homelab", "Rscript -", stdin_data=code)
-        return result["output"] if "output" in result else result["error"]
-    elif language.lower() == "bash":
-        result = execute_ssh_command("homelab", "bash -s", stdin_data=code)
-        return result["output"] if "output" in result else result["error"]
-    elif language.lower() == "javascript":
-        result = execute_ssh_command("homelab", "node -", stdin_data=code)
-        return result["output"] if "output" in result else result["error"]
-    else:
+    result = await aexecute_ssh_command(
+        "homelab",
+        command,
+        stdin_data=code,
+        on_output=_tool_progress_writer("code_execution"),
+    )
+    return result["output"] if "output" in result else result["error"]
+
+
+def code_execution_tool(language: str, code: str, session: bool = True):
+    command = _LANGUAGE_COMMANDS.get(language.lower())
+    if command is None:
         return f"Unsupported language: {language}. Supported languages are Python, R, Bash, and JavaScript."
+    result = execute_ssh_command("homelab", command, stdin_data=code)
+    return result["output"] if "output" in result else result["error"]
 
 
 code_execution = StructuredTool.from_function(
     func=code_execution_tool,
+    coroutine=acode_execution_tool,
     name="code_execution",
     description='''Execute code in various programming languages (Python, R, Bash, JavaScript) on a remote server via SSH. Provide the language and the code to execute.
     You need to be specific about the language. e.g. if you want to execute Python code, you need to set the language to 'python' instead of run it using 'bash'. 
@@ -92,6 +379,10 @@ code_execution = StructuredTool.from_function(
                 "type": "string",
                 "description": "The code to execute.",
             },
+            "session": {
+                "type": "boolean",
+                "description": "Python only. When true (default), the code runs in an interpreter kept alive for the rest of this response, so variables and imports from earlier calls are still available. Set to false to run in a fresh process.",
+            },
         },
         "required": ["language", "code"],
     },
@@ -21,9 +21,9 @@ async def tools_routers(tools_name: List[str]):
             tools += requests_tools
 
         elif tool_name == "email_send_tool":
-            from services.tools.smtp_tools import email_send_tool
+            from services.tools.smtp_tools import email_send_tool, email_status_tool
 
-            tools += [email_send_tool]
+            tools += [email_send_tool, email_status_tool]
         elif tool_name == "minio_tool":
             from services.tools.minio_tools import minio_tool
 
@@ -61,3 +61,10 @@ async def tools_routers(tools_name: List[str]):
             tools += tavily_tools + [wikipedia_search_tool] + [web_crawler_tool]
 
     return tools
+
+
+async def release_tool_sessions(run_id: str):
+    """Tear down per-run tool state once an agent run has finished."""
+    from services.tools.python_sessions import close_python_session
+
+    await close_python_session(run_id)
@@ -6,6 +6,12 @@ from api.api import app
 client = TestClient(app)
 
 class TestApiRouters(unittest.TestCase):
+    def setUp(self):
+        for name in ['check_login_rate_limit', 'reset_login_attempts']:
+            patcher = patch(f'handlers.auth_handlers.{name}')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
     @patch('handlers.auth_handlers.authenticate_user')
     @patch('handlers.auth_handlers.create_access_token')
     def test_login_success(self, mock_create_token, mock_authenticate):
@@ -19,6 +25,10 @@ class TestApiRouters(unittest.TestCase):
         
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {"access_token": "fake_token", "token_type": "bearer"})
+        from handlers import auth_handlers
+
+        auth_handlers.check_login_rate_limit.assert_called_once_with("test_user", "testclient")
+        auth_handlers.reset_login_attempts.assert_called_once_with("test_user", "testclient")
 
     @patch('handlers.auth_handlers.authenticate_user')
     def test_login_fail(self, mock_authenticate):
@@ -48,5 +58,55 @@ class TestApiRouters(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()["user_name"], "new_user")
 
+    @patch('handlers.auth_handlers.authenticate_user')
+    def test_login_rate_limited(self, mock_authenticate):
+        from fastapi import HTTPException
+        from handlers import auth_handlers
+
+        auth_handlers.check_login_rate_limit.side_effect = HTTPException(
+            status_code=429, detail="Too many login attempts", headers={"Retry-After": "60"}
+        )
+        response = client.post(
+            "/api/login",
+            json={"username": "test_user", "password": "password"}
+        )
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["retry-after"], "60")
+        mock_authenticate.assert_not_called()
+
+    def test_memory_page_rejects_invalid_cursor(self):
+        from handlers.auth_handlers import authenticate_request
+
+        app.dependency_overrides[authenticate_request] = lambda: {"user_name": "test_user"}
+        self.addCleanup(app.dependency_overrides.clear)
+
+        response = client.post(
+            "/api/memory/page",
+            json={"user_name": "test_user", "cursor": "not-a-cursor"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_metrics_endpoint_disabled_by_default(self):
+        response = client.get("/api/metrics")
+
+        self.assertEqual(response.status_code, 404)
+
+    @patch('api.routers.metrics_router.config.metrics_enabled', True)
+    def test_metrics_endpoint(self):
+        from utils.metrics import CHAT_STAGE_SECONDS
+
+        CHAT_STAGE_SECONDS.observe(0.01, stage="prompt_assembly")
+        response = client.get("/api/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        self.assertIn('peng_chat_stage_seconds_count{stage="prompt_assembly"}', response.text)
+        self.assertIn("# TYPE peng_mysql_seconds histogram", response.text)
+        self.assertIn('peng_s3_cache_events_total{event="hits"}', response.text)
+        self.assertIn("# TYPE peng_s3_cache_bytes gauge", response.text)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,164 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.pool import StaticPool
+from alembic.script import ScriptDirectory
+from api.setup import BASELINE_REVISION, _migration_lock, alembic_config, run_migrations, shut_down
+from models.db_models import Base
+
+TRANSCRIPT_INDEXES = {
+    "chat": "ix_chat_user_created",
+    "ai_response": "ix_ai_response_chat",
+    "ai_reasoning": "ix_ai_reasoning_chat",
+    "user_input": "ix_user_input_chat",
+    "tool_call": "ix_tool_call_chat",
+    "tool_output": "ix_tool_output_chat",
+}
+
+
+class TestRunMigrations(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        # chat.human_input declares a MySQL collation
+        event.listen(
+            self.engine,
+            "connect",
+            lambda connection, _: connection.create_collation(
+                "utf8mb4_unicode_ci", lambda a, b: (a > b) - (a < b)
+            ),
+        )
+        self.head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+    def _revision(self):
+        with self.engine.connect() as connection:
+            return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+    def _missing_indexes(self):
+        inspector = inspect(self.engine)
+        return {
+            table: name
+            for table, name in TRANSCRIPT_INDEXES.items()
+            if name not in {index["name"] for index in inspector.get_indexes(table)}
+        }
+
+    def test_new_database_is_created_at_head(self):
+        run_migrations(self.engine)
+
+        self.assertEqual(self._revision(), self.head)
+        self.assertEqual(self._missing_indexes(), {})
+
+    def test_existing_database_is_stamped_and_upgraded(self):
+        # A database created by create_all before the indexes existed
+        Base.metadata.create_all(self.engine)
+        with self.engine.begin() as connection:
+            for name in TRANSCRIPT_INDEXES.values():
+                connection.execute(text(f"DROP INDEX {name}"))
+            connection.execute(text("INSERT INTO chat (user_name, human_input, feedback) VALUES ('u', 'hi', 'no_response')"))
+        self.assertEqual(len(self._missing_indexes()), len(TRANSCRIPT_INDEXES))
+
+        run_migrations(self.engine)
+
+        self.assertEqual(self._revision(), self.head)
+        self.assertEqual(self._missing_indexes(), {})
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.execute(text("SELECT COUNT(*) FROM chat")).scalar(), 1)
+
+    def test_new_database_is_built_by_the_migrations(self):
+        with patch("api.setup.command.stamp") as mock_stamp:
+            run_migrations(self.engine)
+
+        mock_stamp.assert_not_called()
+        self.assertTrue(set(Base.metadata.tables) <= set(inspect(self.engine).get_table_names()))
+
+    def test_migrated_schema_matches_the_models(self):
+        run_migrations(self.engine)
+
+        inspector = inspect(self.engine)
+        for name, table in Base.metadata.tables.items():
+            self.assertEqual(
+                {column["name"] for column in inspector.get_columns(name)},
+                set(table.columns.keys()),
+                name,
+            )
+            self.assertTrue(
+                {index.name for index in table.indexes} <= {index["name"] for index in inspector.get_indexes(name)},
+                name,
+            )
+
+    def test_baseline_has_no_later_indexes(self):
+        from alembic import command
+
+        with self.engine.begin() as connection:
+            command.upgrade(alembic_config(connection), BASELINE_REVISION)
+
+        self.assertEqual(len(self._missing_indexes()), len(TRANSCRIPT_INDEXES))
+
+    def test_migrations_are_idempotent(self):
+        run_migrations(self.engine)
+        run_migrations(self.engine)
+        self.assertEqual(self._revision(), self.head)
+
+    def test_downgrade_to_baseline_drops_indexes(self):
+        from alembic import command
+
+        run_migrations(self.engine)
+        with self.engine.begin() as connection:
+            command.downgrade(alembic_config(connection), BASELINE_REVISION)
+
+        self.assertEqual(self._revision(), BASELINE_REVISION)
+        self.assertEqual(len(self._missing_indexes()), len(TRANSCRIPT_INDEXES))
+
+
+class TestMigrationLock(unittest.TestCase):
+    def _connection(self, acquired):
+        connection = MagicMock()
+        connection.dialect.name = "mysql"
+        connection.execute.return_value.scalar.return_value = acquired
+        return connection
+
+    def _statements(self, connection):
+        return [str(call.args[0]) for call in connection.execute.call_args_list]
+
+    def test_mysql_lock_is_held_around_the_migrations(self):
+        connection = self._connection(1)
+
+        with _migration_lock(connection):
+            self.assertEqual(len(self._statements(connection)), 1)
+
+        statements = self._statements(connection)
+        self.assertIn("GET_LOCK", statements[0])
+        self.assertIn("RELEASE_LOCK", statements[1])
+
+    def test_lock_timeout_raises(self):
+        connection = self._connection(0)
+
+        with self.assertRaises(RuntimeError):
+            with _migration_lock(connection):
+                self.fail("migrations ran without the lock")
+        self.assertEqual(len(self._statements(connection)), 1)
+
+    def test_other_dialects_take_no_lock(self):
+        connection = MagicMock()
+        connection.dialect.name = "sqlite"
+
+        with _migration_lock(connection):
+            pass
+        connection.execute.assert_not_called()
+
+
+class TestShutDown(unittest.IsolatedAsyncioTestCase):
+    @patch("services.tools.smtp_tools.email_worker")
+    @patch("services.tools.mcp_tools.close_mcp_sessions", new_callable=AsyncMock)
+    @patch("services.tools.ssh_tools.close_ssh_connections")
+    async def test_shut_down_closes_pooled_connections(self, mock_close_ssh, mock_close_mcp, mock_email_worker):
+        await shut_down()
+
+        mock_close_ssh.assert_called_once()
+        mock_close_mcp.assert_awaited_once()
+        mock_email_worker.stop.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestChatLoadBenchmark(unittest.TestCase):
+    def _run(self, endpoint):
+        with tempfile.TemporaryDirectory() as directory:
+            # A separate process, since the benchmark swaps the database engine and clients
+            return subprocess.run(
+                [
+                    sys.executable, "-m", "benchmark.bench_chat_load",
+                    "--clients", "1", "--requests", "1", "--scenarios", "text",
+                    "--endpoint", endpoint, "--output", os.path.join(directory, "result.json"),
+                ],
+                cwd=SERVER_DIR, capture_output=True, text=True, timeout=300,
+            )
+
+    def test_failing_model_fails_the_run(self):
+        result = self._run("mock://?error=model%20down")
+
+        self.assertEqual(result.returncode, 1, result.stderr)
+        self.assertIn("text/chat: 0 requests, 2 errors", result.stdout)
+        self.assertIn("text/chat_completions: 0 requests, 2 errors", result.stdout)
+        self.assertIn("ChatError: Error: model down", result.stdout)
+
+    def test_healthy_run_succeeds(self):
+        result = self._run("mock://?tokens=3")
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("text/chat: 1 requests, 0 errors", result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
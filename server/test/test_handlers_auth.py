@@ -1,27 +1,106 @@
 import unittest
 from unittest.mock import patch, MagicMock
-from handlers.auth_handlers import authenticate_user, create_access_token, authenticate_request
+from handlers import auth_handlers
+from handlers.auth_handlers import authenticate_user, create_access_token, authenticate_request, revoke_token
 from fastapi import HTTPException
 import jwt
+import time
 from config.config import config
 
 class TestAuthHandlers(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.revoked = {}
+        self.mock_redis = MagicMock()
+        self.mock_redis.exists.side_effect = lambda key: int(key in self.revoked)
+        self.mock_redis.set.side_effect = lambda key, value, ex=None: self.revoked.__setitem__(key, ex)
+        patcher = patch.object(auth_handlers.redis_cache, "client", self.mock_redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        auth_handlers._verified_tokens.clear()
+
+    def _request(self, token):
+        mock_request = MagicMock()
+        mock_request.headers.get.return_value = f"Bearer {token}"
+        return mock_request
+
     @patch('handlers.auth_handlers.get_table_record')
-    @patch('handlers.auth_handlers.verify_password')
-    def test_authenticate_user_success(self, mock_verify, mock_get_record):
+    @patch('handlers.auth_handlers.averify_password')
+    async def test_authenticate_user_success(self, mock_verify, mock_get_record):
         mock_user = {"user_name": "test", "password": "hashed_password"}
         mock_get_record.return_value = mock_user
         mock_verify.return_value = True
         
-        result = authenticate_user("test", "plain_password")
+        result = await authenticate_user("test", "plain_password")
         self.assertEqual(result, mock_user)
 
     @patch('handlers.auth_handlers.get_table_record')
-    def test_authenticate_user_fail(self, mock_get_record):
+    async def test_authenticate_user_fail(self, mock_get_record):
         mock_get_record.return_value = None
-        result = authenticate_user("nonexistent", "pass")
+        result = await authenticate_user("nonexistent", "pass")
         self.assertIsNone(result)
 
+    @patch('handlers.auth_handlers.get_table_record')
+    async def test_password_hash_round_trip_in_pool(self, mock_get_record):
+        with patch.object(config, "bcrypt_rounds", 4):
+            hashed = await auth_handlers.aget_password_hash("secret")
+        self.assertTrue(hashed.startswith("$2b$04$"))
+        self.assertTrue(auth_handlers.verify_password("secret", hashed))
+        mock_get_record.return_value = {"user_name": "test", "password": hashed}
+        self.assertIsNone(await authenticate_user("test", "wrong"))
+        self.assertIsNotNone(await authenticate_user("test", "secret"))
+
+    def test_login_rate_limit(self):
+        counters = {}
+        pipe = MagicMock()
+        results = []
+        pipe.set.side_effect = lambda key, value, ex, nx: results.append(counters.setdefault(key, value) is value)
+        def incr(key):
+            counters[key] += 1
+            results.append(counters[key])
+        pipe.incr.side_effect = incr
+        pipe.ttl.side_effect = lambda key: results.append(30)
+        def execute():
+            executed = list(results)
+            results.clear()
+            return executed
+        pipe.execute.side_effect = execute
+        self.mock_redis.pipeline.return_value = pipe
+
+        with patch.object(config, "login_rate_limit_user", 2), patch.object(config, "login_rate_limit_ip", 3):
+            auth_handlers.check_login_rate_limit("test", "1.2.3.4")
+            auth_handlers.check_login_rate_limit("test", "1.2.3.4")
+            with self.assertRaises(HTTPException) as cm:
+                auth_handlers.check_login_rate_limit("test", "1.2.3.4")
+            self.assertEqual(cm.exception.status_code, 429)
+            self.assertEqual(cm.exception.headers["Retry-After"], "30")
+
+            # The same user from another address is not locked out
+            auth_handlers.check_login_rate_limit("test", "5.6.7.8")
+
+            # Another user from the same IP still hits the IP limit
+            with self.assertRaises(HTTPException):
+                auth_handlers.check_login_rate_limit("other", "1.2.3.4")
+
+        # Guesses for one account spread over many addresses hit the account limit
+        counters.clear()
+        with patch.object(config, "login_rate_limit_user", 2), patch.object(config, "login_rate_limit_account", 4):
+            for i in range(4):
+                auth_handlers.check_login_rate_limit("victim", f"10.0.0.{i}")
+            with self.assertRaises(HTTPException) as cm:
+                auth_handlers.check_login_rate_limit("victim", "10.0.0.99")
+            self.assertEqual(cm.exception.status_code, 429)
+            self.assertEqual(counters["auth:login:user:victim"], 5)
+
+    def test_reset_login_attempts_clears_user_and_ip_counter(self):
+        auth_handlers.reset_login_attempts("test", "1.2.3.4")
+        self.mock_redis.delete.assert_called_once_with("auth:login:user:test:1.2.3.4")
+
+    def test_login_rate_limit_fails_open(self):
+        import redis
+
+        self.mock_redis.pipeline.return_value.execute.side_effect = redis.ConnectionError("down")
+        auth_handlers.check_login_rate_limit("test", "1.2.3.4")
+
     def test_create_access_token(self):
         token = create_access_token({"sub": "test"}, 1)
         payload = jwt.decode(token, config.jwt_secret_key, algorithms=["HS256"])
@@ -42,5 +121,93 @@ class TestAuthHandlers(unittest.IsolatedAsyncioTestCase):
             await authenticate_request(mock_request)
         self.assertEqual(cm.exception.status_code, 401)
 
+    async def test_authenticate_request_uses_verified_cache(self):
+        token = create_access_token({"sub": "test"}, None)
+        with patch('handlers.auth_handlers.jwt.decode', wraps=jwt.decode) as mock_decode:
+            for _ in range(3):
+                result = await authenticate_request(self._request(token))
+                self.assertEqual(result["username"], "test")
+        mock_decode.assert_called_once()
+        self.assertEqual(self.mock_redis.exists.call_count, 3)
+
+    async def test_authenticate_request_expired_token(self):
+        token = jwt.encode({"sub": "test", "exp": int(time.time()) - 10}, config.jwt_secret_key, algorithm="HS256")
+        with self.assertRaises(HTTPException) as cm:
+            await authenticate_request(self._request(token))
+        self.assertEqual(cm.exception.status_code, 401)
+
+    async def test_cached_token_expires(self):
+        token = create_access_token({"sub": "test"}, 1)
+        await authenticate_request(self._request(token))
+        token_hash = auth_handlers._token_hash(token)
+        auth_handlers._verified_tokens[token_hash] = ("test", time.time() - 1)
+
+        self.assertIsNone(auth_handlers._get_verified_token(token_hash))
+        self.assertNotIn(token_hash, auth_handlers._verified_tokens)
+
+    async def test_revoked_token_is_rejected(self):
+        token = create_access_token({"sub": "test"}, None)
+        await authenticate_request(self._request(token))
+        revoke_token(token)
+        with self.assertRaises(HTTPException) as cm:
+            await authenticate_request(self._request(token))
+        self.assertEqual(cm.exception.status_code, 401)
+
+    def test_revocation_expires_with_the_token(self):
+        token = create_access_token({"sub": "test"}, 1)
+
+        revoke_token(token)
+
+        ttl = self.revoked[f"auth:revoked:{auth_handlers._token_hash(token)}"]
+        self.assertAlmostEqual(ttl, 24 * 3600, delta=5)
+
+    def test_revocation_reports_redis_failure(self):
+        token = create_access_token({"sub": "test"}, None)
+        self.mock_redis.set.side_effect = auth_handlers.redis.ConnectionError("down")
+
+        self.assertFalse(revoke_token(token))
+
+    def test_revoking_an_invalid_token_is_a_no_op(self):
+        revoke_token("not-a-jwt")
+        self.assertEqual(self.revoked, {})
+
+    async def test_redis_outage_fails_open(self):
+        token = create_access_token({"sub": "test"}, None)
+        self.mock_redis.exists.side_effect = auth_handlers.redis.ConnectionError("down")
+
+        result = await authenticate_request(self._request(token))
+
+        self.assertEqual(result["username"], "test")
+
+    def test_migrate_revoked_tokens(self):
+        self.mock_redis.type.return_value = "set"
+        self.mock_redis.smembers.return_value = {"abc"}
+        pipe = self.mock_redis.pipeline.return_value
+
+        auth_handlers.migrate_revoked_tokens()
+
+        pipe.set.assert_called_once_with("auth:revoked:abc", "1")
+        pipe.delete.assert_called_once_with("auth:revoked")
+        pipe.execute.assert_called_once()
+
+    def test_verified_cache_is_bounded(self):
+        with patch.object(config, "auth_token_cache_size", 2):
+            for i in range(3):
+                auth_handlers._cache_verified_token(f"hash{i}", "test", time.time() + 60)
+        self.assertEqual(list(auth_handlers._verified_tokens), ["hash1", "hash2"])
+
+    @patch('handlers.user_handlers.update_table_record')
+    @patch('handlers.user_handlers.get_table_record')
+    def test_regenerate_token_revokes_old_token(self, mock_get_record, mock_update):
+        from handlers.user_handlers import regenerate_user_token
+
+        old_token = create_access_token({"sub": "test"}, None)
+        mock_get_record.return_value = {"user_name": "test", "api_token": old_token}
+
+        result = regenerate_user_token("test")
+
+        self.assertIn(f"auth:revoked:{auth_handlers._token_hash(old_token)}", self.revoked)
+        self.assertNotIn(f"auth:revoked:{auth_handlers._token_hash(result['api_token'])}", self.revoked)
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,8 @@
 import unittest
-from unittest.mock import patch, MagicMock
-from handlers.chat_handlers import _generate_prompt_params, chat_handler
+from unittest.mock import AsyncMock, patch, MagicMock
+from handlers.chat_handlers import _generate_prompt_params, chat_completions_handler, chat_handler, internal_completion
+from utils.metrics import CHAT_REQUESTS
+import asyncio
 from models.chat_config import ChatConfig
 import json
 
@@ -50,5 +52,78 @@ class TestChatHandlers(unittest.IsolatedAsyncioTestCase):
         self.assertTrue(any("hello" in str(r.get("chunk")) for r in results))
         self.assertTrue(any(r.get("done") is True for r in results))
 
+    @patch('handlers.chat_handlers.MysqlConnect')
+    @patch('handlers.chat_handlers.PengAgent')
+    @patch('handlers.chat_handlers._generate_prompt_params')
+    async def test_chat_handler_streams_tool_progress(self, mock_gen_params, mock_agent_class, mock_mysql_class):
+        mock_mysql = mock_mysql_class.return_value
+        mock_gen_params.return_value = ([{"role": "user", "content": "hi"}], 123)
+
+        async def mock_astream(*args, **kwargs):
+            yield {"tool_progress": {"name": "code_execution", "stream": "stdout", "text": "step 1\n"}}
+
+        mock_agent_class.return_value.astream.side_effect = mock_astream
+
+        chat_config = ChatConfig(operator="op", base_model="model", tools_name=[])
+        results = [json.loads(chunk) async for chunk in chat_handler("user", "hi", "kb", [], chat_config)]
+
+        self.assertIn({"chunk": "step 1\n", "type": "tool_progress", "done": False}, results)
+        mock_mysql.create_record.assert_not_called()
+    @patch('handlers.chat_handlers.MysqlConnect')
+    @patch('handlers.chat_handlers.PengAgent')
+    @patch('handlers.chat_handlers._generate_prompt_params')
+    async def test_client_disconnect_counted_as_cancelled(self, mock_gen_params, mock_agent_class, mock_mysql_class):
+        mock_gen_params.return_value = ([{"role": "user", "content": "hi"}], 123)
+
+        async def mock_astream(*args, **kwargs):
+            yield {"call_model": {"messages": {"type": "text", "text": "hello"}}}
+            await asyncio.sleep(10)
+
+        mock_agent_class.return_value.astream.side_effect = mock_astream
+        chat_config = ChatConfig(operator="op-cancel", base_model="model", tools_name=[])
+
+        stream = chat_handler("user", "hi", "kb", [], chat_config)
+        await stream.__anext__()
+        await stream.__anext__()
+        await stream.aclose()
+
+        self.assertEqual(CHAT_REQUESTS.value(operator="op-cancel", model="model", status="cancelled"), 1)
+        self.assertEqual(CHAT_REQUESTS.value(operator="op-cancel", model="model", status="ok"), 0)
+
+    @patch('handlers.chat_handlers.MysqlConnect')
+    @patch('handlers.chat_handlers.PengAgent')
+    @patch('handlers.chat_handlers._generate_prompt_params')
+    async def test_failures_are_flagged(self, mock_gen_params, mock_agent_class, mock_mysql_class):
+        mock_gen_params.return_value = ([{"role": "user", "content": "hi"}], 123)
+
+        async def mock_astream(*args, **kwargs):
+            raise RuntimeError("model down")
+            yield
+
+        mock_agent_class.return_value.astream.side_effect = mock_astream
+        mock_agent_class.return_value.ainvoke = AsyncMock(side_effect=RuntimeError("model down"))
+        chat_config = ChatConfig(operator="op", base_model="model", tools_name=[])
+
+        results = [json.loads(chunk) async for chunk in chat_handler("user", "hi", "kb", [], chat_config)]
+        self.assertIn({"chunk": "Error: model down", "type": "output_text", "done": False, "error": True}, results)
+
+        messages = await chat_completions_handler("user", "hi", None, None, chat_config)
+        self.assertTrue(messages[-1].response_metadata["error"])
+
+    @patch('handlers.chat_handlers.MysqlConnect')
+    @patch('handlers.chat_handlers.PengAgent')
+    @patch('handlers.chat_handlers._generate_prompt_params')
+    async def test_internal_completions_are_not_counted(self, mock_gen_params, mock_agent_class, mock_mysql_class):
+        mock_gen_params.return_value = ([{"role": "user", "content": "hi"}], 123)
+        mock_agent_class.return_value.ainvoke = AsyncMock(return_value={"messages": []})
+        chat_config = ChatConfig(operator="op-internal", base_model="model", tools_name=[])
+
+        await internal_completion("user", "shorten", None, None, chat_config)
+        self.assertEqual(CHAT_REQUESTS.value(operator="op-internal", model="model", status="ok"), 0)
+
+        await chat_completions_handler("user", "hi", None, None, chat_config)
+        self.assertEqual(CHAT_REQUESTS.value(operator="op-internal", model="model", status="ok"), 1)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,7 +1,15 @@
 import unittest
 from unittest.mock import patch
-from handlers.file_handlers import file_uploader, file_upload_frontend_with_name, _safe_file_name, _extension_from_content_type
+from handlers.file_handlers import (
+    file_uploader,
+    file_upload_frontend_with_name,
+    file_upload_stream,
+    create_presigned_upload,
+    _safe_file_name,
+    _extension_from_content_type,
+)
 import base64
+import io
 
 class TestFileHandlers(unittest.TestCase):
     @patch('handlers.file_handlers.MinioStorage')
@@ -31,5 +39,54 @@ class TestFileHandlers(unittest.TestCase):
         self.assertTrue(result[1])
         mock_uploader.assert_called_once()
 
+    @patch('handlers.file_handlers.file_uploader')
+    def test_file_upload_frontend_with_name_data_url(self, mock_uploader):
+        mock_uploader.return_value = ["path", True]
+        content = "data:image/png;base64," + base64.b64encode(b"png").decode("utf-8")
+
+        file_upload_frontend_with_name(content, "text/plain", None, "user")
+
+        decoded, content_type, upload_path = mock_uploader.call_args[0][:3]
+        self.assertEqual(decoded, b"png")
+        self.assertEqual(content_type, "image/png")
+        self.assertTrue(upload_path.endswith(".png"))
+
+    @patch('handlers.file_handlers.MinioStorage')
+    def test_file_upload_stream(self, mock_minio_class):
+        mock_minio = mock_minio_class.return_value
+        mock_minio.file_upload_from_fileobj.return_value = True
+        file_obj = io.BytesIO(b"%PDF-1.4")
+
+        upload_path, success = file_upload_stream(file_obj, "application/pdf", "report.pdf", "user")
+
+        self.assertTrue(success)
+        self.assertTrue(upload_path.endswith("/report.pdf"))
+        args = mock_minio.file_upload_from_fileobj.call_args[0]
+        self.assertIs(args[0], file_obj)
+        self.assertEqual(args[2], "application/pdf")
+
+    @patch('handlers.file_handlers.MinioStorage')
+    def test_file_upload_stream_failure(self, mock_minio_class):
+        mock_minio_class.return_value.file_upload_from_fileobj.return_value = False
+
+        result = file_upload_stream(io.BytesIO(b"data"), "image/png", None, "user")
+        self.assertEqual(result, ["", False])
+
+    @patch('handlers.file_handlers.MinioStorage')
+    def test_create_presigned_upload(self, mock_minio_class):
+        mock_minio = mock_minio_class.return_value
+        mock_minio.generate_presigned_upload_url.return_value = "https://s3/upload?sig=1"
+
+        result = create_presigned_upload("image/png", None, "user")
+
+        self.assertTrue(result["success"])
+        self.assertEqual(result["upload_url"], "https://s3/upload?sig=1")
+        self.assertEqual(result["method"], "PUT")
+        self.assertEqual(result["headers"], {"Content-Type": "image/png"})
+
+    def test_create_presigned_upload_missing_content_type(self):
+        result = create_presigned_upload("", None, "user")
+        self.assertFalse(result["success"])
+
 if __name__ == '__main__':
     unittest.main()
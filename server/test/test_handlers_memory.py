@@ -1,33 +1,101 @@
 import unittest
-from unittest.mock import patch, MagicMock
-from handlers.memory_handlers import get_memory
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from handlers.memory_handlers import _encode_cursor, get_memory, get_memory_page
+from models.db_models import AIResponse, Base, Chat, UserInput
+
 
 class TestMemoryHandlers(unittest.TestCase):
-    @patch('handlers.memory_handlers.MysqlConnect')
-    def test_get_memory_success(self, mock_mysql_class):
-        mock_mysql = mock_mysql_class.return_value
-        mock_session = mock_mysql.get_session.return_value.__enter__.return_value
-        
-        # Mocking row objects returned by session.execute
-        mock_row = MagicMock()
-        mock_row.id = 1
-        mock_row.user_name = "test_user"
-        mock_row.type = "chat"
-        mock_row.base_model = "gpt-4"
-        mock_row.human_input = "hi"
-        mock_row.other_input = ""
-        mock_row.ai_response = "hello"
-        mock_row.created_at = "2023-01-01"
-        
-        mock_session.execute.return_value = [mock_row]
-        
+    def setUp(self):
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        # chat.human_input declares a MySQL collation
+        event.listen(
+            engine,
+            "connect",
+            lambda connection, _: connection.create_collation(
+                "utf8mb4_unicode_ci", lambda a, b: (a > b) - (a < b)
+            ),
+        )
+        Base.metadata.create_all(engine)
+        self.session_maker = sessionmaker(bind=engine)
+        patcher = patch("utils.mysql_connect.get_session_maker", return_value=self.session_maker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _add_chat(self, session, user_name, created_at, responses=("hello",), inputs=()):
+        chat = Chat(user_name=user_name, type="chat", base_model="gpt-4", human_input="hi", created_at=created_at)
+        session.add(chat)
+        session.flush()
+        for response in responses:
+            session.add(AIResponse(chat_id=chat.id, ai_response=response))
+        for location in inputs:
+            session.add(UserInput(chat_id=chat.id, input_type="image", input_location=location))
+        return chat.id
+
+    def test_get_memory_success(self):
+        with self.session_maker() as session:
+            self._add_chat(session, "test_user", datetime(2023, 1, 1), responses=("first", "hello"), inputs=("a.png", "b.png"))
+            self._add_chat(session, "test_user", datetime(2023, 1, 2), responses=())
+            self._add_chat(session, "other_user", datetime(2023, 1, 3))
+            session.commit()
+
         result = get_memory("test_user")
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0]["ai_response"], "hello")
+        self.assertEqual(result[0]["other_input"], "a.png")
+        self.assertEqual(result[0]["created_at"], datetime(2023, 1, 1))
 
     def test_get_memory_empty_user(self):
         result = get_memory("")
         self.assertEqual(result, [])
 
+    def test_memory_pages_follow_cursor(self):
+        start = datetime(2023, 1, 1)
+        with self.session_maker() as session:
+            # Two chats share a timestamp so the id tiebreak is exercised
+            ids = [self._add_chat(session, "test_user", start + timedelta(minutes=i // 2)) for i in range(7)]
+            self._add_chat(session, "test_user", start + timedelta(days=1), responses=())
+            session.commit()
+
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            page = get_memory_page("test_user", limit=3, cursor=cursor)
+            pages += 1
+            seen += [item["id"] for item in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, sorted(ids, reverse=True))
+
+    def test_chats_without_timestamp_are_skipped(self):
+        with self.session_maker() as session:
+            now = datetime(2024, 1, 1)
+            ids = [self._add_chat(session, "test_user", now - timedelta(minutes=i)) for i in range(3)]
+            undated = self._add_chat(session, "test_user", now)
+            # The column default fills in None, so clear it afterwards
+            session.query(Chat).filter(Chat.id == undated).update({"created_at": None})
+            session.commit()
+
+        page = get_memory_page("test_user", limit=2)
+        self.assertEqual([item["id"] for item in page["items"]], ids[:2])
+        page = get_memory_page("test_user", limit=2, cursor=page["next_cursor"])
+        self.assertEqual([item["id"] for item in page["items"]], ids[2:])
+        self.assertIsNone(page["next_cursor"])
+
+    def test_invalid_cursor(self):
+        for cursor in ["not-a-cursor", _encode_cursor(None, 1), _encode_cursor("2024-01-01", "x"), 5]:
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                get_memory_page("test_user", cursor=cursor)
+
+
 if __name__ == '__main__':
     unittest.main()
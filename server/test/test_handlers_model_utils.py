@@ -111,5 +111,21 @@ class TestModelUtils(unittest.TestCase):
             get_embedding_instance("text-embedding-3-small", "openai")
             mock_emb.assert_called_once()
 
+    @patch('handlers.model_utils.get_operator')
+    @patch('handlers.model_utils.get_reasoning_effect')
+    def test_get_model_instance_mock(self, mock_reasoning, mock_get_operator):
+        mock_operator = MagicMock()
+        mock_operator.runtime = "mock"
+        mock_operator.endpoint = "mock://?ttft=0.2&tps=40"
+        mock_get_operator.return_value = mock_operator
+        mock_reasoning.return_value = None
+
+        model = get_model_instance("mock-chat", "mock")
+
+        self.assertEqual(model.model_name, "mock-chat")
+        self.assertEqual(model.time_to_first_token, 0.2)
+        self.assertEqual(model.tokens_per_second, 40)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,6 @@
 import unittest
-from unittest.mock import patch
-from handlers.user_handlers import get_user_profile, update_user_profile
+from unittest.mock import MagicMock, patch
+from handlers.user_handlers import get_user_profile, regenerate_user_token, update_user_profile
 from models.user_models import UserUpdate
 from fastapi import HTTPException
 import json
@@ -38,5 +38,34 @@ class TestUserHandlers(unittest.TestCase):
         self.assertEqual(result["message"], "User profile updated successfully")
         mock_update.assert_called_once()
 
+class TestRegenerateUserToken(unittest.TestCase):
+    def setUp(self):
+        patcher = patch("handlers.user_handlers.get_table_record", return_value={"user_name": "test", "api_token": "old"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = MagicMock()
+        for name in ["revoke_token", "update_table_record"]:
+            patcher = patch(f"handlers.user_handlers.{name}")
+            self.calls.attach_mock(patcher.start(), name)
+            self.addCleanup(patcher.stop)
+
+    def test_old_token_revoked_before_new_one_is_saved(self):
+        self.calls.revoke_token.return_value = True
+
+        result = regenerate_user_token("test")
+
+        self.assertEqual([call[0] for call in self.calls.mock_calls], ["revoke_token", "update_table_record"])
+        self.assertEqual(self.calls.update_table_record.call_args.args[1], {"api_token": result["api_token"]})
+
+    def test_failed_revocation_keeps_the_old_token(self):
+        self.calls.revoke_token.return_value = False
+
+        with self.assertRaises(HTTPException) as cm:
+            regenerate_user_token("test")
+
+        self.assertEqual(cm.exception.status_code, 503)
+        self.calls.update_table_record.assert_not_called()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import tool
+import services.chat_models.mock_langchain as mock_langchain
+from services.chat_models.mock_langchain import NOOP_TOOL, CustomMockLLM
+from services.peng_agent import AgentState, PengAgent
+
+
+@tool
+def lookup(query: str = "") -> str:
+    """Look something up."""
+    return f"result for {query}"
+
+
+async def collect(model, messages):
+    return [chunk.content_blocks[0] async for chunk in model.astream(messages) if chunk.content_blocks]
+
+
+class TestMockLLM(unittest.TestCase):
+    def test_endpoint_parameters(self):
+        model = CustomMockLLM.from_endpoint("mock://?ttft=0.5&tps=20&tokens=3&reasoning=2&tool_calls=1&tool=lookup", "mock-chat")
+        self.assertEqual(model.time_to_first_token, 0.5)
+        self.assertEqual(model.tokens_per_second, 20)
+        self.assertEqual((model.response_tokens, model.reasoning_tokens, model.tool_calls), (3, 2, 1))
+        self.assertEqual(model.tool_name, "lookup")
+        self.assertIsNone(CustomMockLLM.from_endpoint(None, "mock-chat").transcript)
+
+    def test_stream_is_deterministic_blocks(self):
+        model = CustomMockLLM.from_endpoint("mock://?tokens=4&reasoning=2", "mock-chat")
+
+        first = asyncio.run(collect(model, [HumanMessage("hello")]))
+        second = asyncio.run(collect(model, [HumanMessage("hello")]))
+
+        self.assertEqual(first, second)
+        self.assertEqual([block["type"] for block in first], ["reasoning"] * 2 + ["text"] * 4)
+
+    def test_time_to_first_token(self):
+        model = CustomMockLLM.from_endpoint("mock://?ttft=0.1&tokens=2", "mock-chat")
+
+        start = time.perf_counter()
+        model.invoke([HumanMessage("hello")])
+
+        self.assertGreaterEqual(time.perf_counter() - start, 0.1)
+
+    def test_tool_call_rounds(self):
+        model = CustomMockLLM.from_endpoint("mock://?tokens=2&tool_calls=1&tool=lookup", "mock-chat").bind_tools([lookup])
+
+        first = asyncio.run(collect(model, [HumanMessage("hello")]))
+        self.assertEqual(first[-1]["type"], "tool_call")
+        self.assertEqual(first[-1]["name"], "lookup")
+
+        history = [HumanMessage("hello"), AIMessage(content_blocks=[first[-1]]), ToolMessage("done", tool_call_id=first[-1]["id"])]
+        second = asyncio.run(collect(model, history))
+        self.assertEqual({block["type"] for block in second}, {"text"})
+
+    def test_unnamed_tool_call_goes_to_noop(self):
+        model = CustomMockLLM.from_endpoint("mock://?tokens=2&tool_calls=1", "mock-chat").bind_tools([lookup])
+
+        blocks = asyncio.run(collect(model, [HumanMessage("hello")]))
+
+        self.assertEqual(blocks[-1]["name"], NOOP_TOOL)
+
+    def test_transcript_outside_benchmark_dir_is_refused(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(mock_langchain, "TRANSCRIPT_DIR", directory):
+            with self.assertRaises(ValueError):
+                CustomMockLLM.from_endpoint("mock:///../secrets.json", "mock-chat")
+
+    def test_transcript_replay(self):
+        turns = [
+            {"reasoning": "need data", "tool_call": {"name": "lookup", "args": {"query": "x"}, "id": "call_1"}},
+            {"text": "found it"},
+        ]
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(mock_langchain, "TRANSCRIPT_DIR", directory):
+            with open(os.path.join(directory, "transcript.json"), "w") as f:
+                json.dump(turns, f)
+            model = CustomMockLLM.from_endpoint("mock:///transcript.json", "mock-chat")
+
+        result = model.invoke([HumanMessage("hello")])
+        self.assertEqual(result.content_blocks[-1]["args"], {"query": "x"})
+
+        history = [HumanMessage("hello"), result, ToolMessage("x", tool_call_id="call_1")]
+        self.assertEqual(model.invoke(history).content_blocks[0]["text"], "found it")
+
+    def test_agent_runs_against_mock(self):
+        model = CustomMockLLM.from_endpoint("mock://?tokens=5&reasoning=1", "mock-chat")
+        with patch("handlers.model_utils.get_model_instance", return_value=model):
+            agent = PengAgent("user", "mock", "mock/mock-chat", [])
+            result = asyncio.run(agent.ainvoke(AgentState(messages=[HumanMessage("hello")])))
+
+        self.assertEqual(len(result["messages"][-1].content_blocks[0]["text"].split()), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+import services.long_term_memory as long_term_memory
+from services.long_term_memory import (
+    LT_MEMORY_LOCK_KEY,
+    LT_MEMORY_WATERMARK_KEY,
+    LongTermMemoryScheduler,
+    extract_user_memory,
+    merge_facts,
+    parse_facts,
+    run_extraction,
+)
+from models.db_models import Base, Chat
+
+
+class TestFacts(unittest.TestCase):
+    def test_parse_facts(self):
+        self.assertEqual(parse_facts("User prefer python; User uses uv;\n"), ["User prefer python", "User uses uv"])
+        self.assertEqual(parse_facts("  "), [])
+
+    def test_merge_dedupes_and_keeps_newest(self):
+        merged = merge_facts(["User prefer python"], ["user prefer  Python.", "User uses uv"], 10)
+        self.assertEqual(merged, ["User prefer python", "User uses uv"])
+        self.assertEqual(merge_facts(["a", "b"], ["c"], 2), ["b", "c"])
+
+
+class TestExtraction(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        # chat.human_input declares a MySQL collation
+        event.listen(
+            engine,
+            "connect",
+            lambda connection, _: connection.create_collation(
+                "utf8mb4_unicode_ci", lambda a, b: (a > b) - (a < b)
+            ),
+        )
+        Base.metadata.create_all(engine)
+        self.session_maker = sessionmaker(bind=engine)
+        patcher = patch("utils.mysql_connect.get_session_maker", return_value=self.session_maker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.watermarks = {}
+        mock_redis = MagicMock()
+        mock_redis.hgetall.side_effect = lambda key: dict(self.watermarks)
+        mock_redis.hget.side_effect = lambda key, field: self.watermarks.get(field)
+        mock_redis.hset.side_effect = lambda key, field, value: self.watermarks.__setitem__(field, str(value))
+        patcher = patch.object(long_term_memory.redis_cache, "client", mock_redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.users = {"alice": {"user_name": "alice", "long_term_memory": json.dumps(["User prefer python"])}}
+        patcher = patch("services.long_term_memory.get_table_record", side_effect=lambda table, name: self.users.get(name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch("services.long_term_memory.update_table_record")
+        self.mock_update = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch("services.long_term_memory._extract", new_callable=AsyncMock)
+        self.mock_extract = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _add_chats(self, user_name, *inputs, age=timedelta(minutes=5)):
+        with self.session_maker() as session:
+            chats = [Chat(user_name=user_name, type="chat", base_model="gpt-4", human_input=text, created_at=datetime.now() - age) for text in inputs]
+            session.add_all(chats)
+            session.commit()
+            return [chat.id for chat in chats]
+
+    def test_only_chats_after_watermark_are_read(self):
+        first = self._add_chats("alice", "I use uv")
+        self.mock_extract.return_value = ["User uses uv", "user prefer python"]
+
+        added = asyncio.run(extract_user_memory("alice"))
+
+        self.assertEqual(added, 1)
+        self.mock_update.assert_called_once_with(
+            "user", {"long_term_memory": json.dumps(["User prefer python", "User uses uv"])}, {"user_name": "alice"}, "user_name"
+        )
+        self.assertEqual(self.watermarks["alice"], str(first[-1]))
+
+        self.mock_extract.reset_mock()
+        second = self._add_chats("alice", "I deploy with docker")
+        self.mock_extract.return_value = []
+        asyncio.run(extract_user_memory("alice"))
+
+        chats = self.mock_extract.await_args.args[2]
+        self.assertEqual([chat["id"] for chat in chats], second)
+        self.assertEqual(self.watermarks["alice"], str(second[-1]))
+
+    def test_nothing_new_skips_model(self):
+        ids = self._add_chats("alice", "hi")
+        self.watermarks["alice"] = str(ids[-1])
+
+        self.assertEqual(asyncio.run(extract_user_memory("alice")), 0)
+        self.mock_extract.assert_not_called()
+
+    def test_run_extraction_processes_pending_users(self):
+        self._add_chats("alice", "hi")
+        done = self._add_chats("bob", "hello")
+        self._add_chats("carol", "old", age=timedelta(days=30))
+        self.watermarks["bob"] = str(done[-1])
+        self.mock_extract.side_effect = [RuntimeError("model down")]
+
+        processed = asyncio.run(run_extraction())
+
+        self.assertEqual(processed, 1)
+        self.assertEqual(self.mock_extract.await_args.args[0], "alice")
+        # A failed extraction leaves the watermark for the next pass
+        self.assertNotIn("alice", self.watermarks)
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.store = {}
+        self.expires = []
+        mock_redis = MagicMock()
+        mock_redis.get.side_effect = self.store.get
+        mock_redis.set.side_effect = self._set
+        mock_redis.delete.side_effect = lambda key: self.store.pop(key, None)
+        mock_redis.expire.side_effect = lambda key, ttl: self.expires.append((key, ttl))
+        patcher = patch.object(long_term_memory.redis_cache, "client", mock_redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.scheduler = LongTermMemoryScheduler()
+
+    def _set(self, key, value, nx=False, ex=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    @patch("services.long_term_memory.run_extraction", new_callable=AsyncMock)
+    def test_pass_skipped_while_another_instance_holds_the_lock(self, mock_run):
+        self.store[LT_MEMORY_LOCK_KEY] = "other"
+
+        self.assertFalse(self.scheduler.run_once())
+
+        mock_run.assert_not_awaited()
+        self.assertEqual(self.store[LT_MEMORY_LOCK_KEY], "other")
+
+    @patch("services.long_term_memory.run_extraction", new_callable=AsyncMock)
+    def test_lock_released_after_pass(self, mock_run):
+        self.assertTrue(self.scheduler.run_once())
+
+        mock_run.assert_awaited_once()
+        self.assertNotIn(LT_MEMORY_LOCK_KEY, self.store)
+
+    @patch("services.long_term_memory.config")
+    def test_lock_refreshed_while_pass_runs(self, mock_config):
+        mock_config.lt_memory_interval = 0.01
+
+        async def slow_pass():
+            await asyncio.sleep(1.5)
+
+        with patch("services.long_term_memory.run_extraction", side_effect=slow_pass):
+            self.assertTrue(self.scheduler.run_once())
+
+        self.assertIn((LT_MEMORY_LOCK_KEY, 0.01), self.expires)
+        self.assertNotIn(LT_MEMORY_LOCK_KEY, self.store)
+
+    def test_passes_share_the_scheduler_loop(self):
+        from utils.http_client import close_http_clients, get_http_client
+
+        clients = []
+
+        async def use_client():
+            clients.append(get_http_client())
+
+        loop = asyncio.new_event_loop()
+        try:
+            with patch("services.long_term_memory.run_extraction", side_effect=use_client):
+                self.scheduler.run_once(loop)
+                self.scheduler.run_once(loop)
+            self.assertIs(clients[0], clients[1])
+        finally:
+            loop.run_until_complete(close_http_clients())
+            loop.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
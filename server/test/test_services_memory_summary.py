@@ -0,0 +1,121 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+import services.memory_summary as memory_summary
+from services.memory_summary import add_summarized_memory_to_prompt, refresh_summary, split_memory
+
+
+class TestMemorySummary(unittest.TestCase):
+    def setUp(self):
+        self.store = {}
+        self.mock_redis = MagicMock()
+        self.mock_redis.get.side_effect = self.store.get
+        self.mock_redis.set.side_effect = self._set
+        self.mock_redis.delete.side_effect = lambda key: self.store.pop(key, None)
+        patcher = patch.object(memory_summary.redis_cache, "client", self.mock_redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.verbatim = patch(
+            "services.prompt_generator.add_short_term_memory_to_prompt",
+            side_effect=lambda ids, mysql, model, user: [HumanMessage(f"turn {i}") for i in ids],
+        )
+        self.mock_verbatim = self.verbatim.start()
+        self.addCleanup(self.verbatim.stop)
+
+    def _set(self, key, value, ex=None, nx=False):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    def test_split_memory(self):
+        self.assertEqual(split_memory([1, 2, 3, 4], 2), ([1, 2], [3, 4]))
+        self.assertEqual(split_memory([1, 2], 6), ([], [1, 2]))
+
+    def test_without_summary_all_turns_are_verbatim(self):
+        result = add_summarized_memory_to_prompt([1, 2, 3, 4], 2, MagicMock(), "gpt-4", "user")
+
+        self.assertEqual([m.content for m in result], ["turn 1", "turn 2", "turn 3", "turn 4"])
+
+    def test_summary_replaces_covered_turns(self):
+        self.store["memory_summary:user:1"] = json.dumps({"chat_ids": [1], "summary": "talked about cats"})
+
+        result = add_summarized_memory_to_prompt([1, 2, 3, 4], 2, MagicMock(), "gpt-4", "user")
+
+        self.assertIsInstance(result[0], SystemMessage)
+        self.assertIn("talked about cats", result[0].content)
+        # Turn 2 aged out after the summary was computed, so it stays verbatim
+        self.assertEqual([m.content for m in result[1:]], ["turn 2", "turn 3", "turn 4"])
+
+    def test_summary_for_other_turns_is_ignored(self):
+        self.store["memory_summary:user:1"] = json.dumps({"chat_ids": [1, 5], "summary": "stale"})
+
+        result = add_summarized_memory_to_prompt([1, 2, 3, 4], 2, MagicMock(), "gpt-4", "user")
+
+        self.assertEqual(len(result), 4)
+        self.assertNotIsInstance(result[0], SystemMessage)
+
+    @patch("services.memory_summary._render_turns", return_value="User: hi\n\nAssistant: hello")
+    @patch("services.memory_summary._summarize", new_callable=AsyncMock, return_value="greeted each other")
+    def test_refresh_folds_only_new_turns(self, mock_summarize, mock_render):
+        self.store["memory_summary:user:1"] = json.dumps({"chat_ids": [1], "summary": "talked about cats"})
+
+        asyncio.run(refresh_summary("user", [1, 2, 3, 4], 2))
+
+        mock_render.assert_called_once_with([2])
+        mock_summarize.assert_awaited_once_with("user", "talked about cats", "User: hi\n\nAssistant: hello")
+        stored = json.loads(self.store["memory_summary:user:1"])
+        self.assertEqual(stored, {"chat_ids": [1, 2], "summary": "greeted each other"})
+        self.assertNotIn("memory_summary:user:1:lock", self.store)
+
+    @patch("services.memory_summary._render_turns")
+    @patch("services.memory_summary._summarize", new_callable=AsyncMock)
+    def test_refresh_skips_while_another_replica_holds_the_lock(self, mock_summarize, mock_render):
+        self.store["memory_summary:user:1:lock"] = "other"
+
+        asyncio.run(refresh_summary("user", [1, 2, 3, 4], 2))
+
+        mock_render.assert_not_called()
+        mock_summarize.assert_not_called()
+        self.assertEqual(self.store["memory_summary:user:1:lock"], "other")
+
+    def test_scheduled_refresh_is_referenced_until_done(self):
+        chat_config = MagicMock(memory_mode="summary", short_term_memory=[1, 2, 3], memory_window=1)
+        started = []
+
+        async def fake_refresh(*args):
+            started.append(args)
+
+        async def run():
+            with patch("services.memory_summary.refresh_summary", side_effect=fake_refresh):
+                memory_summary.schedule_summary_refresh("user", chat_config)
+                self.assertEqual(len(memory_summary._background_tasks), 1)
+                await asyncio.gather(*memory_summary._background_tasks)
+                await asyncio.sleep(0)
+
+        asyncio.run(run())
+
+        self.assertEqual(started, [("user", [1, 2, 3], 1)])
+        self.assertEqual(memory_summary._background_tasks, set())
+
+    @patch("services.memory_summary._render_turns")
+    @patch("services.memory_summary._summarize", new_callable=AsyncMock)
+    def test_refresh_skips_when_summary_is_current(self, mock_summarize, mock_render):
+        self.store["memory_summary:user:1"] = json.dumps({"chat_ids": [1, 2], "summary": "s"})
+
+        asyncio.run(refresh_summary("user", [1, 2, 3, 4], 2))
+        asyncio.run(refresh_summary("user", [1, 2], 2))
+
+        mock_render.assert_not_called()
+        mock_summarize.assert_not_called()
+
+    def test_message_text_joins_blocks(self):
+        message = AIMessage(content=[{"type": "text", "text": "a"}, {"type": "text", "text": "b"}])
+        self.assertEqual(memory_summary._message_text(message), "ab")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,24 +1,78 @@
 import unittest
 from unittest.mock import patch, MagicMock
-from services.prompt_generator import system_prompt, add_human_message_to_prompt, add_image_to_prompt
-from langchain_core.messages import SystemMessage, HumanMessage
+from services import prompt_generator
+from services.prompt_generator import system_prompt, add_human_message_to_prompt, add_image_to_prompt, add_short_term_memory_to_prompt
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+import json
+import os
+import tempfile
 
 class TestPromptGenerator(unittest.TestCase):
-    def test_system_prompt(self):
-        mock_mysql = MagicMock()
-        mock_mysql.read_records.return_value = [{
+    def setUp(self):
+        prompt_generator.invalidate_system_prompt()
+
+    @patch('services.prompt_generator.get_table_record')
+    def test_system_prompt(self, mock_get_record):
+        mock_get_record.return_value = {
             "system_prompt": "You are a test bot.",
-            "long_term_memory": '["likes python"]'
-        }]
-        
-        result = system_prompt("test_user", mock_mysql)
-        
+            "long_term_memory": '["likes python"]',
+            "modified_at": "2024-01-01 00:00:00",
+        }
+
+        result = system_prompt("test_user")
+
         self.assertEqual(len(result), 2)
         self.assertIsInstance(result[0], SystemMessage)
         with open("services/prompts/markdown_format.md", "r") as f:
             markdown_format = f.read()
         self.assertEqual(result[0].content, "You are a test bot." + markdown_format)
         self.assertIn("likes python", result[1].content)
+        mock_get_record.assert_called_once_with("user", "test_user")
+
+    @patch('services.prompt_generator.get_template')
+    @patch('services.prompt_generator.get_table_record')
+    def test_system_prompt_is_compiled_once_per_content(self, mock_get_record, mock_template):
+        mock_template.return_value = ""
+        profile = {"system_prompt": "v1", "long_term_memory": "[]", "modified_at": "2024-01-01 00:00:00"}
+        mock_get_record.return_value = profile
+
+        first = system_prompt("test_user")
+        second = system_prompt("test_user")
+        self.assertEqual(mock_template.call_count, 1)
+        self.assertEqual(first[0].content, second[0].content)
+
+        mock_get_record.return_value = dict(profile, system_prompt="v2", modified_at="2024-01-02 00:00:00")
+        self.assertEqual(system_prompt("test_user")[0].content, "v2")
+
+        # Another worker edited the profile within the same second
+        mock_get_record.return_value = dict(profile, long_term_memory='["likes go"]', modified_at="2024-01-02 00:00:00")
+        self.assertIn("likes go", system_prompt("test_user")[1].content)
+
+    @patch('services.prompt_generator.get_table_record')
+    def test_template_edit_recompiles_cached_prompt(self, mock_get_record):
+        from services import prompt_templates
+
+        mock_get_record.return_value = {"system_prompt": "bot", "long_term_memory": "[]"}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "markdown_format.md")
+            with open(path, "w") as f:
+                f.write(" plain")
+            with patch.object(prompt_templates, "PROMPTS_DIR", directory), \
+                    patch.dict(prompt_templates._templates, clear=True), \
+                    patch.object(prompt_templates.config, "prompt_template_reload", True):
+                prompt_templates.load_templates()
+                self.assertEqual(system_prompt("test_user")[0].content, "bot plain")
+
+                with open(path, "w") as f:
+                    f.write(" markdown")
+                os.utime(path, (0, 0))
+                self.assertEqual(system_prompt("test_user")[0].content, "bot markdown")
+
+    @patch('services.prompt_generator.get_table_record', return_value=None)
+    def test_system_prompt_unknown_user(self, mock_get_record):
+        result = system_prompt("ghost")
+        self.assertEqual(result[0].content[:28], "You are a helpful assistant.")
+        self.assertIn("No background information", result[1].content)
 
     def test_add_human_message_to_prompt(self):
         result = add_human_message_to_prompt("hello")
@@ -45,5 +99,112 @@ class TestPromptGenerator(unittest.TestCase):
         result = add_image_to_prompt("gpt-3.5", images, "user")
         self.assertEqual(result, [])
 
+    @patch('services.prompt_generator.MinioStorage')
+    @patch('services.prompt_generator.check_multimodal')
+    def test_add_image_to_prompt_s3_paths(self, mock_multimodal, mock_minio_class):
+        mock_multimodal.return_value = True
+        mock_minio = mock_minio_class.return_value
+        mock_minio.files_download_to_memory.return_value = [b"one", None]
+
+        result = add_image_to_prompt("gpt-4o", ["bucket://a.jpeg", "bucket://missing.png"], "user")
+
+        mock_minio.files_download_to_memory.assert_called_once_with(["bucket://a.jpeg", "bucket://missing.png"], cached=True)
+        self.assertEqual(len(result[0].content_blocks), 1)
+        self.assertEqual(result[0].content_blocks[0]["mime_type"], "image/jpeg")
+
+
+class TestShortTermMemory(unittest.TestCase):
+    def setUp(self):
+        self.store = {}
+        self.mock_redis = MagicMock()
+        self.mock_redis.mget.side_effect = lambda keys: [self.store.get(key) for key in keys]
+        pipe = self.mock_redis.pipeline.return_value
+        pipe.set.side_effect = lambda key, value, ex=None: self.store.__setitem__(key, value)
+        patcher = patch.object(prompt_generator.redis_cache, "client", self.mock_redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.mock_mysql = MagicMock()
+        records = {
+            "user_input": [
+                {"id": 1, "chat_id": 1, "input_content": "first", "input_location": "bucket://a.png"},
+                {"id": 2, "chat_id": 2, "input_content": "second", "input_location": ""},
+                {"id": 3, "chat_id": 3, "input_content": "pending", "input_location": ""},
+            ],
+            "ai_reasoning": [{"id": 1, "chat_id": 1, "reasoning_process": "thinking"}],
+            "ai_response": [
+                {"id": 1, "chat_id": 1, "ai_response": "answer one"},
+                {"id": 2, "chat_id": 2, "ai_response": "answer two"},
+            ],
+        }
+        self.mock_mysql.read_records.side_effect = lambda table, conditions: [
+            r for r in records[table] if r["chat_id"] in conditions["chat_id"]
+        ]
+
+    @patch('services.prompt_generator.check_multimodal', return_value=False)
+    def test_fragments_are_cached_after_first_build(self, mock_multimodal):
+        first = add_short_term_memory_to_prompt([1, 2], self.mock_mysql, "gpt-3.5", "user")
+        self.assertEqual(self.mock_mysql.read_records.call_count, 3)
+
+        self.mock_mysql.read_records.reset_mock()
+        second = add_short_term_memory_to_prompt([1, 2], self.mock_mysql, "gpt-3.5", "user")
+
+        self.mock_mysql.read_records.assert_not_called()
+        self.assertEqual(self.mock_redis.mget.call_count, 2)
+        self.assertEqual([m.content for m in first], [m.content for m in second])
+        self.assertEqual([type(m) for m in second], [HumanMessage, AIMessage, AIMessage, HumanMessage, AIMessage])
+        self.assertEqual(second[2].content, "answer one")
+        self.assertEqual(json.loads(self.store["prompt_fragment:1"])["images"], ["bucket://a.png"])
+
+    @patch('services.prompt_generator.check_multimodal', return_value=False)
+    def test_unfinished_turns_are_not_cached(self, mock_multimodal):
+        result = add_short_term_memory_to_prompt([3], self.mock_mysql, "gpt-3.5", "user")
+
+        self.assertEqual(result[0].content, "pending")
+        self.assertNotIn("prompt_fragment:3", self.store)
+
+    @patch('services.prompt_generator.MinioStorage')
+    @patch('services.prompt_generator.check_multimodal', return_value=True)
+    def test_images_are_resolved_in_one_download(self, mock_multimodal, mock_minio_class):
+        mock_minio_class.return_value.files_download_to_memory.return_value = [b"png"]
+
+        result = add_short_term_memory_to_prompt([1, 2], self.mock_mysql, "gpt-4o", "user")
+
+        mock_minio_class.return_value.files_download_to_memory.assert_called_once_with(["bucket://a.png"], cached=True)
+        mock_multimodal.assert_called_once_with("gpt-4o")
+        self.assertEqual(result[1].content_blocks[0]["type"], "image")
+
+    @patch('services.prompt_generator.check_multimodal', return_value=False)
+    def test_redis_failure_falls_back_to_mysql(self, mock_multimodal):
+        import redis
+
+        self.mock_redis.mget.side_effect = redis.ConnectionError("down")
+        result = add_short_term_memory_to_prompt([2], self.mock_mysql, "gpt-3.5", "user")
+        self.assertEqual([m.content for m in result], ["second", "answer two"])
+
+class TestPromptTemplates(unittest.TestCase):
+    def test_reload_picks_up_edits(self):
+        from services import prompt_templates
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "greeting.md")
+            with open(path, "w") as f:
+                f.write("hello")
+            listener = MagicMock()
+            with patch.object(prompt_templates, "PROMPTS_DIR", directory), \
+                    patch.dict(prompt_templates._templates, clear=True), \
+                    patch.object(prompt_templates, "_listeners", [listener]), \
+                    patch.object(prompt_templates.config, "prompt_template_reload", True):
+                prompt_templates.load_templates()
+                self.assertEqual(prompt_templates.get_template("greeting.md"), "hello")
+                listener.assert_not_called()
+
+                with open(path, "w") as f:
+                    f.write("hi")
+                os.utime(path, (0, 0))
+                self.assertEqual(prompt_templates.get_template("greeting.md"), "hi")
+                listener.assert_called_once_with("greeting.md")
+
+
 if __name__ == '__main__':
     unittest.main()
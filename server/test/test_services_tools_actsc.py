@@ -0,0 +1,192 @@
+import asyncio
+import unittest
+from io import BytesIO, StringIO
+from math import exp, log
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+from openpyxl import Workbook
+
+from services.tools import actsc_tools
+from services.tools.actsc_tools import (
+    _gm_table,
+    actsc_commutation_functions,
+    actsc_insurance_annuity_values,
+    actsc_joint_life_values,
+    actsc_life_table,
+    actsc_premium_reserves,
+    actsc_service_table,
+    actsc_standard_mortality_table,
+)
+
+
+def _legacy_life_table(interest, A, B, c):
+    ages = range(20, 111)
+    p_vals = [exp(-A) * exp(-(B * c ** x) / log(c) * (c - 1)) for x in ages]
+    l_x = [100000]
+    for p in p_vals[:-1]:
+        l_x.append(max(l_x[-1] * p, 0))
+    d_x = [prev - curr for prev, curr in zip(l_x, l_x[1:])] + [l_x[-1]]
+    a_due_x = [
+        sum(i / l_x[x - 20] * (1 + interest) ** (-t) for t, i in enumerate(l_x[x - 20:91]))
+        for x in ages
+    ]
+    A_x = [
+        sum(d / l_x[x - 20] * (1 + interest) ** (-t - 1) for t, d in enumerate(d_x[x - 20:91]))
+        for x in ages
+    ]
+    return l_x, a_due_x, A_x
+
+
+def _altam_workbook():
+    workbook = Workbook()
+    service = workbook.active
+    service.title = "Service Table"
+    service.append([])
+    service.append([])
+    service.append([])
+    service.append([])
+    service.append(["x", "lx"])
+    for row in [[20, 1000000], [21, 900000], [22, 800000]]:
+        service.append(row)
+    single = workbook.create_sheet("Single Life")
+    joint = workbook.create_sheet("Joint Life")
+    for sheet, width in [(single, 15), (joint, 9)]:
+        sheet.append([])
+        sheet.append([])
+        sheet.append(["x"] + [None] * (width - 1))
+        sheet.append([20] + [1] * (width - 1))
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+def _parse_table(text):
+    return pd.read_csv(StringIO(text), sep=r"\s+")
+
+
+class TestActscTools(unittest.TestCase):
+    def setUp(self):
+        _gm_table.cache_clear()
+        actsc_tools._altam_frames.update({"digest": None, "service": None, "sult": None})
+
+    def test_gm_table_matches_legacy_computation(self):
+        for params in [(0.05, 0.00022, 0.0000027, 1.124), (0.03, 0.0001, 0.00035, 1.075)]:
+            l_x, a_due_x, A_x = _legacy_life_table(*params)
+            df = _gm_table(*params)
+            for ours, legacy in zip(df["l_x"], l_x):
+                self.assertAlmostEqual(ours, legacy, places=6)
+            for ours, legacy in zip(df["a_due_x"], a_due_x):
+                self.assertAlmostEqual(ours, legacy, places=10)
+            for ours, legacy in zip(df["A_x"], A_x):
+                self.assertAlmostEqual(ours, legacy, places=10)
+
+    def test_life_table_is_memoized(self):
+        actsc_life_table(30, 40)
+        actsc_life_table(50, 60, interest=0.05)
+        info = _gm_table.cache_info()
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.hits, 1)
+
+    def test_life_table_swaps_and_clamps_ages(self):
+        result = actsc_life_table(25, 10).splitlines()
+        self.assertEqual(result[0].split(), ["x", "p_x", "q_x", "l_x", "a_due_x", "A_x"])
+        self.assertEqual(result[1].split()[0], "20")
+        self.assertEqual(result[-1].split()[0], "25")
+
+    @patch("services.tools.actsc_tools._parse_altam_tables", wraps=actsc_tools._parse_altam_tables)
+    @patch("services.tools.actsc_tools._read_altam_tables")
+    def test_altam_tables_parsed_once_per_workbook(self, mock_read, mock_parse):
+        mock_read.return_value = _altam_workbook()
+
+        first = actsc_service_table(20, 21)
+        second = actsc_service_table(21, 22)
+        sult = actsc_standard_mortality_table(20, 20)
+
+        self.assertEqual(mock_parse.call_count, 1)
+        self.assertIn("900000", first)
+        self.assertIn("800000", second)
+        self.assertNotIn("800000", first)
+        self.assertIn("äx_20", sult)
+
+    def test_insurance_annuity_values_match_sult(self):
+        df = _parse_table(actsc_insurance_annuity_values(40, 45, n=20, u=5, basis="sult", A=1, B=1, c=2))
+        row = df[df["x"] == 40].iloc[0]
+        self.assertAlmostEqual(row["ä_x"], 18.4578, places=4)
+        self.assertAlmostEqual(row["A_x"], 0.12106, places=5)
+        self.assertAlmostEqual(row["A_x:20"], row["A1_x:20"] + row["20E_x"], places=5)
+        self.assertAlmostEqual(row["A_x"], 1 - 0.05 / 1.05 * row["ä_x"], places=5)
+        self.assertLess(row["5|ä_x"], row["ä_x"])
+
+    def test_commutation_functions_use_textbook_discounting(self):
+        df = _parse_table(actsc_commutation_functions(20, 21))
+        self.assertAlmostEqual(df["D_x"][0], 100000 * 1.05 ** -20, places=3)
+
+    def test_joint_life_values_same_age(self):
+        df = _parse_table(actsc_joint_life_values(60, 60, age_difference=0, n=10))
+        single = _parse_table(actsc_insurance_annuity_values(60, 60, n=10))
+        row = df.iloc[0]
+        self.assertLess(row["ä_xy"], single["ä_x"][0])
+        self.assertAlmostEqual(row["ä_x̄ȳ"], 2 * single["ä_x"][0] - row["ä_xy"], places=5)
+
+    def test_endowment_reserves_run_from_zero_to_sum_insured(self):
+        result = actsc_premium_reserves(50, "endowment", n=5, sum_insured=1000)
+        self.assertTrue(result.startswith("Annual net premium:"))
+        df = _parse_table(result.split("\n", 1)[1])
+        self.assertAlmostEqual(df["tV"].iloc[0], 0, places=5)
+        self.assertAlmostEqual(df["tV"].iloc[-1], 1000, places=5)
+        self.assertEqual(len(df), 6)
+
+    def test_premium_reserves_validates_input(self):
+        self.assertEqual(actsc_premium_reserves(50, "term"), "Term n is required for term and endowment products.")
+        self.assertEqual(actsc_premium_reserves(50, "annuity", n=5), "Unsupported product: annuity")
+        self.assertEqual(actsc_premium_reserves(50, basis="cso"), "Unsupported basis: cso")
+        self.assertEqual(actsc_premium_reserves(50, premium_term=0), "premium_term must be at least 1 year.")
+        self.assertIn("must not exceed", actsc_premium_reserves(100, "endowment", n=20))
+
+    def test_fractional_durations_are_rejected(self):
+        self.assertEqual(actsc_premium_reserves(50, "term", n=0.5), "n must be a whole number of years; got 0.5.")
+        self.assertIn("premium_term must be a whole number", actsc_premium_reserves(50, "term", n=10, premium_term=2.5))
+        self.assertIn("n must be a whole number", actsc_insurance_annuity_values(40, 45, n=2.5))
+        self.assertIn("age_difference must be a whole number", actsc_joint_life_values(60, 60, age_difference=1.5))
+        self.assertTrue(actsc_premium_reserves(50.0, "term", n=10.0).startswith("Annual net premium:"))
+
+    @patch("services.peng_agent.get_stream_writer", return_value=MagicMock())
+    def test_invalid_arguments_reach_the_model_as_text(self, mock_writer):
+        from langchain_core.messages import AIMessage
+        from services.peng_agent import PengAgent
+
+        agent = PengAgent("user", "openai_response", "model", [])
+        agent.tools = {"actsc_premium_reserves": actsc_tools.actsc_premium_reserves_tool}
+        agent._tools_ready = True
+        message = AIMessage(content_blocks=[{
+            "type": "tool_call", "name": "actsc_premium_reserves", "args": {"x": 50, "product": "term"}, "id": "call_1",
+        }])
+
+        result = asyncio.run(agent.call_tools({"messages": [message]}))
+
+        self.assertEqual(result["messages"].content, "Term n is required for term and endowment products.")
+
+    def test_insurance_annuity_values_validates_input(self):
+        self.assertEqual(actsc_insurance_annuity_values(40, 45, n=-1), "n must not be negative.")
+        self.assertEqual(actsc_insurance_annuity_values(40, 45, u=-5), "u must not be negative.")
+        self.assertIn("reaches 115", actsc_insurance_annuity_values(40, 100, n=10, u=5))
+        self.assertIn("No ages", actsc_insurance_annuity_values(120, 130))
+
+    def test_joint_life_values_validates_input(self):
+        self.assertIn("must not be negative", actsc_joint_life_values(60, 60, age_difference=-3))
+        self.assertEqual(actsc_joint_life_values(60, 60, n=-1), "n must not be negative.")
+        self.assertIn("reaches 115", actsc_joint_life_values(60, 100, age_difference=5, n=10))
+
+    def test_valid_inputs_produce_finite_values(self):
+        for result in [
+            actsc_insurance_annuity_values(20, 100, n=10),
+            actsc_joint_life_values(20, 90, age_difference=10, n=10),
+            actsc_premium_reserves(20, "whole_life", premium_term=20),
+            actsc_premium_reserves(60, "term", n=50),
+        ]:
+            self.assertNotIn("nan", result)
+            self.assertNotIn("inf", result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import contextlib
+import unittest
+from unittest.mock import patch
+
+import anyio
+from mcp import types
+
+from services.tools import mcp_tools
+from services.tools.mcp_tools import close_mcp_sessions, create_mcp_tools, get_mcp_session
+
+
+class FakeClientSession:
+    def __init__(self, fail_calls=0, fail_lists=0):
+        self.fail_calls = fail_calls
+        self.fail_lists = fail_lists
+        self.calls = []
+        self.list_calls = 0
+
+    async def initialize(self):
+        pass
+
+    async def list_tools(self, cursor=None, **kwargs):
+        if self.fail_lists:
+            self.fail_lists -= 1
+            raise anyio.ClosedResourceError()
+        self.list_calls += 1
+        tool = types.Tool(name="echo", description="Echo", inputSchema={"type": "object", "properties": {"text": {"type": "string"}}})
+        return types.ListToolsResult(tools=[tool])
+
+    async def call_tool(self, name, arguments=None, **kwargs):
+        if self.fail_calls:
+            self.fail_calls -= 1
+            raise anyio.ClosedResourceError()
+        self.calls.append((name, arguments))
+        return types.CallToolResult(content=[types.TextContent(type="text", text=arguments["text"])])
+
+
+class TestMcpTools(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        mcp_tools._sessions.clear()
+        self.opened = []
+        self.connections = []
+
+        @contextlib.asynccontextmanager
+        async def fake_create_session(connection):
+            self.connections.append(connection)
+            session = self.sessions.pop(0)
+            self.opened.append(session)
+            yield session
+
+        self.sessions = [FakeClientSession(), FakeClientSession()]
+        patcher = patch("services.tools.mcp_tools.create_session", fake_create_session)
+        patcher.start()
+        self.addAsyncCleanup(close_mcp_sessions)
+        self.addCleanup(patcher.stop)
+
+    async def test_empty_url_returns_no_tools(self):
+        self.assertEqual(await create_mcp_tools("demo_mcp", "", None), [])
+
+    async def test_session_and_tool_list_are_reused(self):
+        first = await create_mcp_tools("demo_mcp", "http://mcp", {"Authorization": "x"})
+        second = await create_mcp_tools("demo_mcp", "http://mcp", {"Authorization": "x"})
+
+        self.assertIs(first, second)
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(self.opened[0].list_calls, 1)
+        self.assertEqual(self.connections[0]["headers"], {"Authorization": "x"})
+
+        result = await first[0].ainvoke({"text": "hi"})
+        await first[0].ainvoke({"text": "again"})
+
+        self.assertIn("hi", str(result))
+        self.assertEqual(self.opened[0].calls, [("echo", {"text": "hi"}), ("echo", {"text": "again"})])
+        self.assertEqual(len(self.opened), 1)
+
+    async def test_tool_list_refreshes_after_ttl_and_list_changed(self):
+        await create_mcp_tools("demo_mcp", "http://mcp", None)
+        with patch.object(mcp_tools.config, "mcp_tools_cache_ttl", 0):
+            await create_mcp_tools("demo_mcp", "http://mcp", None)
+        self.assertEqual(self.opened[0].list_calls, 2)
+
+        session = get_mcp_session("demo_mcp", "http://mcp", None)
+        await session._handle_message(
+            types.ServerNotification(types.ToolListChangedNotification(method="notifications/tools/list_changed"))
+        )
+        await create_mcp_tools("demo_mcp", "http://mcp", None)
+        self.assertEqual(self.opened[0].list_calls, 3)
+
+    async def test_tool_call_is_not_replayed_after_connection_failure(self):
+        self.sessions = [FakeClientSession(fail_calls=1), FakeClientSession()]
+        tools = await create_mcp_tools("demo_mcp", "http://mcp", None)
+
+        result = await tools[0].ainvoke({"text": "once"})
+
+        self.assertIn("connection to MCP server demo_mcp was lost", str(result))
+        self.assertEqual(len(self.opened), 2)
+        self.assertEqual(self.opened[1].calls, [])
+
+        await tools[0].ainvoke({"text": "next"})
+        self.assertEqual(self.opened[1].calls, [("echo", {"text": "next"})])
+
+    async def test_list_tools_is_retried_after_connection_failure(self):
+        self.sessions = [FakeClientSession(fail_lists=1), FakeClientSession()]
+
+        tools = await create_mcp_tools("demo_mcp", "http://mcp", None)
+
+        self.assertEqual([tool.name for tool in tools], ["echo"])
+        self.assertEqual(len(self.opened), 2)
+        self.assertEqual(self.opened[1].list_calls, 1)
+
+    async def test_sessions_are_keyed_by_headers(self):
+        a = get_mcp_session("demo_mcp", "http://mcp", {"a": "1"})
+        b = get_mcp_session("demo_mcp", "http://mcp", {"a": "2"})
+
+        self.assertIsNot(a, b)
+        self.assertIs(a, get_mcp_session("demo_mcp", "http://mcp", {"a": "1"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
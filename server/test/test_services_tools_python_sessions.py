@@ -0,0 +1,212 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from services.tools import python_sessions
+from services.tools.python_sessions import (
+    aexecute_python_session,
+    close_python_session,
+)
+
+
+class FakeReplChannel:
+    """Answers each request with canned output, like the remote REPL server.
+
+    A response is a dict of stdout/stderr text, a list of stdout chunks to
+    deliver one read at a time, or None to never finish.
+    """
+
+    def __init__(self, responses, banner=b""):
+        self.responses = list(responses)
+        self.requests = []
+        self.stdout = [banner + b"__PENG_PID__99\n"]
+        self.stderr = []
+        self.exited = False
+        self.closed = False
+
+    def sendall(self, data):
+        request = json.loads(data)
+        self.requests.append(request["code"])
+        response = self.responses.pop(0)
+        if response is None:
+            return
+        marker = request["marker"].encode("utf-8")
+        if isinstance(response, list):
+            stdout = b"".join(chunk.encode("utf-8") for chunk in response) + marker
+            self.stdout += [stdout[i:i + 4] for i in range(0, len(stdout), 4)]
+            self.stderr.append(marker)
+            return
+        self.stdout.append(response["stdout"].encode("utf-8") + marker)
+        self.stderr.append(response["stderr"].encode("utf-8") + marker)
+
+    def recv_ready(self):
+        return bool(self.stdout)
+
+    def recv(self, _size):
+        return self.stdout.pop(0)
+
+    def recv_stderr_ready(self):
+        return bool(self.stderr)
+
+    def recv_stderr(self, _size):
+        return self.stderr.pop(0)
+
+    def exit_status_ready(self):
+        return self.exited
+
+    def close(self):
+        self.closed = True
+
+
+class TestPythonSessions(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        python_sessions._sessions.clear()
+        python_sessions._session_locks.clear()
+        self.ssh = MagicMock()
+        patchers = [
+            patch("services.tools.python_sessions._get_ssh_connection", return_value=self.ssh),
+            patch("services.tools.python_sessions._kill_remote_process"),
+        ]
+        self.mock_get_connection, self.mock_kill = [p.start() for p in patchers]
+        for p in patchers:
+            self.addCleanup(p.stop)
+
+    def _open_channel(self, *channels):
+        patcher = patch(
+            "services.tools.python_sessions._open_command_channel",
+            side_effect=list(channels),
+        )
+        mock_open = patcher.start()
+        self.addCleanup(patcher.stop)
+        return mock_open
+
+    async def test_session_is_reused_within_a_run(self):
+        channel = FakeReplChannel([
+            {"stdout": "", "stderr": ""},
+            {"stdout": "4\n", "stderr": ""},
+        ])
+        mock_open = self._open_channel(channel)
+
+        first = await aexecute_python_session("run-1", "x = 2")
+        second = await aexecute_python_session("run-1", "print(x * 2)")
+
+        self.assertEqual(first, {"output": ""})
+        self.assertEqual(second, {"output": "4"})
+        mock_open.assert_called_once()
+        self.assertEqual(channel.requests, ["x = 2", "print(x * 2)"])
+
+    async def test_stderr_is_returned_as_error(self):
+        self._open_channel(FakeReplChannel([{"stdout": "partial\n", "stderr": "ZeroDivisionError\n"}]))
+
+        result = await aexecute_python_session("run-1", "print('partial'); 1/0")
+
+        self.assertEqual(result, {"error": "partial\nZeroDivisionError"})
+
+    async def test_timeout_kills_session(self):
+        channel = FakeReplChannel([None])
+        self._open_channel(channel)
+
+        result = await aexecute_python_session("run-1", "while True: pass", timeout=0.1)
+
+        self.assertIn("timed out", result["error"])
+        self.mock_kill.assert_called_once_with(self.ssh, 99)
+        self.assertTrue(channel.closed)
+        self.assertNotIn(("run-1", "homelab"), python_sessions._sessions)
+
+    async def test_output_is_streamed_while_the_code_runs(self):
+        self._open_channel(FakeReplChannel([["step 1\n", "step 2\n", "caf\u00e9"]], banner=b"motd\n"))
+        chunks = []
+
+        result = await aexecute_python_session(
+            "run-1", "...", on_output=lambda stream, text: chunks.append((stream, text))
+        )
+
+        self.assertEqual(result, {"output": "step 1\nstep 2\ncaf\u00e9"})
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(text for _, text in chunks), "step 1\nstep 2\ncaf\u00e9")
+        self.assertNotIn("__PENG_RESULT__", "".join(text for _, text in chunks))
+
+    async def test_output_limit_is_enforced_while_reading(self):
+        channel = FakeReplChannel([["x" * 64] * 4])
+        self._open_channel(channel)
+        chunks = []
+
+        result = await aexecute_python_session(
+            "run-1", "...", max_output_bytes=32, on_output=lambda stream, text: chunks.append(text)
+        )
+
+        self.assertIn("Output exceeded 32 bytes", result["error"])
+        self.assertLessEqual(len("".join(chunks)), 64)
+        self.mock_kill.assert_called_once_with(self.ssh, 99)
+
+    async def test_parallel_calls_start_one_interpreter(self):
+        channel = FakeReplChannel([{"stdout": "a\n", "stderr": ""}, {"stdout": "b\n", "stderr": ""}])
+        mock_open = self._open_channel(channel, FakeReplChannel([]))
+
+        results = await asyncio.gather(
+            aexecute_python_session("run-1", "print('a')"),
+            aexecute_python_session("run-1", "print('b')"),
+        )
+
+        self.assertEqual(sorted(result["output"] for result in results), ["a", "b"])
+        mock_open.assert_called_once()
+        self.assertEqual(len(python_sessions._sessions), 1)
+
+    async def test_close_python_session(self):
+        channel = FakeReplChannel([{"stdout": "", "stderr": ""}])
+        self._open_channel(channel)
+        await aexecute_python_session("run-1", "x = 1")
+
+        await close_python_session("run-1")
+
+        self.assertTrue(channel.closed)
+        self.mock_kill.assert_called_once_with(self.ssh, 99)
+        self.assertEqual(python_sessions._sessions, {})
+        self.assertEqual(python_sessions._session_locks, {})
+
+    async def test_connection_failure(self):
+        self.mock_get_connection.return_value = None
+
+        result = await aexecute_python_session("run-1", "x = 1")
+
+        self.assertTrue(result["error"].startswith("SSH connection could not be established."))
+
+    @patch("services.tools.ssh_tools._current_run_id", return_value="run-1")
+    @patch("services.tools.python_sessions.aexecute_python_session", new_callable=AsyncMock)
+    async def test_code_execution_uses_session_for_python(self, mock_session, _mock_run_id):
+        from services.tools.ssh_tools import acode_execution_tool
+
+        mock_session.return_value = {"output": "1"}
+
+        result = await acode_execution_tool("python", "print(1)")
+
+        self.assertEqual(result, "1")
+        args, kwargs = mock_session.call_args
+        self.assertEqual(args, ("run-1", "print(1)"))
+        self.assertIn("on_output", kwargs)
+
+
+class TestPengAgentReleasesSessions(unittest.IsolatedAsyncioTestCase):
+    @patch("services.tools.tools_routers.release_tool_sessions", new_callable=AsyncMock)
+    async def test_astream_releases_sessions(self, mock_release):
+        from services.peng_agent import PengAgent
+
+        agent = PengAgent("user", "openai_response", "model", ["code_execution"])
+        agent._tools_ready = True
+
+        async def fake_astream(*args, **kwargs):
+            self.assertEqual(kwargs["config"]["configurable"]["run_id"], agent.run_id)
+            yield {"chunk": 1}
+
+        agent.graph = MagicMock()
+        agent.graph.astream = fake_astream
+
+        chunks = [chunk async for chunk in agent.astream({"messages": []})]
+
+        self.assertEqual(chunks, [{"chunk": 1}])
+        mock_release.assert_awaited_once_with(agent.run_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from services.tools import search_tools
+from utils import http_client
+
+
+class TestSearchTools(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        async def handler(request):
+            self.requests.append(request)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                await asyncio.sleep(0.01)
+                return self.respond(request)
+            finally:
+                self.in_flight -= 1
+
+        new_client = http_client._new_client
+        patcher = patch(
+            "utils.http_client._new_client",
+            lambda **kwargs: new_client(transport=httpx.MockTransport(handler), **kwargs),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addAsyncCleanup(http_client.close_http_clients)
+
+    def respond(self, request):
+        return httpx.Response(200, text="ok")
+
+    async def test_client_is_shared_per_name(self):
+        self.assertIs(http_client.get_http_client(), http_client.get_http_client())
+        self.assertIsNot(http_client.get_http_client(), http_client.get_http_client("tavily"))
+
+    async def test_requests_tools_use_shared_client(self):
+        tools = {tool.name: tool for tool in search_tools.requests_toolkit()}
+        self.assertEqual(
+            set(tools),
+            {"requests_get", "requests_post", "requests_patch", "requests_put", "requests_delete"},
+        )
+
+        self.assertEqual(await tools["requests_get"].ainvoke({"url": "http://example.com/a"}), "ok")
+        await tools["requests_post"].ainvoke({"url": "http://example.com/b", "data": {"k": 1}})
+
+        self.assertEqual(self.requests[1].method, "POST")
+        self.assertEqual(json.loads(self.requests[1].content), {"k": 1})
+        self.assertIn("Mozilla", self.requests[0].headers["user-agent"])
+        self.assertEqual(len(http_client._clients), 1)
+
+    async def test_per_host_concurrency_is_bounded(self):
+        with patch.object(http_client.config, "http_per_host_concurrency", 2):
+            await asyncio.gather(
+                *[http_client.request("GET", f"http://example.com/{i}") for i in range(6)]
+            )
+        self.assertEqual(len(self.requests), 6)
+        self.assertEqual(self.max_in_flight, 2)
+
+    async def test_wikipedia_fetches_summaries_in_parallel(self):
+        def respond(request):
+            params = request.url.params
+            if params.get("list") == "search":
+                return httpx.Response(200, json={"query": {"search": [{"title": "Alpha"}, {"title": "Beta"}]}})
+            title = params["titles"]
+            return httpx.Response(200, json={"query": {"pages": {"1": {"title": title, "extract": f"{title} intro"}}}})
+
+        self.respond = respond
+        result = await search_tools.wikipedia_search_tool.ainvoke({"query": "letters"})
+
+        self.assertEqual(result, "Page: Alpha\nSummary: Alpha intro\n\nPage: Beta\nSummary: Beta intro")
+        self.assertEqual(self.max_in_flight, 2)
+
+    async def test_wikipedia_without_results(self):
+        self.respond = lambda request: httpx.Response(200, json={"query": {"search": []}})
+        result = await search_tools.wikipedia_search_tool.ainvoke({"query": "nothing"})
+        self.assertEqual(result, "No good Wikipedia Search Result was found")
+
+    async def test_tavily_extract_batches_urls_concurrently(self):
+        def respond(request):
+            urls = json.loads(request.content)["urls"]
+            if "http://bad.example" in urls:
+                return httpx.Response(500, json={"detail": {"error": "boom"}})
+            return httpx.Response(200, json={
+                "results": [{"url": url, "raw_content": f"content of {url}"} for url in urls if "missing" not in url],
+                "failed_results": [{"url": url, "error": "not found"} for url in urls if "missing" in url],
+            })
+
+        self.respond = respond
+        urls = [f"http://site{i}.example" for i in range(6)] + ["http://missing.example"]
+        with patch.object(search_tools, "TAVILY_EXTRACT_BATCH_SIZE", 3):
+            results = await search_tools.tavily_extract_tool.ainvoke({"urls": urls})
+
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual(self.max_in_flight, 3)
+        self.assertEqual(self.requests[0].url.host, "api.tavily.com")
+        self.assertIn("http://site0.example --- content of http://site0.example", results)
+        self.assertIn("Failed to extract http://missing.example: not found", results)
+        self.assertEqual(len(results), 7)
+
+    async def test_tavily_extract_reports_failed_batch(self):
+        self.respond = lambda request: httpx.Response(500, json={"detail": {"error": "boom"}})
+        results = await search_tools._tavily_extract(["http://bad.example"])
+        self.assertEqual(len(results), 1)
+        self.assertTrue(results[0].startswith("Failed to extract http://bad.example:"))
+
+
+if __name__ == "__main__":
+    unittest.main()
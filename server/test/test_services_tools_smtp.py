@@ -0,0 +1,240 @@
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+from services.tools import smtp_tools
+from services.tools.smtp_tools import (
+    EMAIL_PROCESSING_KEY,
+    EMAIL_QUEUE_KEY,
+    EMAIL_RETRY_KEY,
+    EMAIL_WORKER_KEY,
+    EmailWorker,
+    SmtpConnectionPool,
+    SmtpEmailSender,
+)
+
+
+class FakeRedis:
+    """The subset of redis commands used by the email queue."""
+
+    def __init__(self):
+        self.values = {}
+        self.lists = {}
+        self.zsets = {}
+
+    def pipeline(self):
+        client = self
+
+        class Pipeline:
+            def __getattr__(self, name):
+                return getattr(client, name)
+
+            def execute(self):
+                return []
+
+        return Pipeline()
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    def exists(self, key):
+        return int(key in self.values)
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+    def scan_iter(self, match):
+        prefix = match.rstrip("*")
+        return [key for key in list(self.lists) if key.startswith(prefix)]
+
+    def lpush(self, key, value):
+        self.lists.setdefault(key, []).insert(0, value)
+
+    def rpoplpush(self, source, destination):
+        if not self.lists.get(source):
+            return None
+        value = self.lists[source].pop()
+        self.lpush(destination, value)
+        return value
+
+    def brpoplpush(self, source, destination, timeout=0):
+        return self.rpoplpush(source, destination)
+
+    def lrem(self, key, count, value):
+        if value in self.lists.get(key, []):
+            self.lists[key].remove(value)
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zrangebyscore(self, key, low, high):
+        return [k for k, score in self.zsets.get(key, {}).items() if low <= score <= high]
+
+    def zrem(self, key, value):
+        return self.zsets.get(key, {}).pop(value, None) is not None
+
+
+class TestEmailQueue(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        for patcher in [
+            patch.object(smtp_tools.redis_cache, "client", self.redis),
+            patch.object(smtp_tools.email_worker, "ensure_started"),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.sender = MagicMock()
+        self.worker = EmailWorker(sender=self.sender)
+        self.processing_key = self.worker.processing_key(0)
+
+    async def test_tool_returns_after_queueing(self):
+        result = await smtp_tools.email_send_tool.ainvoke(
+            {"to_address": "a@example.com", "subject": "Hi", "body": "Hello"}
+        )
+
+        email_id = result.rsplit(" ", 1)[-1]
+        self.assertEqual(self.redis.lists[EMAIL_QUEUE_KEY], [email_id])
+        status = json.loads(await smtp_tools.email_status_tool.ainvoke({"email_id": email_id}))
+        self.assertEqual(status["status"], "queued")
+        self.assertEqual(status["to_address"], "a@example.com")
+        self.sender.send_email.assert_not_called()
+
+    @patch("services.peng_agent.get_stream_writer", return_value=MagicMock())
+    async def test_status_tool_runs_in_agent(self, mock_writer):
+        from langchain_core.messages import AIMessage
+        from services.peng_agent import PengAgent
+
+        email_id = smtp_tools.enqueue_email("a@example.com", "Hi", "Hello")
+        agent = PengAgent("user", "openai_response", "model", [])
+        agent.tools = {"email_status_tool": smtp_tools.email_status_tool}
+        agent._tools_ready = True
+
+        async def call(args, call_id):
+            message = AIMessage(content_blocks=[{"type": "tool_call", "name": "email_status_tool", "args": args, "id": call_id}])
+            return (await agent.call_tools({"messages": [message]}))["messages"].content
+
+        self.assertEqual(json.loads(await call({"email_id": email_id}, "call_1"))["status"], "queued")
+        self.assertEqual(await call({"email_id": "missing"}, "call_2"), "No email found with id missing")
+
+    def test_worker_marks_email_sent(self):
+        email_id = smtp_tools.enqueue_email("a@example.com", "Hi", "Hello")
+        self.redis.brpoplpush(EMAIL_QUEUE_KEY, self.processing_key)
+
+        self.worker.process(email_id, self.processing_key)
+
+        self.sender.send_email.assert_called_once_with("a@example.com", "Hi", "Hello", [])
+        status = smtp_tools.get_email_status(email_id)
+        self.assertEqual((status["status"], status["attempts"]), ("sent", 1))
+        self.assertEqual(self.redis.lists[self.processing_key], [])
+
+    def test_failed_send_is_retried_then_failed(self):
+        self.sender.send_email.side_effect = OSError("connection refused")
+        email_id = smtp_tools.enqueue_email("a@example.com", "Hi", "Hello")
+        self.redis.brpoplpush(EMAIL_QUEUE_KEY, self.processing_key)
+
+        with patch.object(smtp_tools.config, "email_max_attempts", 2):
+            self.worker.process(email_id, self.processing_key)
+            self.assertEqual(smtp_tools.get_email_status(email_id)["status"], "retrying")
+            self.assertIn(email_id, self.redis.zsets[EMAIL_RETRY_KEY])
+
+            with patch("services.tools.smtp_tools.time.time", return_value=1e12):
+                self.worker._promote_due_retries()
+            self.assertEqual(self.redis.lists[EMAIL_QUEUE_KEY], [email_id])
+            self.worker.process(email_id, self.processing_key)
+
+        status = smtp_tools.get_email_status(email_id)
+        self.assertEqual((status["status"], status["attempts"]), ("failed", 2))
+        self.assertEqual(status["error"], "connection refused")
+
+    def test_recover_requeues_only_emails_of_dead_workers(self):
+        live = EmailWorker(sender=self.sender)
+        live._heartbeat()
+        self.redis.lpush(f"{EMAIL_PROCESSING_KEY}:dead:0", "stale")
+        self.redis.lpush(live.processing_key(1), "in-flight")
+        self.redis.lpush(self.processing_key, "mine")
+
+        self.worker._recover()
+
+        self.assertEqual(self.redis.lists[EMAIL_QUEUE_KEY], ["stale"])
+        self.assertEqual(self.redis.lists[live.processing_key(1)], ["in-flight"])
+        self.assertEqual(self.redis.lists[self.processing_key], ["mine"])
+
+        live.stop()
+        self.assertNotIn(f"{EMAIL_WORKER_KEY}:{live.worker_id}", self.redis.values)
+        self.worker._recover()
+        self.assertEqual(self.redis.lists[EMAIL_QUEUE_KEY], ["in-flight", "stale"])
+
+    def test_worker_runs_one_sender_per_pooled_connection(self):
+        worker = EmailWorker(sender=self.sender, concurrency=3)
+        with patch.object(worker, "_run"), patch.object(worker, "_supervise"):
+            worker.ensure_started()
+            names = [thread.name for thread in worker._threads]
+            worker.stop()
+
+        self.assertEqual(names, ["email-supervisor", "email-worker-0", "email-worker-1", "email-worker-2"])
+        self.assertEqual(EmailWorker(sender=self.sender).concurrency, smtp_tools.config.smtp_pool_size)
+
+    def test_unknown_email_status(self):
+        self.assertIsNone(smtp_tools.get_email_status("missing"))
+
+
+class TestSmtpConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = SmtpConnectionPool(size=2, idle_timeout=60)
+        self.connections = []
+
+        def connect(*args, **kwargs):
+            connection = MagicMock()
+            connection.noop.return_value = (250, b"OK")
+            self.connections.append(connection)
+            return connection
+
+        patcher = patch("services.tools.smtp_tools.smtplib.SMTP", side_effect=connect)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_connection_is_reused_after_noop(self):
+        with patch.object(smtp_tools.config, "smtp_use_ssl", False):
+            sender = SmtpEmailSender(self.pool)
+            sender.send_email("a@example.com", "Hi", "Hello")
+            sender.send_email("b@example.com", "Hi", "Hello")
+
+        self.assertEqual(len(self.connections), 1)
+        self.connections[0].login.assert_called_once()
+        self.connections[0].noop.assert_called_once()
+        self.assertEqual(self.connections[0].sendmail.call_count, 2)
+
+    def test_dead_connection_is_replaced(self):
+        with patch.object(smtp_tools.config, "smtp_use_ssl", False):
+            with self.pool.connection():
+                pass
+            self.connections[0].noop.side_effect = OSError("gone")
+            with self.pool.connection() as connection:
+                pass
+
+        self.assertIs(connection, self.connections[1])
+        self.connections[0].quit.assert_called_once()
+
+    def test_failed_send_discards_connection(self):
+        with patch.object(smtp_tools.config, "smtp_use_ssl", False):
+            with self.assertRaises(OSError):
+                with self.pool.connection() as connection:
+                    raise OSError("broken pipe")
+            with self.pool.connection() as second:
+                pass
+
+        self.assertIsNot(connection, second)
+
+    def test_attachments_are_encoded(self):
+        message = SmtpEmailSender(self.pool).build_message(
+            "a@example.com", "Hi", "Hello", [{"filename": "a.txt", "content": "data"}]
+        )
+        self.assertIn('filename="a.txt"', message)
+        self.assertIn("ZGF0YQ==", message)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event, text
+
+from services.tools import sql_tool
+from services.tools.sql_tool import (
+    _create_query_tool,
+    _stream_query,
+    get_sql_database,
+    get_sql_engine,
+    sql_query,
+)
+
+
+class TestSqlTool(unittest.TestCase):
+    def setUp(self):
+        sql_tool._engines.clear()
+        sql_tool._databases.clear()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.url = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        engine = create_engine(self.url)
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+            for i in range(20):
+                conn.execute(text("INSERT INTO items (name) VALUES (:name)"), {"name": f"item{i}"})
+        engine.dispose()
+        patcher = patch("services.tools.sql_tool.get_tool_by_name", return_value={"url": self.url})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        for engine in sql_tool._engines.values():
+            engine.dispose()
+        sql_tool._engines.clear()
+        sql_tool._databases.clear()
+        self.tmpdir.cleanup()
+
+    def test_engine_is_shared_per_url(self):
+        self.assertIs(get_sql_engine("a_sql"), get_sql_engine("b_sql"))
+
+    def test_missing_url_raises(self):
+        with patch("services.tools.sql_tool.get_tool_by_name", return_value={"url": ""}):
+            with self.assertRaises(ValueError):
+                get_sql_engine("a_sql")
+
+    def test_database_is_cached_until_ttl(self):
+        db = get_sql_database("a_sql")
+        self.assertIs(get_sql_database("a_sql"), db)
+
+        with patch.object(sql_tool.config, "sql_schema_cache_ttl", 0):
+            self.assertIsNot(get_sql_database("a_sql"), db)
+
+    def test_table_info_is_memoized(self):
+        db = get_sql_database("a_sql")
+        statements = []
+        event.listen(db._engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        first = db.get_table_info(["items"])
+        count = len(statements)
+        second = db.get_table_info(["items"])
+
+        self.assertEqual(first, second)
+        self.assertIn("CREATE TABLE items", first)
+        self.assertGreater(count, 0)
+        self.assertEqual(len(statements), count)
+
+    def test_query_rows_are_capped(self):
+        db = get_sql_database("a_sql")
+        db._max_rows = 5
+
+        result = db._execute("SELECT * FROM items")
+
+        self.assertEqual(len(result), 5)
+        self.assertEqual(result[0], {"id": 1, "name": "item0"})
+
+    @patch("services.tools.sql_tool.create_engine")
+    def test_postgres_engine_sets_statement_timeout(self, mock_create_engine):
+        sql_tool._create_engine("postgresql://user:pw@host/db")
+
+        kwargs = mock_create_engine.call_args.kwargs
+        self.assertEqual(
+            kwargs["connect_args"],
+            {"options": f"-c statement_timeout={sql_tool.config.sql_statement_timeout * 1000}"},
+        )
+        self.assertEqual(kwargs["pool_size"], sql_tool.config.sql_pool_size)
+
+    def test_stream_query_stops_at_row_budget(self):
+        columns, rows, truncated = _stream_query(get_sql_engine("a_sql"), "SELECT * FROM items", 5, 10000)
+
+        self.assertEqual(columns, ["id", "name"])
+        self.assertEqual(len(rows), 5)
+        self.assertTrue(truncated)
+
+    def test_stream_query_stops_at_byte_budget(self):
+        _, rows, truncated = _stream_query(get_sql_engine("a_sql"), "SELECT name FROM items", 100, 12)
+
+        self.assertEqual(rows, [("item0",), ("item1",)])
+        self.assertTrue(truncated)
+
+    def test_stream_query_without_result_set(self):
+        result = _stream_query(get_sql_engine("a_sql"), "UPDATE items SET name = 'x' WHERE id = 1", 10, 100)
+
+        self.assertIsNone(result)
+
+    def test_sql_query_returns_summary_and_preview(self):
+        db = get_sql_database("a_sql")
+        with patch.object(sql_tool.config, "sql_preview_rows", 3):
+            result = sql_query(db, "a_sql", "SELECT * FROM items")
+
+        self.assertTrue(result.startswith("Returned 20 rows and 2 columns."))
+        self.assertIn("Column summary:", result)
+        self.assertIn("First 3 rows:", result)
+        self.assertIn("item2", result)
+        self.assertNotIn("item3", result)
+        self.assertNotIn("cut off", result)
+
+    def test_sql_query_reports_truncation_and_errors(self):
+        db = get_sql_database("a_sql")
+        with patch.object(sql_tool.config, "sql_max_rows", 4):
+            result = sql_query(db, "a_sql", "SELECT * FROM items")
+
+        self.assertIn("cut off at 4 rows", result)
+        self.assertTrue(sql_query(db, "a_sql", "SELECT * FROM missing").startswith("Error:"))
+
+    @patch("services.tools.sql_tool.MinioStorage")
+    def test_query_tool_exports_csv(self, mock_minio_cls):
+        mock_minio_cls.return_value.file_upload_from_string.return_value = True
+        tool = _create_query_tool(get_sql_database("a_sql"), "a_sql")
+
+        result = tool.invoke({"query": "SELECT * FROM items", "export": True})
+
+        args = mock_minio_cls.return_value.file_upload_from_string.call_args.args
+        self.assertTrue(args[0].startswith(b"id,name\n1,item0\n"))
+        self.assertTrue(args[1].startswith(f"{sql_tool.config.s3_base_path}/sql_results/a_sql/"))
+        self.assertEqual(args[2], "text/csv")
+        self.assertIn(f"Saved all 20 rows to {sql_tool.config.s3_bucket}://{args[1]}.", result)
+
+    @patch("services.tools.sql_tool.MinioStorage")
+    def test_export_of_truncated_result_says_it_is_incomplete(self, mock_minio_cls):
+        mock_minio_cls.return_value.file_upload_from_string.return_value = True
+        db = get_sql_database("a_sql")
+        with patch.object(sql_tool.config, "sql_max_rows", 4):
+            result = sql_query(db, "a_sql", "SELECT * FROM items", export=True)
+
+        csv = mock_minio_cls.return_value.file_upload_from_string.call_args.args[0]
+        self.assertEqual(len(csv.decode("utf-8").strip().split("\n")), 5)
+        self.assertIn("Saved the first 4 rows to", result)
+        self.assertIn("the file is incomplete", result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,18 +1,74 @@
+import asyncio
 import json
+import threading
 import unittest
-from unittest.mock import MagicMock, mock_open, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
+from services.tools import ssh_tools
 from services.tools.ssh_tools import (
     _establish_ssh_connection,
+    _get_ssh_connection,
+    _release_ssh_connection,
+    acode_execution_tool,
+    aexecute_ssh_command,
+    code_execution,
     code_execution_tool,
     execute_ssh_command,
 )
 
+
+class FakeChannel:
+    def __init__(self, stdout=(), stderr=(), finished=True):
+        self.stdout = list(stdout)
+        self.stderr = list(stderr)
+        self.finished = finished
+        self.closed = False
+
+    def recv_ready(self):
+        return bool(self.stdout)
+
+    def recv(self, _size):
+        return self.stdout.pop(0)
+
+    def recv_stderr_ready(self):
+        return bool(self.stderr)
+
+    def recv_stderr(self, _size):
+        return self.stderr.pop(0)
+
+    def exit_status_ready(self):
+        return self.finished and not self.stdout and not self.stderr
+
+    def close(self):
+        self.closed = True
+
+
+class FloodingChannel(FakeChannel):
+    """Always has more stdout ready, like a remote `yes`."""
+
+    def __init__(self):
+        super().__init__(stdout=[b"__PENG_PID__5\n"], finished=False)
+
+    def recv_ready(self):
+        return True
+
+    def recv(self, size):
+        return self.stdout.pop(0) if self.stdout else b"y" * size
+
+
 class TestSshTools(unittest.TestCase):
+    def setUp(self):
+        ssh_tools._hosts.clear()
+        ssh_tools._connections.clear()
+
+    def tearDown(self):
+        ssh_tools._hosts.clear()
+        ssh_tools._connections.clear()
+
     @patch("services.tools.ssh_tools.MinioStorage")
     def test_establish_ssh_connection_returns_none_when_config_missing(self, mock_minio_cls):
         mock_minio = mock_minio_cls.return_value
-        mock_minio.file_download_to_memory.return_value = None
+        mock_minio.file_read_cached.return_value = None
 
         result = _establish_ssh_connection("homelab")
 
@@ -21,14 +77,10 @@ class TestSshTools(unittest.TestCase):
     @patch("services.tools.ssh_tools.paramiko.AutoAddPolicy")
     @patch("services.tools.ssh_tools.paramiko.SSHClient")
     @patch("services.tools.ssh_tools.paramiko.Ed25519Key.from_private_key")
-    @patch("services.tools.ssh_tools.os.remove")
-    @patch("builtins.open", new_callable=mock_open, read_data="FAKE_PRIVATE_KEY")
     @patch("services.tools.ssh_tools.MinioStorage")
     def test_establish_ssh_connection_success(
         self,
         mock_minio_cls,
-        _mock_open,
-        mock_remove,
         mock_from_private_key,
         mock_ssh_client_cls,
         mock_auto_add_policy,
@@ -46,7 +98,7 @@ class TestSshTools(unittest.TestCase):
         ).encode("utf-8")
 
         mock_minio = mock_minio_cls.return_value
-        mock_minio.file_download_to_memory.return_value = config_bytes
+        mock_minio.file_read_cached.side_effect = [config_bytes, b"FAKE_PRIVATE_KEY"]
         fake_key = MagicMock()
         mock_from_private_key.return_value = fake_key
         fake_ssh = MagicMock()
@@ -57,12 +109,8 @@ class TestSshTools(unittest.TestCase):
         result = _establish_ssh_connection("homelab")
 
         self.assertIs(result, fake_ssh)
-        mock_minio.file_download.assert_called_once_with(
-            "keys/homelab",
-            "temp_private_key",
-            bucket_name="test",
-        )
-        mock_remove.assert_called_once_with("temp_private_key")
+        mock_minio.file_read_cached.assert_called_with("keys/homelab", bucket_name="test")
+        self.assertEqual(mock_from_private_key.call_args[0][0].read(), "FAKE_PRIVATE_KEY")
         fake_ssh.set_missing_host_key_policy.assert_called_once_with(policy)
         fake_ssh.connect.assert_called_once_with(
             hostname="10.0.0.2",
@@ -96,7 +144,7 @@ class TestSshTools(unittest.TestCase):
         self.assertEqual(result, {"output": "hello"})
         fake_ssh.exec_command.assert_called_once_with("source ~/.zshrc\necho hello")
         stdin.write.assert_not_called()
-        fake_ssh.close.assert_called_once()
+        fake_ssh.close.assert_not_called()
 
     @patch("services.tools.ssh_tools._establish_ssh_connection")
     def test_execute_ssh_command_writes_stdin_payload(self, mock_connect):
@@ -116,7 +164,7 @@ class TestSshTools(unittest.TestCase):
         stdin.write.assert_called_once_with("print(1)")
         stdin.flush.assert_called_once()
         stdin.channel.shutdown_write.assert_called_once()
-        fake_ssh.close.assert_called_once()
+        fake_ssh.close.assert_not_called()
 
     @patch("services.tools.ssh_tools._establish_ssh_connection")
     def test_execute_ssh_command_returns_stderr_as_error(self, mock_connect):
@@ -132,7 +180,7 @@ class TestSshTools(unittest.TestCase):
 
         self.assertEqual(result, {"error": "permission denied"})
         fake_ssh.exec_command.assert_called_once_with("source ~/.zshrc\ncat /root/secret")
-        fake_ssh.close.assert_called_once()
+        fake_ssh.close.assert_not_called()
 
     @patch("services.tools.ssh_tools._establish_ssh_connection")
     def test_execute_ssh_command_catches_exception(self, mock_connect):
@@ -144,6 +192,119 @@ class TestSshTools(unittest.TestCase):
 
         self.assertEqual(result, {"error": "boom"})
         fake_ssh.exec_command.assert_called_once_with("source ~/.zshrc\nbad")
+        fake_ssh.close.assert_called_once()
+        self.assertNotIn("homelab", ssh_tools._connections)
+
+    @patch("services.tools.ssh_tools._establish_ssh_connection")
+    def test_get_ssh_connection_reuses_pooled_client(self, mock_connect):
+        fake_ssh = MagicMock()
+        mock_connect.return_value = fake_ssh
+
+        self.assertIs(_get_ssh_connection("homelab"), fake_ssh)
+        self.assertIs(_get_ssh_connection("homelab"), fake_ssh)
+
+        mock_connect.assert_called_once_with("homelab")
+
+    @patch("services.tools.ssh_tools._establish_ssh_connection")
+    def test_get_ssh_connection_replaces_dead_transport(self, mock_connect):
+        dead_ssh = MagicMock()
+        dead_ssh.get_transport.return_value.is_active.return_value = False
+        fresh_ssh = MagicMock()
+        mock_connect.side_effect = [dead_ssh, fresh_ssh]
+
+        _get_ssh_connection("homelab")
+        result = _get_ssh_connection("homelab")
+
+        self.assertIs(result, fresh_ssh)
+        dead_ssh.close.assert_called_once()
+
+    @patch("services.tools.ssh_tools.time.monotonic")
+    @patch("services.tools.ssh_tools._establish_ssh_connection")
+    def test_get_ssh_connection_closes_idle_clients(self, mock_connect, mock_monotonic):
+        idle_ssh = MagicMock()
+        fresh_ssh = MagicMock()
+        mock_connect.side_effect = [idle_ssh, fresh_ssh]
+        mock_monotonic.return_value = 0
+        _get_ssh_connection("homelab")
+        _release_ssh_connection("homelab", idle_ssh)
+
+        mock_monotonic.return_value = ssh_tools.config.ssh_idle_timeout + 1
+        result = _get_ssh_connection("homelab")
+
+        self.assertIs(result, fresh_ssh)
+        idle_ssh.close.assert_called_once()
+
+    @patch("services.tools.ssh_tools.time.monotonic")
+    @patch("services.tools.ssh_tools._establish_ssh_connection")
+    def test_busy_client_is_never_closed_as_idle(self, mock_connect, mock_monotonic):
+        busy_ssh = MagicMock()
+        mock_connect.return_value = busy_ssh
+        mock_monotonic.return_value = 0
+        _get_ssh_connection("homelab")
+
+        mock_monotonic.return_value = ssh_tools.config.ssh_idle_timeout + 1
+        ssh_tools._get_ssh_connection("other")
+
+        busy_ssh.close.assert_not_called()
+        self.assertEqual(ssh_tools._connections["homelab"]["active"], 1)
+
+    @patch("services.tools.ssh_tools.time.monotonic")
+    @patch("services.tools.ssh_tools._establish_ssh_connection")
+    def test_release_restarts_idle_clock(self, mock_connect, mock_monotonic):
+        mock_connect.return_value = MagicMock()
+        mock_monotonic.return_value = 0
+        ssh = _get_ssh_connection("homelab")
+
+        mock_monotonic.return_value = 50
+        _release_ssh_connection("homelab", ssh)
+
+        self.assertEqual(ssh_tools._connections["homelab"], {"client": ssh, "last_used": 50, "active": 0})
+
+    @patch("services.tools.ssh_tools._establish_ssh_connection")
+    def test_handshake_does_not_hold_pool_lock(self, mock_connect):
+        pool_free = []
+
+        def use_pool():
+            if ssh_tools._connections_lock.acquire(timeout=1):
+                ssh_tools._connections_lock.release()
+                pool_free.append(True)
+
+        def connect(_hostname):
+            # Another thread must be able to use the pool while we connect
+            thread = threading.Thread(target=use_pool)
+            thread.start()
+            thread.join()
+            return MagicMock()
+
+        mock_connect.side_effect = connect
+
+        _get_ssh_connection("homelab")
+
+        self.assertEqual(pool_free, [True])
+
+    def test_close_ssh_connections_closes_pooled_clients(self):
+        ssh = MagicMock()
+        ssh_tools._connections["homelab"] = {"client": ssh, "last_used": 0, "active": 1}
+
+        ssh_tools.close_ssh_connections()
+
+        ssh.close.assert_called_once()
+        self.assertEqual(ssh_tools._connections, {})
+
+    @patch("services.tools.ssh_tools.paramiko.SSHClient")
+    @patch("services.tools.ssh_tools.paramiko.Ed25519Key.from_private_key")
+    @patch("services.tools.ssh_tools.MinioStorage")
+    def test_host_config_is_parsed_once(self, mock_minio_cls, mock_from_private_key, _mock_ssh_client_cls):
+        config_bytes = json.dumps(
+            [{"hostname": "homelab", "IP": "10.0.0.2", "user": "ubuntu", "private_key_path": "keys/homelab"}]
+        ).encode("utf-8")
+        mock_minio_cls.return_value.file_read_cached.side_effect = [config_bytes, b"FAKE_PRIVATE_KEY"]
+
+        _establish_ssh_connection("homelab")
+        _establish_ssh_connection("homelab")
+
+        self.assertEqual(mock_minio_cls.return_value.file_read_cached.call_count, 2)
+        mock_from_private_key.assert_called_once()
 
     @patch("services.tools.ssh_tools.execute_ssh_command")
     def test_code_execution_tool_python_command(self, mock_execute):
@@ -200,5 +361,103 @@ class TestSshTools(unittest.TestCase):
         )
 
 
+
+class TestAsyncSshExecution(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.ssh = MagicMock()
+        patcher = patch("services.tools.ssh_tools._get_ssh_connection", return_value=self.ssh)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def _run(self, channel, **kwargs):
+        with patch("services.tools.ssh_tools._open_command_channel", return_value=channel) as mock_open_channel:
+            result = await aexecute_ssh_command("homelab", "python -", stdin_data="print(1)", **kwargs)
+        mock_open_channel.assert_called_once_with(self.ssh, "python -", "print(1)")
+        return result
+
+    async def test_streams_output_and_strips_pid_marker(self):
+        channel = FakeChannel(stdout=[b"__PENG_PID__42\nhel", "lo \u00e9".encode("utf-8")[:-1], "\u00e9".encode("utf-8")[-1:]])
+        chunks = []
+
+        result = await self._run(channel, on_output=lambda stream, text: chunks.append((stream, text)))
+
+        self.assertEqual(result, {"output": "hello \u00e9"})
+        self.assertEqual("".join(text for _, text in chunks), "hello \u00e9")
+        self.assertTrue(channel.closed)
+
+    async def test_pid_marker_after_shell_startup_output(self):
+        channel = FakeChannel(stdout=[b"welcome\n__PENG", b"_PID__42\nhello"])
+
+        with patch("services.tools.ssh_tools._kill_remote_process") as mock_kill:
+            result = await self._run(channel, timeout=0.1)
+
+        self.assertEqual(result, {"output": "welcome\nhello"})
+        mock_kill.assert_not_called()
+
+    @patch("services.tools.ssh_tools._kill_remote_process")
+    async def test_flooding_output_is_capped_and_yields_to_the_loop(self, mock_kill):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        result = await self._run(FloodingChannel(), max_output_bytes=ssh_tools._RECV_SIZE * 4)
+        task.cancel()
+
+        self.assertIn("execution was terminated", result["output"])
+        self.assertLessEqual(len(result["output"]), ssh_tools._RECV_SIZE * 6)
+        self.assertGreater(ticks, 1)
+        mock_kill.assert_called_once_with(self.ssh, 5)
+
+    async def test_returns_stderr_as_error(self):
+        channel = FakeChannel(stdout=[b"__PENG_PID__42\n"], stderr=[b"Traceback\n"])
+
+        result = await self._run(channel)
+
+        self.assertEqual(result, {"error": "Traceback"})
+
+    @patch("services.tools.ssh_tools._kill_remote_process")
+    async def test_kills_process_after_timeout(self, mock_kill):
+        channel = FakeChannel(stdout=[b"__PENG_PID__42\n", b"partial\n"], finished=False)
+
+        result = await self._run(channel, timeout=0.1)
+
+        self.assertIn("partial", result["error"])
+        self.assertIn("timed out after 0.1 seconds", result["error"])
+        mock_kill.assert_called_once_with(self.ssh, 42)
+
+    @patch("services.tools.ssh_tools._kill_remote_process")
+    async def test_kills_process_when_output_exceeds_limit(self, mock_kill):
+        channel = FakeChannel(stdout=[b"__PENG_PID__7\n", b"x" * 64], finished=False)
+
+        result = await self._run(channel, max_output_bytes=32)
+
+        self.assertTrue(result["output"].endswith("[Output exceeded 32 bytes; execution was terminated.]"))
+        mock_kill.assert_called_once_with(self.ssh, 7)
+
+    @patch("services.tools.ssh_tools.aexecute_ssh_command", new_callable=AsyncMock)
+    async def test_code_execution_tool_runs_async(self, mock_execute):
+        mock_execute.return_value = {"output": "1"}
+
+        result = await code_execution.ainvoke({"language": "Python", "code": "print(1)"})
+
+        self.assertEqual(result, "1")
+        args, kwargs = mock_execute.call_args
+        self.assertEqual(args, ("homelab", "uv run python -"))
+        self.assertEqual(kwargs["stdin_data"], "print(1)")
+
+    async def test_acode_execution_tool_unsupported_language(self):
+        result = await acode_execution_tool("ruby", "puts 1")
+
+        self.assertEqual(
+            result,
+            "Unsupported language: ruby. Supported languages are Python, R, Bash, and JavaScript.",
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
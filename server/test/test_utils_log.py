@@ -1,6 +1,11 @@
+import io
+import json
+import logging
+import logging.handlers
+import queue
 import unittest
-from unittest.mock import patch
-from utils.log import output_log
+from unittest.mock import MagicMock, patch
+from utils.log import JsonFormatter, _DeferredQueueHandler, output_log
 
 class TestLog(unittest.TestCase):
     @patch('utils.log.logger')
@@ -27,6 +32,58 @@ class TestLog(unittest.TestCase):
     def test_output_log_default(self, mock_logger):
         output_log("test default", "unknown")
         mock_logger.info.assert_called_once_with("test default")
+    @patch('utils.log.logger')
+    def test_output_log_args_are_passed_through(self, mock_logger):
+        output_log("state %s", "debug", {"messages": []})
+        mock_logger.debug.assert_called_once_with("state %s", {"messages": []})
+
+    @patch('utils.log.logger')
+    def test_callable_skipped_when_level_disabled(self, mock_logger):
+        mock_logger.isEnabledFor.return_value = False
+        render = MagicMock(return_value="expensive")
+        output_log(render, "debug")
+        render.assert_not_called()
+        mock_logger.debug.assert_not_called()
+
+    @patch('utils.log.logger')
+    def test_callable_rendered_when_level_enabled(self, mock_logger):
+        mock_logger.isEnabledFor.return_value = True
+        output_log(lambda: "expensive", "debug")
+        mock_logger.isEnabledFor.assert_called_once_with(logging.DEBUG)
+        mock_logger.debug.assert_called_once_with("expensive")
+
+    def test_json_formatter(self):
+        record = logging.makeLogRecord({
+            "name": "peng-chat", "levelname": "INFO", "msg": "chat %s done", "args": (7,), "user": "alice",
+        })
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual(entry["message"], "chat 7 done")
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["user"], "alice")
+        self.assertNotIn("args", entry)
+
+    def test_queued_record_keeps_exception_for_json(self):
+        log_queue = queue.SimpleQueue()
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        target.setFormatter(JsonFormatter())
+        listener = logging.handlers.QueueListener(log_queue, target)
+        test_logger = logging.getLogger("peng-test-queue")
+        test_logger.propagate = False
+        test_logger.addHandler(_DeferredQueueHandler(log_queue))
+        self.addCleanup(test_logger.handlers.clear)
+
+        listener.start()
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            test_logger.exception("chat %s failed", 7)
+        finally:
+            listener.stop()
+
+        entry = json.loads(stream.getvalue())
+        self.assertEqual(entry["message"], "chat 7 failed")
+        self.assertIn("ValueError: boom", entry["exception"])
 
 if __name__ == '__main__':
     unittest.main()
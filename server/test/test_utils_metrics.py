@@ -0,0 +1,76 @@
+import asyncio
+import unittest
+from utils.metrics import MetricsRegistry, timed
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_render(self):
+        counter = self.registry.counter("requests_total", "Requests", ("status",))
+        counter.inc(status="ok")
+        counter.inc(2, status="ok")
+        counter.inc(status='bad "one"')
+
+        text = self.registry.render()
+
+        self.assertIn("# TYPE requests_total counter", text)
+        self.assertIn('requests_total{status="ok"} 3', text)
+        self.assertIn('requests_total{status="bad \\"one\\""} 1', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.registry.histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1))
+        for value in [0.05, 0.1, 0.5, 3]:
+            histogram.observe(value, stage="prompt")
+
+        text = self.registry.render()
+
+        self.assertIn('latency_seconds_bucket{stage="prompt",le="0.1"} 2', text)
+        self.assertIn('latency_seconds_bucket{stage="prompt",le="1"} 3', text)
+        self.assertIn('latency_seconds_bucket{stage="prompt",le="+Inf"} 4', text)
+        self.assertIn('latency_seconds_count{stage="prompt"} 4', text)
+        self.assertIn('latency_seconds_sum{stage="prompt"} 3.65', text)
+
+    def test_callback_reads_values_at_render_time(self):
+        state = {"hits": 1}
+        self.registry.callback(
+            "cache_events_total", "Cache events", "counter", lambda: {(k,): v for k, v in state.items()}, ("event",)
+        )
+        self.registry.callback("cache_bytes", "Cache size", "gauge", lambda: {(): 10})
+        state["hits"] = 5
+
+        text = self.registry.render()
+
+        self.assertIn("# TYPE cache_events_total counter", text)
+        self.assertIn('cache_events_total{event="hits"} 5', text)
+        self.assertIn("# TYPE cache_bytes gauge\ncache_bytes 10", text)
+
+    def test_labels_must_match(self):
+        counter = self.registry.counter("errors_total", "Errors", ("kind",))
+        with self.assertRaises(ValueError):
+            counter.inc(other="x")
+        with self.assertRaises(ValueError):
+            self.registry.counter("errors_total", "Errors again")
+
+    def test_timed_sync_and_async(self):
+        histogram = self.registry.histogram("call_seconds", "Calls", ("operation",))
+
+        @timed(histogram, operation="sync")
+        def sync_call():
+            raise RuntimeError("failed")
+
+        @timed(histogram, operation="async")
+        async def async_call():
+            return 1
+
+        with self.assertRaises(RuntimeError):
+            sync_call()
+        self.assertEqual(asyncio.run(async_call()), 1)
+
+        self.assertEqual(histogram.count(operation="sync"), 1)
+        self.assertEqual(histogram.count(operation="async"), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,14 @@
+import asyncio
 import unittest
 from unittest.mock import patch, MagicMock
-from utils.minio_connection import MinioStorage, _clients
+from botocore.exceptions import ClientError
+from utils.minio_connection import MinioStorage, _clients, _object_cache
 
 class TestMinioStorage(unittest.TestCase):
     def setUp(self):
         # Clear the global cache to ensure boto3.client is called
         _clients.clear()
+        _object_cache.clear()
         self.patcher = patch('boto3.client')
         self.mock_boto3_client = self.patcher.start()
         self.mock_client = self.mock_boto3_client.return_value
@@ -27,6 +30,23 @@ class TestMinioStorage(unittest.TestCase):
         self.mock_client.put_object.assert_called_once()
         self.assertTrue(result)
 
+    def test_file_upload_from_fileobj(self):
+        file_obj = MagicMock()
+        result = self.storage.file_upload_from_fileobj(file_obj, "remote_name", "application/pdf")
+        self.mock_client.upload_fileobj.assert_called_once()
+        args, kwargs = self.mock_client.upload_fileobj.call_args
+        self.assertIs(args[0], file_obj)
+        self.assertEqual(kwargs["ExtraArgs"], {"ContentType": "application/pdf"})
+        self.assertTrue(result)
+
+    def test_generate_presigned_upload_url(self):
+        self.mock_client.generate_presigned_url.return_value = "https://signed"
+        result = self.storage.generate_presigned_upload_url("remote_name", "image/png")
+        self.assertEqual(result, "https://signed")
+        args, kwargs = self.mock_client.generate_presigned_url.call_args
+        self.assertEqual(args[0], "put_object")
+        self.assertEqual(kwargs["Params"]["ContentType"], "image/png")
+
     def test_file_download(self):
         result = self.storage.file_download("remote_name", "local_path")
         self.mock_client.download_file.assert_called_once()
@@ -40,6 +60,31 @@ class TestMinioStorage(unittest.TestCase):
         result = self.storage.file_download_to_memory("remote_name")
         self.assertEqual(result, b"content")
 
+    def test_file_read_cached_serves_fresh_entry(self):
+        mock_body = MagicMock()
+        mock_body.read.return_value = b"content"
+        self.mock_client.get_object.return_value = {"Body": mock_body, "ETag": '"abc"'}
+
+        self.assertEqual(self.storage.file_read_cached("bucket://key"), b"content")
+        self.assertEqual(self.storage.file_read_cached("bucket://key"), b"content")
+        self.mock_client.get_object.assert_called_once_with(Bucket="bucket", Key="key")
+
+    def test_file_read_cached_revalidates_stale_entry(self):
+        mock_body = MagicMock()
+        mock_body.read.return_value = b"content"
+        self.mock_client.get_object.return_value = {"Body": mock_body, "ETag": '"abc"'}
+        self.storage.file_read_cached("bucket://key")
+
+        self.mock_client.get_object.side_effect = ClientError(
+            {"Error": {"Code": "304", "Message": "Not Modified"}}, "GetObject"
+        )
+        with patch.object(_object_cache, "ttl", 0):
+            result = self.storage.file_read_cached("bucket://key")
+
+        self.assertEqual(result, b"content")
+        self.mock_client.get_object.assert_called_with(Bucket="bucket", Key="key", IfNoneMatch='"abc"')
+        self.assertEqual(_object_cache.stats()["revalidated"], 1)
+
     def test_file_exists(self):
         self.storage.file_exists("remote_name")
         self.mock_client.head_object.assert_called_once()
@@ -49,5 +94,100 @@ class TestMinioStorage(unittest.TestCase):
         self.mock_client.delete_object.assert_called_once()
         self.assertTrue(result)
 
+    def test_file_download_range(self):
+        mock_body = MagicMock()
+        mock_body.read.return_value = b"cont"
+        self.mock_client.get_object.return_value = {"Body": mock_body}
+
+        result = self.storage.file_download_range("bucket://dir/remote_name", 0, 3)
+
+        self.assertEqual(result, b"cont")
+        self.mock_client.get_object.assert_called_once_with(
+            Bucket="bucket", Key="dir/remote_name", Range="bytes=0-3"
+        )
+
+    def test_file_iter_chunks(self):
+        mock_body = MagicMock()
+        mock_body.iter_chunks.return_value = iter([b"a", b"b"])
+        self.mock_client.get_object.return_value = {"Body": mock_body}
+
+        result = list(self.storage.file_iter_chunks("remote_name", chunk_size=1))
+
+        self.assertEqual(result, [b"a", b"b"])
+        mock_body.close.assert_called_once()
+
+    def test_files_exist_heads_each_key(self):
+        def head_object(Bucket, Key):
+            if Key == "dir/b":
+                raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+            if Key == "dir/c":
+                raise ClientError({"Error": {"Code": "403"}}, "HeadObject")
+            return {}
+
+        self.mock_client.head_object.side_effect = head_object
+
+        result = self.storage.files_exist(["dir/a", "dir/b", "dir/c", "other://x"])
+
+        self.assertEqual(result, {"dir/a": True, "dir/b": False, "dir/c": None, "other://x": True})
+        self.mock_client.head_object.assert_any_call(Bucket="other", Key="x")
+        self.mock_client.get_paginator.assert_not_called()
+
+    def test_batch_methods_do_not_deadlock_on_the_s3_executor(self):
+        from utils import minio_connection
+
+        mock_body = MagicMock()
+        mock_body.read.return_value = b"content"
+        self.mock_client.get_object.return_value = {"Body": mock_body}
+        self.mock_client.head_object.return_value = {}
+        names = [f"dir/{i}" for i in range(minio_connection.config.s3_max_pool_connections * 2)]
+
+        async def fill_executor():
+            return await asyncio.wait_for(
+                asyncio.gather(
+                    *[self.storage._run_async(self.storage.files_download_to_memory, names) for _ in names],
+                    self.storage.afiles_exist(names),
+                ),
+                timeout=10,
+            )
+
+        results = asyncio.run(fill_executor())
+
+        self.assertEqual(results[0], [b"content"] * len(names))
+        self.assertTrue(all(results[-1].values()))
+
+    def test_remove_files_batches_delete_objects(self):
+        self.mock_client.delete_objects.return_value = {}
+        keys = [f"dir/{i}" for i in range(1001)]
+
+        result = self.storage.remove_files(keys)
+
+        self.assertTrue(result)
+        self.assertEqual(self.mock_client.delete_objects.call_count, 2)
+        first_batch = self.mock_client.delete_objects.call_args_list[0][1]["Delete"]["Objects"]
+        self.assertEqual(len(first_batch), 1000)
+
+    def test_remove_files_reports_errors(self):
+        self.mock_client.delete_objects.return_value = {"Errors": [{"Key": "a", "Message": "denied"}]}
+        self.assertFalse(self.storage.remove_files(["a"]))
+
+    def test_afile_download_to_memory(self):
+        mock_body = MagicMock()
+        mock_body.read.return_value = b"content"
+        self.mock_client.get_object.return_value = {"Body": mock_body}
+
+        result = asyncio.run(self.storage.afile_download_to_memory("remote_name"))
+
+        self.assertEqual(result, b"content")
+
+    def test_afile_iter_chunks(self):
+        mock_body = MagicMock()
+        mock_body.iter_chunks.return_value = iter([b"a", b"b"])
+        self.mock_client.get_object.return_value = {"Body": mock_body}
+
+        async def collect():
+            return [chunk async for chunk in self.storage.afile_iter_chunks("remote_name")]
+
+        self.assertEqual(asyncio.run(collect()), [b"a", b"b"])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from unittest.mock import patch
+
+from utils.object_cache import ObjectCache
+
+
+class TestObjectCache(unittest.TestCase):
+    def test_put_and_get(self):
+        cache = ObjectCache(max_bytes=100, ttl=60)
+        cache.put("a", b"data", '"etag"')
+        entry = cache.get("a")
+        self.assertEqual(entry.data, b"data")
+        self.assertEqual(entry.etag, '"etag"')
+        self.assertTrue(cache.is_fresh(entry))
+
+    def test_evicts_least_recently_used(self):
+        cache = ObjectCache(max_bytes=10, ttl=60)
+        cache.put("a", b"aaaa", None)
+        cache.put("b", b"bbbb", None)
+        cache.get("a")
+        cache.put("c", b"cccc", None)
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["bytes"], 8)
+
+    def test_skips_objects_larger_than_cache(self):
+        cache = ObjectCache(max_bytes=3, ttl=60)
+        cache.put("a", b"aaaa", None)
+        self.assertIsNone(cache.get("a"))
+
+    @patch("utils.object_cache.time.monotonic")
+    def test_entry_goes_stale_and_touch_revalidates(self, mock_monotonic):
+        cache = ObjectCache(max_bytes=100, ttl=10)
+        mock_monotonic.return_value = 0
+        cache.put("a", b"data", '"etag"')
+        mock_monotonic.return_value = 11
+        entry = cache.get("a")
+        self.assertFalse(cache.is_fresh(entry))
+        cache.touch("a")
+        self.assertTrue(cache.is_fresh(entry))
+        self.assertEqual(cache.stats()["revalidated"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import asyncio
+import contextlib
+from typing import Any, AsyncIterator, Dict
+from urllib.parse import urlsplit
+
+import httpx
+
+from config.config import config
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36"
+
+# Clients and semaphores are bound to the event loop that created them
+_clients: Dict[Any, httpx.AsyncClient] = {}
+_host_semaphores: Dict[Any, asyncio.Semaphore] = {}
+
+
+def _new_client(**kwargs) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(config.http_timeout),
+        limits=httpx.Limits(
+            max_connections=config.http_max_connections,
+            max_keepalive_connections=config.http_max_connections,
+        ),
+        follow_redirects=True,
+        **kwargs,
+    )
+
+
+def get_http_client(name: str = "default", **kwargs) -> httpx.AsyncClient:
+    """Return a pooled AsyncClient shared by all callers on the current loop.
+
+    Clients that carry credentials (e.g. an API key header) should use their
+    own ``name`` so the header is never sent to other hosts.
+    """
+    key = (asyncio.get_running_loop(), name)
+    client = _clients.get(key)
+    if client is None or client.is_closed:
+        client = _new_client(**kwargs)
+        _clients[key] = client
+    return client
+
+
+@contextlib.asynccontextmanager
+async def host_limit(url: str) -> AsyncIterator[None]:
+    """Bound the number of concurrent requests to a single host."""
+    key = (asyncio.get_running_loop(), urlsplit(url).netloc)
+    semaphore = _host_semaphores.get(key)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(config.http_per_host_concurrency)
+        _host_semaphores[key] = semaphore
+    async with semaphore:
+        yield
+
+
+async def request(method: str, url: str, **kwargs) -> httpx.Response:
+    async with host_limit(url):
+        return await get_http_client(headers={"user-agent": USER_AGENT}).request(
+            method, url, **kwargs
+        )
+
+
+async def close_http_clients() -> None:
+    loop = asyncio.get_running_loop()
+    for key, client in list(_clients.items()):
+        if key[0] is loop:
+            await client.aclose()
+            _clients.pop(key)
@@ -1,21 +1,93 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
 from config.config import config
 
+_LEVELS = {
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "debug": logging.DEBUG,
+}
+# Attributes every LogRecord has; anything else came from ``extra``
+_RECORD_FIELDS = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with ``extra`` fields as top-level keys."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "name": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        entry.update({k: v for k, v in record.__dict__.items() if k not in _RECORD_FIELDS})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue the record untouched, leaving all formatting to the listener.
+
+    The stock ``prepare`` formats on the calling thread and drops ``exc_info``,
+    which would leave the JSON ``exception`` field empty. The queue never
+    leaves the process, so the record can be passed as is.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def _build_handler() -> logging.Handler:
+    handler = logging.StreamHandler()
+    if config.log_format == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    return handler
+
+
 logger = logging.getLogger(config.app_name)
 logger.setLevel(config.log_level)
-handler = logging.StreamHandler()
-formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-handler.setFormatter(formatter)
-logger.addHandler(handler)
+handler = _build_handler()
+listener = None
+if config.log_async:
+    # Callers only enqueue the record; formatting and the write to stderr
+    # happen on the listener thread
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(_DeferredQueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+else:
+    logger.addHandler(handler)
+
+
+def log_enabled(level) -> bool:
+    return logger.isEnabledFor(_LEVELS.get(level.lower(), logging.INFO))
+
 
+def output_log(message, level, *args):
+    """Log ``message`` at ``level``.
 
-def output_log(message, level):
+    ``args`` are merged into the message %-style and a callable message is
+    only called when the level is enabled, so use either for anything
+    expensive to render, such as prompts, agent state or streamed events.
+    """
     global logger
+    if callable(message):
+        if not log_enabled(level):
+            return
+        message = message()
     if level.lower() == "warning":
-        logger.warning(message)
+        logger.warning(message, *args)
     elif level.lower() == "error":
-        logger.error(message)
+        logger.error(message, *args)
     elif level.lower() == "debug":
-        logger.debug(message)
+        logger.debug(message, *args)
     else:
-        logger.info(message)
+        logger.info(message, *args)
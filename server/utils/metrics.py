@@ -0,0 +1,225 @@
+"""In-process counters and histograms rendered in the Prometheus text format.
+
+Everything lives in this process, so ``GET /metrics`` works without a
+collector; point a Prometheus scraper at it to keep history.
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+import asyncio
+import bisect
+import functools
+import threading
+import time
+
+# Seconds; wide enough for both cache lookups and full LLM turns
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the duration of the block, including when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return int(sum(series[:-1])) if series else 0
+
+    def samples(self):
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        lines = []
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(values[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(cumulative)}")
+        return lines
+
+
+class Callback(Metric):
+    """Reads its samples from a function at render time, for state kept elsewhere.
+
+    ``read`` returns a mapping of label-value tuples to numbers.
+    """
+
+    def __init__(self, name, documentation, kind, read, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self._read = read
+
+    def samples(self):
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._read().items())
+        ]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, kind, read, labelnames=()) -> Callback:
+        return self.register(Callback(name, documentation, kind, read, labelnames))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def timed(histogram: Histogram, **labels):
+    """Decorate a sync or async function to observe its duration."""
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with histogram.time(**labels):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+CHAT_REQUESTS = registry.counter(
+    "peng_chat_requests_total", "Chat requests by operator, model and outcome", ("operator", "model", "status")
+)
+CHAT_SECONDS = registry.histogram(
+    "peng_chat_seconds", "End-to-end chat request duration", ("operator", "model")
+)
+CHAT_STAGE_SECONDS = registry.histogram(
+    "peng_chat_stage_seconds", "Duration of chat request stages", ("stage",)
+)
+TIME_TO_FIRST_TOKEN_SECONDS = registry.histogram(
+    "peng_time_to_first_token_seconds", "Time from chat request to the first streamed model output", ("operator", "model")
+)
+MODEL_CALL_SECONDS = registry.histogram(
+    "peng_model_call_seconds", "Duration of one agent model call", ("operator", "model")
+)
+TOOL_CALL_SECONDS = registry.histogram(
+    "peng_tool_call_seconds", "Duration of one tool execution", ("tool", "status")
+)
+TOOL_TRUNCATION_SECONDS = registry.histogram(
+    "peng_tool_truncation_seconds", "Duration of the LLM call shortening oversized tool output"
+)
+MYSQL_SECONDS = registry.histogram(
+    "peng_mysql_seconds", "MySQL operation duration", ("operation", "table")
+)
+REDIS_SECONDS = registry.histogram(
+    "peng_redis_seconds", "Redis table cache operation duration", ("operation",)
+)
+S3_SECONDS = registry.histogram(
+    "peng_s3_seconds", "S3 operation duration", ("operation",)
+)
+QDRANT_SECONDS = registry.histogram(
+    "peng_qdrant_seconds", "Qdrant operation duration", ("operation",)
+)
@@ -1,13 +1,71 @@
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
 from config.config import config
 from utils.log import output_log
+from utils.metrics import S3_SECONDS, registry, timed
+from utils.object_cache import ObjectCache
+from typing import Iterator, AsyncIterator
+import asyncio
+import functools
+import io
 import os
 import threading
 
 
 _clients = {}
 _lock = threading.RLock()
+# Multipart transfers read at most chunksize * max_concurrency bytes at a time.
+_transfer_config = TransferConfig(
+    multipart_threshold=config.s3_multipart_chunksize,
+    multipart_chunksize=config.s3_multipart_chunksize,
+    max_concurrency=4,
+)
+# Blocking boto3 calls made from async code run here, sized to the HTTP pool.
+_executor = ThreadPoolExecutor(
+    max_workers=config.s3_max_pool_connections,
+    thread_name_prefix="s3",
+)
+# Batch methods fan out here rather than on _executor, so a batch running on
+# _executor never waits on work queued behind itself.
+_fanout_executor = ThreadPoolExecutor(
+    max_workers=config.s3_max_pool_connections,
+    thread_name_prefix="s3-fanout",
+)
+# delete_objects accepts at most 1000 keys per request.
+_DELETE_BATCH_SIZE = 1000
+# Read-through cache for objects fetched with file_read_cached.
+_object_cache = ObjectCache(
+    max_bytes=config.s3_cache_max_bytes,
+    ttl=config.s3_cache_ttl,
+)
+
+
+def get_cache_stats():
+    return _object_cache.stats()
+
+
+registry.callback(
+    "peng_s3_cache_events_total",
+    "Object cache lookups and evictions by event",
+    "counter",
+    lambda: {(event,): get_cache_stats()[event] for event in ("hits", "misses", "revalidated", "evictions")},
+    ("event",),
+)
+registry.callback(
+    "peng_s3_cache_bytes",
+    "Bytes held by the object cache",
+    "gauge",
+    lambda: {(): get_cache_stats()["bytes"]},
+)
+registry.callback(
+    "peng_s3_cache_entries",
+    "Objects held by the object cache",
+    "gauge",
+    lambda: {(): get_cache_stats()["entries"]},
+)
 
 
 def _get_user_s3_credentials(user_name: str):
@@ -58,6 +116,9 @@ class MinioStorage:
                         aws_access_key_id=self.access_key,
                         aws_secret_access_key=self.secret_key,
                         region_name=self.region,
+                        config=BotoConfig(
+                            max_pool_connections=config.s3_max_pool_connections
+                        ),
                     )
             self.client = _clients[cache_key]
 
@@ -69,6 +130,7 @@ class MinioStorage:
     #   - application/pdf
     #   - image/jpeg
     #   - application/vnd.openxmlformats-officedocument.spreadsheetml.sheet
+    @timed(S3_SECONDS, operation="file_upload")
     def file_upload(
         self, file_path, file_name, content_type, bucket_name=config.s3_bucket
     ):
@@ -87,6 +149,7 @@ class MinioStorage:
             return False
         return True
 
+    @timed(S3_SECONDS, operation="file_upload_from_string")
     def file_upload_from_string(
         self,
         file_content,
@@ -108,6 +171,52 @@ class MinioStorage:
             return False
         return True
 
+    @timed(S3_SECONDS, operation="file_upload_from_fileobj")
+    def file_upload_from_fileobj(
+        self,
+        file_obj,
+        file_name,
+        content_type,
+        bucket_name=config.s3_bucket,
+    ):
+        try:
+            file_name = file_name.replace("\\", "/").replace("//", "/")
+            output_log(f"Streaming file to S3: {file_name} with content type {content_type}", "debug")
+            self.client.upload_fileobj(
+                file_obj,
+                bucket_name,
+                file_name,
+                ExtraArgs={"ContentType": content_type},
+                Config=_transfer_config,
+            )
+        except Exception as e:
+            output_log(f"Error streaming file to S3: {e}", "error")
+            return False
+        return True
+
+    def generate_presigned_upload_url(
+        self,
+        file_name,
+        content_type,
+        bucket_name=config.s3_bucket,
+        expires_in=config.s3_presigned_url_expiration,
+    ):
+        try:
+            file_name = file_name.replace("\\", "/").replace("//", "/")
+            return self.client.generate_presigned_url(
+                "put_object",
+                Params={
+                    "Bucket": bucket_name,
+                    "Key": file_name,
+                    "ContentType": content_type,
+                },
+                ExpiresIn=expires_in,
+            )
+        except Exception as e:
+            output_log(f"Error generating presigned upload URL: {e}", "error")
+            return None
+
+    @timed(S3_SECONDS, operation="file_download")
     def file_download(self, file_name, download_path, bucket_name=config.s3_bucket):
         try:
             if len(file_name.split("://")) > 1:
@@ -115,12 +224,15 @@ class MinioStorage:
                 file_name = file_name.split("://")[1]
             file_name = file_name.replace("\\", "/")
             file_name = file_name.replace("//", "/")
-            self.client.download_file(bucket_name, file_name, download_path)
+            self.client.download_file(
+                bucket_name, file_name, download_path, Config=_transfer_config
+            )
         except Exception as e:
             output_log(f"Error downloading file from S3: {e}", "error")
             return False
         return True
 
+    @timed(S3_SECONDS, operation="file_download_to_memory")
     def file_download_to_memory(self, file_name, bucket_name=config.s3_bucket):
         try:
             if len(file_name.split("://")) > 1:
@@ -165,6 +277,7 @@ class MinioStorage:
             output_log(f"Error listing files from S3: {e}", "error")
             return None
 
+    @timed(S3_SECONDS, operation="file_exists")
     def file_exists(self, file_name, bucket_name=config.s3_bucket):
         try:
             file_name = file_name.replace("\\", "/")
@@ -179,6 +292,7 @@ class MinioStorage:
             output_log(f"Error checking file from S3: {e}", "error")
             return False
 
+    @timed(S3_SECONDS, operation="remove_file")
     def remove_file(self, file_name, bucket_name=config.s3_bucket):
         try:
             self.client.delete_object(Bucket=bucket_name, Key=file_name)
@@ -189,3 +303,219 @@ class MinioStorage:
             output_log(f"Error removing file from S3: {e}", "error")
             return False
         return True
+
+    def _split_path(self, file_name, bucket_name):
+        if len(file_name.split("://")) > 1:
+            bucket_name = file_name.split("://")[0]
+            file_name = file_name.split("://")[1]
+        file_name = file_name.replace("\\", "/")
+        file_name = file_name.replace("//", "/")
+        return bucket_name, file_name
+
+    # Ranged GETs are issued concurrently by the transfer manager for objects
+    # larger than the multipart chunk size.
+    def file_download_to_memory_concurrent(self, file_name, bucket_name=config.s3_bucket):
+        try:
+            bucket_name, file_name = self._split_path(file_name, bucket_name)
+            buffer = io.BytesIO()
+            self.client.download_fileobj(
+                bucket_name, file_name, buffer, Config=_transfer_config
+            )
+            return buffer.getvalue()
+        except Exception as e:
+            output_log(f"Error downloading file from S3 to memory: {e}", "error")
+            return None
+
+    @timed(S3_SECONDS, operation="file_download_range")
+    def file_download_range(self, file_name, start, end=None, bucket_name=config.s3_bucket):
+        try:
+            bucket_name, file_name = self._split_path(file_name, bucket_name)
+            byte_range = f"bytes={start}-{end}" if end is not None else f"bytes={start}-"
+            response = self.client.get_object(
+                Bucket=bucket_name, Key=file_name, Range=byte_range
+            )
+            body = response["Body"]
+            try:
+                return body.read()
+            finally:
+                body.close()
+        except Exception as e:
+            output_log(f"Error downloading file range from S3: {e}", "error")
+            return None
+
+    def file_iter_chunks(
+        self, file_name, chunk_size=1024 * 1024, bucket_name=config.s3_bucket
+    ) -> Iterator[bytes]:
+        bucket_name, file_name = self._split_path(file_name, bucket_name)
+        response = self.client.get_object(Bucket=bucket_name, Key=file_name)
+        body = response["Body"]
+        try:
+            for chunk in body.iter_chunks(chunk_size=chunk_size):
+                yield chunk
+        finally:
+            body.close()
+
+    @timed(S3_SECONDS, operation="file_read_cached")
+    def file_read_cached(self, file_name, bucket_name=config.s3_bucket):
+        """Read an object through the local cache, revalidating stale entries by ETag."""
+        bucket_name, file_name = self._split_path(file_name, bucket_name)
+        cache_key = (self.user_name, bucket_name, file_name)
+        entry = _object_cache.get(cache_key)
+        if entry is not None and _object_cache.is_fresh(entry):
+            _object_cache.record("hits")
+            return entry.data
+        request = {"Bucket": bucket_name, "Key": file_name}
+        if entry is not None and entry.etag:
+            request["IfNoneMatch"] = entry.etag
+        try:
+            response = self.client.get_object(**request)
+        except ClientError as e:
+            if entry is not None and e.response.get("Error", {}).get("Code") in ("304", "NotModified"):
+                _object_cache.touch(cache_key)
+                return entry.data
+            _object_cache.invalidate(cache_key)
+            output_log(f"Error downloading file from S3 to memory: {e}", "error")
+            return None
+        except Exception as e:
+            output_log(f"Error downloading file from S3 to memory: {e}", "error")
+            return None
+        _object_cache.record("misses")
+        body = response["Body"]
+        try:
+            data = body.read()
+        finally:
+            body.close()
+        _object_cache.put(cache_key, data, response.get("ETag"))
+        return data
+
+    @timed(S3_SECONDS, operation="files_download_to_memory")
+    def files_download_to_memory(self, file_names, bucket_name=config.s3_bucket, cached=False):
+        """Download several objects concurrently."""
+        download = self.file_read_cached if cached else self.file_download_to_memory
+        futures = [
+            _fanout_executor.submit(download, file_name, bucket_name)
+            for file_name in file_names
+        ]
+        return [future.result() for future in futures]
+
+    def _head_exists(self, file_name, bucket_name):
+        bucket_name, file_name = self._split_path(file_name, bucket_name)
+        try:
+            self.client.head_object(Bucket=bucket_name, Key=file_name)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            output_log(f"Error checking file from S3: {e}", "error")
+            return None
+        except Exception as e:
+            output_log(f"Error checking file from S3: {e}", "error")
+            return None
+
+    @timed(S3_SECONDS, operation="files_exist")
+    def files_exist(self, file_names, bucket_name=config.s3_bucket):
+        """Check many keys with concurrent HEAD requests.
+
+        Only a 404 counts as missing; keys whose check failed for any other
+        reason map to None.
+        """
+        futures = {
+            file_name: _fanout_executor.submit(self._head_exists, file_name, bucket_name)
+            for file_name in file_names
+        }
+        return {file_name: future.result() for file_name, future in futures.items()}
+
+    @timed(S3_SECONDS, operation="remove_files")
+    def remove_files(self, file_names, bucket_name=config.s3_bucket):
+        """Delete many keys with batched delete_objects requests."""
+        by_bucket = {}
+        for file_name in file_names:
+            bucket, key = self._split_path(file_name, bucket_name)
+            by_bucket.setdefault(bucket, []).append(key)
+        success = True
+        try:
+            for bucket, keys in by_bucket.items():
+                for i in range(0, len(keys), _DELETE_BATCH_SIZE):
+                    response = self.client.delete_objects(
+                        Bucket=bucket,
+                        Delete={
+                            "Objects": [
+                                {"Key": key} for key in keys[i:i + _DELETE_BATCH_SIZE]
+                            ],
+                            "Quiet": True,
+                        },
+                    )
+                    for error in response.get("Errors", []):
+                        output_log(
+                            f"Error removing file {error.get('Key')} from S3: {error.get('Message')}",
+                            "error",
+                        )
+                        success = False
+        except Exception as e:
+            output_log(f"Error removing files from S3: {e}", "error")
+            return False
+        return success
+
+    # Async API: the blocking calls above run on the bounded S3 executor so
+    # that S3 latency does not stall the event loop.
+    async def _run_async(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def afile_upload_from_string(self, file_content, file_name, content_type, bucket_name=config.s3_bucket):
+        return await self._run_async(
+            self.file_upload_from_string, file_content, file_name, content_type, bucket_name
+        )
+
+    async def afile_upload_from_fileobj(self, file_obj, file_name, content_type, bucket_name=config.s3_bucket):
+        return await self._run_async(
+            self.file_upload_from_fileobj, file_obj, file_name, content_type, bucket_name
+        )
+
+    async def afile_download(self, file_name, download_path, bucket_name=config.s3_bucket):
+        return await self._run_async(
+            self.file_download, file_name, download_path, bucket_name
+        )
+
+    async def afile_download_to_memory(self, file_name, bucket_name=config.s3_bucket):
+        return await self._run_async(
+            self.file_download_to_memory, file_name, bucket_name
+        )
+
+    async def afiles_download_to_memory(self, file_names, bucket_name=config.s3_bucket):
+        return await asyncio.gather(
+            *[self.afile_download_to_memory(file_name, bucket_name) for file_name in file_names]
+        )
+
+    async def afile_read_cached(self, file_name, bucket_name=config.s3_bucket):
+        return await self._run_async(self.file_read_cached, file_name, bucket_name)
+
+    async def afile_download_range(self, file_name, start, end=None, bucket_name=config.s3_bucket):
+        return await self._run_async(
+            self.file_download_range, file_name, start, end, bucket_name
+        )
+
+    async def afile_iter_chunks(
+        self, file_name, chunk_size=1024 * 1024, bucket_name=config.s3_bucket
+    ) -> AsyncIterator[bytes]:
+        iterator = self.file_iter_chunks(file_name, chunk_size, bucket_name)
+        sentinel = object()
+        try:
+            while True:
+                chunk = await self._run_async(next, iterator, sentinel)
+                if chunk is sentinel:
+                    break
+                yield chunk
+        finally:
+            iterator.close()
+
+    async def afile_exists(self, file_name, bucket_name=config.s3_bucket):
+        return await self._run_async(self.file_exists, file_name, bucket_name)
+
+    async def afiles_exist(self, file_names, bucket_name=config.s3_bucket):
+        return await self._run_async(self.files_exist, file_names, bucket_name)
+
+    async def aremove_files(self, file_names, bucket_name=config.s3_bucket):
+        return await self._run_async(self.remove_files, file_names, bucket_name)
@@ -19,6 +19,8 @@ from models.db_models import (
     get_session_maker,
 )
 from utils.log import output_log
+from utils.metrics import MYSQL_SECONDS
+import functools
 
 
 # Mapping of table names to ORM models
@@ -37,6 +39,19 @@ TABLE_MODEL_MAP = {
 }
 
 
+def _timed(operation: str):
+    """Observe the duration of a table operation, labelled with its table."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, table, *args, **kwargs):
+            with MYSQL_SECONDS.time(operation=operation, table=table):
+                return func(self, table, *args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
 class MysqlConnect:
     def __init__(self):
         self.SessionMaker = get_session_maker()
@@ -122,6 +137,7 @@ class MysqlConnect:
                 filters.append(column < value)
         return filters
 
+    @_timed("create")
     def create_record(self, table: str, data: dict):
         """Create a new record in the specified table"""
         model = self._get_model(table)
@@ -129,11 +145,12 @@ class MysqlConnect:
             record = model(**data)
             session.add(record)
             session.flush()
-            output_log(f"Created record in {table}: {data}", "debug")
+            output_log("Created record in %s: %s", "debug", table, data)
             session.refresh(record)
             return record.to_dict()
 
 
+    @_timed("read")
     def read_records(self, table: str, conditions: Optional[dict] = None) -> List[dict]:
         model = self._get_model(table)
         with self.get_session() as session:
@@ -144,9 +161,10 @@ class MysqlConnect:
                 query = query.filter(and_(*filters))
             
             results = query.all()
-            output_log(f"Read {len(results)} records from {table} with conditions: {conditions}", "debug")
+            output_log("Read %s records from %s with conditions: %s", "debug", len(results), table, conditions)
             return [record.to_dict() for record in results]
 
+    @_timed("update")
     def update_record(self, table: str, data: dict, conditions: dict):
         """Update records in the specified table matching the conditions"""
         model = self._get_model(table)
@@ -158,9 +176,10 @@ class MysqlConnect:
                 query = query.filter(and_(*filters))
             
             count = query.update(data, synchronize_session=False)
-            output_log(f"Updated {count} records in {table} with data: {data}", "debug")
+            output_log("Updated %s records in %s with data: %s", "debug", count, table, data)
             return count
 
+    @_timed("delete")
     def delete_record(self, table: str, conditions: Optional[dict]):
         """Delete records from the specified table matching the conditions"""
         model = self._get_model(table)
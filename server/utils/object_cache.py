@@ -0,0 +1,95 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional
+import threading
+import time
+
+
+@dataclass
+class CacheEntry:
+    data: bytes
+    etag: Optional[str]
+    validated_at: float
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+class ObjectCache:
+    """Size-bounded in-memory LRU for downloaded objects.
+
+    Entries younger than ``ttl`` seconds are served directly. Older entries are
+    kept so the caller can revalidate them with their ETag instead of
+    downloading the body again.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "revalidated": 0,
+            "evictions": 0,
+        }
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.monotonic() - entry.validated_at < self.ttl
+
+    def put(self, key: Hashable, data: bytes, etag: Optional[str]) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = CacheEntry(data, etag, time.monotonic())
+            self._size += len(data)
+            while self._size > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
+    def touch(self, key: Hashable) -> None:
+        """Mark an entry as revalidated."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.validated_at = time.monotonic()
+                self._stats["revalidated"] += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def record(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.size
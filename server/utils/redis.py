@@ -5,6 +5,7 @@ import redis
 
 from config.config import config
 from utils.log import output_log
+from utils.metrics import REDIS_SECONDS, timed
 
 # Tables we support in Redis caching layer
 ALLOWED_TABLES = {"operator", "model", "user", "tools", "knowledge_base"}
@@ -36,6 +37,7 @@ class RedisCache:
     def _index_key(self, table: str) -> str:
         return f"{table}:ids"
 
+    @timed(REDIS_SECONDS, operation="save_record")
     def save_record(self, table: str, record: Dict[str, Any], id: str = "id") -> None:
         """Upsert a single record into Redis."""
         self._assert_table(table)
@@ -53,6 +55,7 @@ class RedisCache:
         pipe.execute()
         output_log(f"Cached {table} record with id={record_id}", "debug")
 
+    @timed(REDIS_SECONDS, operation="load_records")
     def load_records(self, table: str, records: Iterable[Dict[str, Any]], id: str = "id") -> None:
         """Bulk load a collection of records into Redis."""
         self._assert_table(table)
@@ -70,12 +73,14 @@ class RedisCache:
             pipe.execute()
             output_log(f"Bulk cached {count} {table} records", "debug")
 
+    @timed(REDIS_SECONDS, operation="get_record")
     def get_record(self, table: str, record_id: str) -> Optional[Dict[str, Any]]:
         """Get a single record from Redis."""
         self._assert_table(table)
         payload = self.client.get(self._record_key(table, record_id))
         return json.loads(payload) if payload else None
 
+    @timed(REDIS_SECONDS, operation="get_records")
     def get_records(self, table: str) -> List[Dict[str, Any]]:
         """Get all cached records for a table."""
         self._assert_table(table)
@@ -90,6 +95,7 @@ class RedisCache:
         results.sort(key=lambda r: r.get("id", ""))
         return results
 
+    @timed(REDIS_SECONDS, operation="delete_record")
     def delete_record(self, table: str, record_id: str) -> None:
         """Remove a single record from Redis."""
         self._assert_table(table)
@@ -99,6 +105,7 @@ class RedisCache:
         pipe.execute()
         output_log(f"Deleted {table} record id={record_id} from Redis", "debug")
 
+    @timed(REDIS_SECONDS, operation="clear_table")
     def clear_table(self, table: str) -> None:
         """Remove all cached records for a table."""
         self._assert_table(table)